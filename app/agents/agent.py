@@ -1,27 +1,92 @@
 import asyncio
+import time
+from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
 
+from decouple import config
 from fastapi import FastAPI
 from pydantic_ai import Agent
+from pydantic_ai.exceptions import UserError
 
 from app.agents.agent_info import get_a2a_params
+from app.agents.reply import AgentReply
+from app.agents.response_cache import ResponseCache, cache_key
 from app.agents.routes import add_agent_routes
-from app.core.provider import agent_model, model_settings
+from app.core.archive import HistoryArchiver
+from app.core.compaction import SUMMARY_PROMPT, HistoryCompactor, summary_request
+from app.core.connections import pool_stats
+from app.core.health import redis_reachable
+from app.core.latency import LatencyWindow
+from app.core.metrics import AgentMetrics
+from app.core.provider import (
+    DEFAULT_MODEL,
+    get_model,
+    model_available,
+    model_settings,
+)
+from app.core.ratelimit import rate_limit_stats
 from app.core.redis import REDIS_CHANNEL, RedisHandler
+from app.core.resilience import circuit_stats
+from app.core.router import HedgedModel
+from app.core.scheduler import TurnScheduler
+from app.core.tracing import span
+
+# Group streamed tokens into chunks of this many seconds before publishing
+STREAM_DEBOUNCE = config("STREAM_DEBOUNCE", default=0.05, cast=float)
 
 
 class FastAgent:
     def __init__(self, a2a: dict, redis_channel: str = REDIS_CHANNEL):
         self.name = a2a["name"]
         self.system_prompt = a2a["system_prompt"]
+        self.stream = a2a.get("stream", False)
+        self.history_token_budget = a2a.get("history_token_budget")
+        self.response_cache = ResponseCache() if a2a.get("cache") else None
+        # Duration of recent agent calls, used by the supervisor to scale
+        self.latency = LatencyWindow()
         self.redis_channel = redis_channel
         self.redis_history = f"{self.redis_channel}_history"
 
+        self.model_spec = a2a.get("model")
+        spec = self.model_spec or DEFAULT_MODEL
+        try:
+            self.model = get_model(self.model_spec)
+        except UserError as e:
+            # E.g. a missing API key: keep serving, /healthz reports the model
+            # as unavailable and agent calls fail until the agent is restarted
+            print(f"⚠️ [{self.name}] Model {spec} unavailable: {e}")
+            self.model = None
+        self.metrics = AgentMetrics(
+            self.name, ",".join(spec) if isinstance(spec, list) else spec
+        )
         self.agent = Agent(
-            agent_model, system_prompt=self.system_prompt, model_settings=model_settings
+            self.model, system_prompt=self.system_prompt, model_settings=model_settings
         )
+        self.scheduler = None
+        if a2a.get("turn_taking") and a2a.get("participants"):
+            self.scheduler = TurnScheduler(
+                self.name,
+                self.redis_channel,
+                a2a["participants"],
+                **a2a["turn_taking"],
+            )
         self.redis_handler = RedisHandler(
-            self.name, self.redis_channel, self.redis_history
+            self.name,
+            self.redis_channel,
+            self.redis_history,
+            stream=self.stream,
+            history_token_budget=self.history_token_budget,
+            scheduler=self.scheduler,
+            metrics=self.metrics,
+        )
+        self.compactor = None
+        if self.history_token_budget:
+            self.summarizer = Agent(
+                self.model, system_prompt=SUMMARY_PROMPT, model_settings=model_settings
+            )
+            self.compactor = HistoryCompactor(self.redis_handler, self._summarize)
+        self.archiver = HistoryArchiver(
+            self.redis_handler, **(a2a.get("history_retention") or {})
         )
         tags_metadata = [
             {
@@ -37,31 +102,135 @@ class FastAgent:
             self.system_prompt,
             self.redis_channel,
             self._agent_call,
+            self.stats,
+            self.health,
+            self.model,
+            self.redis_handler.drain,
         )
 
     def get_a2a_app(self):
         """Get a standalone FastA2A application for this agent."""
         return self.agent.to_a2a(**get_a2a_params(self.name, self.system_prompt))
 
+    def stats(self) -> dict:
+        """Runtime counters for the /stats endpoint."""
+        return {
+            "history_cache": self.redis_handler.history_cache.stats(),
+            "inbox": self.redis_handler.inbox.stats(),
+            "latency": self.latency.stats(),
+            "pools": pool_stats(),
+            "history_token_budget": self.history_token_budget,
+            "compactions": self.compactor.compactions if self.compactor else 0,
+            "archived": self.archiver.archived,
+            "turn_taking": self.scheduler.stats() if self.scheduler else None,
+            "response_cache": self.response_cache.stats()
+            if self.response_cache
+            else None,
+            "router": self.model.stats()
+            if isinstance(self.model, HedgedModel)
+            else None,
+            "rate_limits": rate_limit_stats(),
+            "failures": self.metrics.failed.value,
+            "circuits": circuit_stats(),
+        }
+
+    async def health(self) -> dict[str, bool]:
+        """Readiness checks for the /healthz endpoint."""
+        return {
+            "redis": await redis_reachable(),
+            "subscriber": self.redis_handler.listening.is_set(),
+            "model": model_available(self.model_spec),
+        }
+
     @asynccontextmanager
     async def _lifespan(self, app: FastAPI):
         print(f"Starting up FastAgent '{self.name}'...")
-        asyncio.create_task(self.redis_handler.listen_and_respond(self._agent_call))
+        tasks = [
+            asyncio.create_task(self.redis_handler.listen_and_respond(self._agent_call))
+        ]
+        if self.compactor:
+            tasks.append(asyncio.create_task(self.compactor.run()))
+        if self.archiver.enabled:
+            tasks.append(asyncio.create_task(self.archiver.run()))
         yield
         print(f"Shutting down FastAgent '{self.name}'...")
+        for task in tasks:
+            task.cancel()
+
+    async def _agent_call(
+        self,
+        message: str,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        """Process message with agent and return response.
 
-    async def _agent_call(self, message: str):
-        """Process message with agent and return response."""
+        Failures are raised after provider retries (app.core.resilience).
+        With on_delta the model output is streamed and every text chunk is
+        passed to on_delta as soon as it arrives.
+        """
+        started = time.perf_counter()
         try:
             print(
                 f"🤖 [{self.name}] Processing: {message[:100]}{'...' if len(message) > 100 else ''}"
             )
-            messages = await self.redis_handler.get_message_history()
-            response = await self.agent.run(message, message_history=messages)
+            with span("history_load", self.name):
+                messages = await self.redis_handler.get_message_history()
+            self.metrics.history_load.observe(time.perf_counter() - started)
+            key = response = None
+            if self.response_cache:
+                key = cache_key(
+                    f"{self.model.system}:{self.model.model_name}",
+                    model_settings,
+                    self.system_prompt,
+                    messages,
+                    message,
+                )
+                response = await self.response_cache.get(key)
+                if response and on_delta:
+                    await on_delta(response.output)
+            if response is None:
+                called = time.perf_counter()
+                with span("model_call", self.name, model=self.model.model_name) as call:
+                    if on_delta:
+                        response = await self._agent_stream(message, messages, on_delta)
+                    else:
+                        response = await self.agent.run(
+                            message, message_history=messages
+                        )
+                    usage = response.usage()
+                    call.attributes["input_tokens"] = usage.request_tokens
+                    call.attributes["output_tokens"] = usage.response_tokens
+                self.metrics.llm_call.observe(time.perf_counter() - called)
+                self.metrics.tokens(usage)
+                if key:
+                    await self.response_cache.put(key, response)
+            self.latency.record(time.perf_counter() - started)
             print(
                 f"✅ [{self.name}] Response: {response.output[:100]}{'...' if len(response.output) > 100 else ''}"
             )
             return response
         except Exception as e:
-            print(f"❌ [{self.name}] Agent failed: {e}")
-            return f"**{self.name}:** Sorry, I couldn't process that."
+            # Raised, not answered: error text must never enter the conversation
+            self.metrics.failed.inc()
+            print(f"❌ [{self.name}] Agent failed: {e!r}")
+            raise
+
+    async def _agent_stream(self, message: str, messages, on_delta) -> AgentReply:
+        """Run the agent in streaming mode, forwarding text deltas to on_delta."""
+        chunks: list[str] = []
+        async with self.agent.run_stream(message, message_history=messages) as result:
+            async for delta in result.stream_text(
+                delta=True, debounce_by=STREAM_DEBOUNCE
+            ):
+                chunks.append(delta)
+                await on_delta(delta)
+            return AgentReply(
+                output="".join(chunks),
+                messages_json=result.new_messages_json(),
+                run_usage=result.usage(),
+            )
+
+    async def _summarize(self, previous: str, transcript: str) -> str:
+        """Fold new transcript lines into the rolling history summary."""
+        result = await self.summarizer.run(summary_request(previous, transcript))
+        return result.output
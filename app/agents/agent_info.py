@@ -1,16 +1,25 @@
 """Agent information gathering utilities using pydantic-ai FastA2A standards."""
 
 from fasta2a.schema import AgentCard, Authentication, Capabilities
+from pydantic_ai.models import Model
 
-from app.core.provider import agent_model, model_settings
+from app.core.provider import model_settings
 
 
-def get_model_info() -> dict:
+def get_model_info(model: Model | None) -> dict:
     """Get comprehensive model information."""
+    if model is None:
+        # Not built, e.g. for a missing API key
+        return {
+            "model_name": None,
+            "base_url": None,
+            "provider": None,
+            "settings": model_settings,
+        }
     return {
-        "model_name": str(agent_model.model_name),
-        "base_url": str(agent_model.base_url),
-        "provider": _detect_provider(agent_model.base_url),
+        "model_name": str(model.model_name),
+        "base_url": str(model.base_url),
+        "provider": _detect_provider(model.base_url),
         "settings": model_settings,
     }
 
@@ -26,27 +35,33 @@ def create_agent_card(agent_name: str, system_prompt: str) -> AgentCard:
         default_input_modes=["application/json", "text/plain"],
         default_output_modes=["application/json", "text/plain"],
         capabilities=Capabilities(
-            streaming=False,
+            streaming=True,  # POST /chat/stream and Redis stream chunks
             push_notifications=True,  # We support Redis pub/sub
         ),
         authentication=Authentication(schemes=[]),
     )
 
 
-def get_agent_info(agent_name: str, system_prompt: str, redis_channel: str) -> dict:
+def get_agent_info(
+    agent_name: str, system_prompt: str, redis_channel: str, model: Model
+) -> dict:
     """Get comprehensive agent information with FastA2A compatibility."""
     agent_card = create_agent_card(agent_name, system_prompt)
 
     return {
         "agent_card": agent_card,
         "system_prompt": system_prompt,
-        "model_info": get_model_info(),
+        "model_info": get_model_info(model),
         "redis_config": {
             "channel": redis_channel,
             "history_key": f"{redis_channel}_history",
         },
         "endpoints": {
             "chat": "POST /chat - Direct agent interaction",
+            "chat_stream": "POST /chat/stream - Streamed reply as server-sent events",
+            "stats": "GET /stats - Runtime counters",
+            "healthz": "GET /healthz - Readiness probe",
+            "metrics": "GET /metrics - Prometheus metrics",
             "agent_card": "GET /.well-known/agent.json - FastA2A agent card",
             "docs": "GET /docs - API documentation",
         },
@@ -0,0 +1,27 @@
+"""Agent reply container for runs that do not produce an AgentRunResult."""
+
+from dataclasses import dataclass, field
+
+from pydantic_ai.usage import Usage
+
+
+@dataclass
+class AgentReply:
+    """Finished agent reply with the same surface as AgentRunResult.
+
+    RedisHandler and the routes only need ``output``, ``new_messages_json()``
+    and ``usage()``, so streamed runs can hand this around instead.
+    """
+
+    output: str
+    messages_json: bytes
+    run_usage: Usage = field(default_factory=Usage)
+
+    def new_messages_json(self) -> bytes:
+        return self.messages_json
+
+    def usage(self) -> Usage:
+        return self.run_usage
+
+
+__all__ = ["AgentReply"]
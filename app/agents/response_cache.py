@@ -0,0 +1,130 @@
+"""Redis-backed cache of model replies for identical requests."""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+
+from decouple import config
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
+
+from app.agents.reply import AgentReply
+from app.core.connections import redis_client
+
+LLM_CACHE_TTL = config("LLM_CACHE_TTL", default=86400, cast=int)
+LLM_CACHE_MAX_ENTRIES = config("LLM_CACHE_MAX_ENTRIES", default=1000, cast=int)
+LLM_CACHE_PREFIX = "llm_cache"
+
+# Fields that differ between two otherwise identical runs
+_VOLATILE_FIELDS = {"timestamp", "usage", "vendor_id", "vendor_details", "agent_sender"}
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {
+            key: _normalize(item)
+            for key, item in value.items()
+            if key not in _VOLATILE_FIELDS
+        }
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def cache_key(
+    model: str,
+    settings: dict | None,
+    system_prompt: str,
+    history: list[ModelMessage],
+    message: str,
+) -> str:
+    """Hash of everything that determines the model's reply."""
+    payload = {
+        "model": model,
+        "settings": settings or {},
+        "system_prompt": system_prompt,
+        "history": _normalize(
+            ModelMessagesTypeAdapter.dump_python(history, mode="json")
+        ),
+        "message": message,
+    }
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+    return f"{LLM_CACHE_PREFIX}:{digest}"
+
+
+def _restamp(messages_json: str | bytes) -> bytes:
+    """Give replayed messages the current time, they end up in the history."""
+    now = datetime.now(timezone.utc)
+    messages = ModelMessagesTypeAdapter.validate_json(messages_json)
+    for message in messages:
+        if hasattr(message, "timestamp"):
+            message.timestamp = now
+        for part in message.parts:
+            if hasattr(part, "timestamp"):
+                part.timestamp = now
+    return ModelMessagesTypeAdapter.dump_json(messages)
+
+
+class ResponseCache:
+    """Replay model replies for requests that were answered before.
+
+    Entries live at ``llm_cache:<sha256>`` with a TTL. A sorted set
+    ``llm_cache:lru`` scores every key by its last use; once it holds more
+    than `max_entries` keys the least recently used ones are evicted.
+    Replayed replies report zero usage, no tokens were spent.
+    """
+
+    def __init__(
+        self, ttl: int = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_key = f"{LLM_CACHE_PREFIX}:lru"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> AgentReply | None:
+        cached = await redis_client.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        await redis_client.zadd(self.lru_key, {key: time.time()})
+        entry = json.loads(cached)
+        return AgentReply(
+            output=entry["output"], messages_json=_restamp(entry["messages"])
+        )
+
+    async def put(self, key: str, reply) -> None:
+        entry = {
+            "output": reply.output,
+            "messages": reply.new_messages_json().decode(),
+        }
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(key, json.dumps(entry), ex=self.ttl)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            *_, size = await pipe.execute()
+
+        if size > self.max_entries:
+            evicted = await redis_client.zpopmin(self.lru_key, size - self.max_entries)
+            if evicted:
+                await redis_client.delete(*(key for key, _ in evicted))
+                self.evictions += len(evicted)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+__all__ = ["ResponseCache", "cache_key", "LLM_CACHE_TTL", "LLM_CACHE_MAX_ENTRIES"]
@@ -1,9 +1,26 @@
 """API route handlers for FastAgent."""
 
-from fastapi import FastAPI
+import asyncio
+import json
+import math
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.agents.agent_info import create_agent_card, get_agent_info
+from app.core.health import health_response
+from app.core.metrics import metrics_response
 from app.core.models import ChatRequest, ChatResponse
+from app.core.resilience import error_status
+
+
+def agent_error(agent_name: str, error: Exception) -> HTTPException:
+    """The HTTP error for a failed agent call, e.g. 503 while a circuit is open."""
+    status, retry_in = error_status(error)
+    headers = {"Retry-After": str(math.ceil(retry_in))} if retry_in else None
+    return HTTPException(
+        status, detail=f"{agent_name} failed: {error}", headers=headers
+    )
 
 
 def add_agent_routes(
@@ -12,20 +29,86 @@ def add_agent_routes(
     system_prompt: str,
     redis_channel: str,
     agent_run_func,
+    stats_func,
+    health_func,
+    model,
+    drain_func,
 ):
     """Add all agent API routes to FastAPI app."""
 
     @app.get("/")
     async def agent_info():
-        return get_agent_info(agent_name, system_prompt, redis_channel)
+        return get_agent_info(agent_name, system_prompt, redis_channel, model)
+
+    @app.get("/stats")
+    async def agent_stats():
+        return stats_func()
+
+    @app.get("/metrics")
+    async def agent_metrics():
+        """Prometheus metrics of every agent in this process."""
+        return metrics_response()
+
+    @app.get("/healthz")
+    async def agent_health():
+        """Ready once Redis answers, the listener is attached and the model can be called."""
+        return health_response(await health_func())
+
+    @app.post("/drain")
+    async def agent_drain(timeout: float = 30.0):
+        """Stop taking messages and answer the queued ones, before a scale-down."""
+        return {"drained": await drain_func(timeout)}
 
     @app.post("/chat", response_model=ChatResponse, tags=["chat"])
     async def chat_with_agent(request: ChatRequest):
         try:
             response = await agent_run_func(request.message)
-            return ChatResponse(response=response.output, agent_name=agent_name)
         except Exception as e:
-            return ChatResponse(response=f"Error: {str(e)}", agent_name=agent_name)
+            raise agent_error(agent_name, e)
+        return ChatResponse(response=response.output, agent_name=agent_name)
+
+    @app.post("/chat/stream", tags=["chat"])
+    async def chat_with_agent_stream(request: ChatRequest):
+        """Stream the reply as server-sent events: one `data:` line per delta.
+
+        A failure before the first delta is answered with the same status as
+        /chat; once the stream has started it ends with an `error` event.
+        """
+        deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def run():
+            try:
+                return await agent_run_func(request.message, on_delta=deltas.put)
+            finally:
+                await deltas.put(None)
+
+        task = asyncio.create_task(run())
+        try:
+            first = await deltas.get()
+            if first is None:
+                # Finished without any output, maybe failed before streaming
+                await asyncio.wait([task])
+                if task.exception():
+                    raise agent_error(agent_name, task.exception())
+        except BaseException:
+            task.cancel()
+            raise
+
+        async def events():
+            try:
+                delta = first
+                while delta is not None:
+                    yield f"data: {json.dumps({'delta': delta})}\n\n"
+                    delta = await deltas.get()
+                response = await task
+                done = ChatResponse(response=response.output, agent_name=agent_name)
+                yield f"event: done\ndata: {done.model_dump_json()}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            finally:
+                task.cancel()
+
+        return StreamingResponse(events(), media_type="text/event-stream")
 
     @app.get("/.well-known/agent.json")
     async def agent_manifest():
@@ -9,22 +9,52 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from app.core.broadcast import Broadcaster
+from app.core.connections import close_connections, pool_stats
+from app.core.health import health_response, redis_reachable
+from app.core.metrics import WS_CONNECTIONS, metrics_response
 from app.core.models import ChatMessage
-from app.core.redis import REDIS_CHANNEL, publish_to_redis, redis_client
+from app.core.redis import (
+    REDIS_CHANNEL,
+    REDIS_TRANSPORT,
+    publish_to_redis,
+    read_events,
+    redis_client,
+    stream_channel,
+    subscribe,
+)
+from app.core.tasks import LoopLagMonitor, supervise
+from app.core.tracing import exporter, span
 
 load_dotenv()
 
-# Store active WebSocket connections
-active_connections: list[WebSocket] = []
+# Active WebSocket connections, each with its own send queue
+broadcaster = Broadcaster()
+
+loop_lag = LoopLagMonitor()
+
+# Set while monitor_messages is subscribed
+monitor_ready = asyncio.Event()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up Agent...")
     await initialize_redis_topics()
-    asyncio.create_task(monitor_messages())
+    tasks = [
+        asyncio.create_task(supervise("monitor_messages", monitor_messages)),
+        asyncio.create_task(loop_lag.run()),
+    ]
+    if REDIS_TRANSPORT == "streams":
+        tasks.append(asyncio.create_task(supervise("monitor_events", monitor_events)))
     yield
     print("Shutting down Agent...")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await broadcaster.aclose()
+    await close_connections()
+    exporter.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -40,11 +70,34 @@ async def get(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        "connections": len(broadcaster),
+        "broadcast": broadcaster.stats(),
+        "event_loop": loop_lag.stats(),
+        "pools": pool_stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    WS_CONNECTIONS.set(len(broadcaster))
+    return metrics_response()
+
+
+@app.get("/healthz")
+async def healthz():
+    return health_response(
+        {"redis": await redis_reachable(), "subscriber": monitor_ready.is_set()}
+    )
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket connection accepted")
-    active_connections.append(websocket)
+    broadcaster.connect(websocket)
     try:
         async for content in websocket.iter_text():
             # print(f"Received raw content: {content}")
@@ -54,8 +107,14 @@ async def websocket_endpoint(websocket: WebSocket):
                 msg = ChatMessage(**parsed)
 
                 # !beware: not happens in monitor_messages or twice
-                await websocket.send_json(msg.model_dump())
-                await publish_to_redis(msg)
+                broadcaster.send(websocket, msg.model_dump())
+                # A human message starts a new trace
+                with span("publish", "chat_server", sender=msg.sender) as publishing:
+                    msg.trace_id, msg.parent_id = (
+                        publishing.trace_id,
+                        publishing.span_id,
+                    )
+                    await publish_to_redis(msg)
                 print(f"Published to Redis: {msg.content}")
 
             except json.JSONDecodeError as e:
@@ -63,15 +122,16 @@ async def websocket_endpoint(websocket: WebSocket):
             except Exception as e:
                 print(f"Error processing message: {e}")
 
+        # iter_text() ends quietly when the browser goes away
+        broadcaster.disconnect(websocket)
+
     except WebSocketDisconnect as e:
         print(f"Connection closed: {e.code}: {e.reason}")
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        broadcaster.disconnect(websocket)
         return
     except Exception as e:
         print(f"WebSocket error: {e}")
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        broadcaster.disconnect(websocket)
         return
 
 
@@ -82,39 +142,50 @@ async def initialize_redis_topics():
 
 
 async def monitor_messages():
-    # Subscribe to the chat channel
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(REDIS_CHANNEL)
-
-    while True:
-        message = await pubsub.get_message(ignore_subscribe_messages=True)
-        if message and active_connections:
-            try:
-                # print(f"pubsub {message}")
-                data = json.loads(message["data"])
-                content = data.get("response", data.get("content", ""))
-                sender = data.get("sender", "unknown")
-                # print(f"Received from {sender}: {content}")
-
-                # recieved an answer from one of the agents
-                # Send to all connected WebSocket clients
-                for connection in active_connections:
-                    try:
-                        if sender != "Agent Rebel" and content != "":
-                            parsed = {
-                                "type": "message",
-                                "content": content,
-                                "sender": sender,
-                                "role": "user",
-                            }
-                            msg = ChatMessage(**parsed)
-                            # !beware: not happens in monitor_messages or twice
-                            await connection.send_json(msg.model_dump())
-                    except Exception as e:
-                        print(f"Error sending to client: {e}")
-
-            except Exception as e:
-                print(f"Error processing message: {e}")
+    # Sleeps on the subscription until Redis pushes a message.
+    # Token deltas always use pub/sub, chat messages only with that transport.
+    channels = [stream_channel(REDIS_CHANNEL)]
+    if REDIS_TRANSPORT == "pubsub":
+        channels.append(REDIS_CHANNEL)
+    async for message in subscribe(*channels, ready=monitor_ready):
+        relay_message(message["data"])
+
+
+async def monitor_events():
+    # Streams transport: follow the channel's event stream as an observer
+    async for fields in read_events(REDIS_CHANNEL):
+        relay_message(fields["data"])
+
+
+def relay_message(raw: str):
+    if len(broadcaster):
+        try:
+            # print(f"pubsub {raw}")
+            data = json.loads(raw)
+            content = data.get("response", data.get("content", ""))
+            sender = data.get("sender", "unknown")
+            # print(f"Received from {sender}: {content}")
+
+            # recieved an answer from one of the agents
+            # Build the browser message once and queue it for every client
+            if sender != "Agent Rebel" and content != "":
+                parsed = {
+                    "type": data.get("type", "message"),
+                    "content": content,
+                    "sender": sender,
+                    "role": "user",
+                    "stream_id": data.get("stream_id"),
+                }
+                msg = ChatMessage(**parsed)
+                # !beware: not happens in monitor_messages or twice
+                if data.get("trace_id") and msg.type != "stream":
+                    with span("relay", "chat_server", data, sender=sender):
+                        broadcaster.broadcast(msg.model_dump())
+                else:
+                    broadcaster.broadcast(msg.model_dump())
+
+        except Exception as e:
+            print(f"Error processing message: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+"""Bounded history retention with a compressed archive on local disk.
+
+A channel keeps its newest entries hot in ``{channel}_history``: at most
+the last ``entries`` of them, none older than ``hours``, but always the
+newest HISTORY_WINDOW that the history cache reads. The rest is moved in
+the background to gzip segments in ``ARCHIVE_DIR/<channel>/``, listed in an
+``index.jsonl`` that the export tooling reads directly.
+
+Entries keep their position, counted from the first entry ever written:
+the head of the list is at ``{channel}_history_seq`` minus its length, so
+sequence numbers, the history cache and compaction are not affected by the
+trim. One agent per channel archives at a time, guarded by a lock key.
+ARCHIVE_DIR is local, so agents of one channel on several hosts should
+share it.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from decouple import config
+
+from app.core.codec import entry_text, load_entry
+from app.core.connections import redis_binary, redis_client
+from app.core.history import HISTORY_WINDOW
+from app.core.redis import RedisHandler
+
+# Defaults for channels without meta.history_retention in agents.yml; 0 keeps
+# everything in Redis
+HISTORY_RETENTION_ENTRIES = config("HISTORY_RETENTION_ENTRIES", default=0, cast=int)
+HISTORY_RETENTION_HOURS = config("HISTORY_RETENTION_HOURS", default=0.0, cast=float)
+ARCHIVE_DIR = config("ARCHIVE_DIR", default="history-archive")
+# Seconds between retention checks, and entries moved per segment at most
+ARCHIVE_INTERVAL = config("ARCHIVE_INTERVAL", default=60.0, cast=float)
+ARCHIVE_BATCH = config("ARCHIVE_BATCH", default=1000, cast=int)
+ARCHIVE_LOCK_TTL = 120
+
+INDEX_FILE = "index.jsonl"
+
+
+def entry_time(raw: str | bytes) -> datetime | None:
+    """Timestamp of the newest message in a stored history entry."""
+    stamps = [message.get("timestamp") for message in load_entry(raw)]
+    stamps = [datetime.fromisoformat(stamp) for stamp in stamps if stamp]
+    return max(stamps, default=None)
+
+
+@dataclass
+class Segment:
+    """Archived entries ``first`` to ``last`` (positions, inclusive)."""
+
+    first: int
+    last: int
+    file: str
+    oldest: str | None = None
+    newest: str | None = None
+
+
+class HistoryArchive:
+    """Gzip segments of archived history entries, one JSON entry per line."""
+
+    def __init__(self, directory: str | Path = ARCHIVE_DIR):
+        self.directory = Path(directory)
+
+    def _topic_dir(self, topic: str) -> Path:
+        return self.directory / topic
+
+    def segments(self, topic: str) -> list[Segment]:
+        """Segments of a topic by position; a segment archived twice counts once."""
+        index = self._topic_dir(topic) / INDEX_FILE
+        if not index.exists():
+            return []
+        segments = {}
+        for line in index.read_text().splitlines():
+            if line.strip():
+                segment = Segment(**json.loads(line))
+                segments[segment.first] = segment
+        return sorted(segments.values(), key=lambda segment: segment.first)
+
+    def write(self, topic: str, first: int, entries: list[str | bytes]) -> Segment:
+        """Store entries starting at position `first` as a new segment.
+
+        The segment file is complete before it is indexed, and the index
+        line is written before the entries leave Redis.
+        """
+        directory = self._topic_dir(topic)
+        directory.mkdir(parents=True, exist_ok=True)
+        times = [entry_time(entry) for entry in (entries[0], entries[-1])]
+        segment = Segment(
+            first,
+            first + len(entries) - 1,
+            f"{first:012d}.jsonl.gz",
+            *(stamp.isoformat() if stamp else None for stamp in times),
+        )
+        path = directory / segment.file
+        temporary = path.with_suffix(".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8") as file:
+            for entry in entries:
+                # JSON whatever the codec: gzip compresses it just as well
+                file.write(entry_text(entry) + "\n")
+        os.replace(temporary, path)
+        with open(directory / INDEX_FILE, "a", encoding="utf-8") as index:
+            index.write(json.dumps(segment.__dict__) + "\n")
+            index.flush()
+            os.fsync(index.fileno())
+        return segment
+
+    def read(
+        self, topic: str, start: int = 0, end: int | None = None
+    ) -> Iterator[tuple[int, str]]:
+        """(position, entry) of archived entries from `start` up to `end`."""
+        for segment in self.segments(topic):
+            if segment.last < start or (end is not None and segment.first >= end):
+                continue
+            path = self._topic_dir(topic) / segment.file
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                for position, line in enumerate(file, segment.first):
+                    if end is not None and position >= end:
+                        break
+                    if position >= start:
+                        yield position, line.rstrip("\n")
+
+    def pages(
+        self, topic: str, start: int, page_size: int, end: int | None = None
+    ) -> Iterator[tuple[int, list[str]]]:
+        """The archived entries of `read` grouped into pages."""
+        first, page = start, []
+        for position, entry in self.read(topic, start, end):
+            if not page:
+                first = position
+            page.append(entry)
+            if len(page) == page_size:
+                yield first, page
+                page = []
+        if page:
+            yield first, page
+
+
+archive = HistoryArchive()
+
+
+class HistoryArchiver:
+    """Move entries past a channel's retention from Redis into the archive."""
+
+    def __init__(
+        self,
+        handler: RedisHandler,
+        entries: int = HISTORY_RETENTION_ENTRIES,
+        hours: float = HISTORY_RETENTION_HOURS,
+        store: HistoryArchive = archive,
+    ):
+        self.handler = handler
+        # The history cache reads the newest window, which always stays hot
+        self.entries = max(entries, HISTORY_WINDOW) if entries else 0
+        self.hours = hours
+        self.store = store
+        self.topic = handler.redis_history.removesuffix("_history")
+        self.lock_key = f"{handler.redis_history}_archive:lock"
+        self.archived = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.entries or self.hours)
+
+    async def run(self, interval: float = ARCHIVE_INTERVAL):
+        while True:
+            try:
+                while await self.archive() == ARCHIVE_BATCH:
+                    pass
+            except Exception as e:
+                print(f"[{self.handler.agent_name}] History archiving failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def archive(self) -> int:
+        """Archive one batch of expired entries; returns how many were moved."""
+        token = uuid.uuid4().hex
+        if not await redis_client.set(
+            self.lock_key, token, nx=True, ex=ARCHIVE_LOCK_TTL
+        ):
+            return 0
+        try:
+            return await self._archive_locked()
+        finally:
+            if await redis_client.get(self.lock_key) == token:
+                await redis_client.delete(self.lock_key)
+
+    async def _expired(self, length: int) -> list[bytes]:
+        """The entries at the head of the list that are past retention."""
+        history = self.handler.redis_history
+        count = min(max(length - self.entries, 0) if self.entries else 0, ARCHIVE_BATCH)
+        if not self.hours:
+            return await redis_binary.lrange(history, 0, count - 1) if count else []
+        head = await redis_binary.lrange(history, 0, ARCHIVE_BATCH - 1)
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self.hours)
+        # Never below the newest window, whatever the clock says
+        for raw in head[count : max(length - HISTORY_WINDOW, 0)]:
+            stamp = entry_time(raw)
+            if stamp is None or stamp >= cutoff:
+                break
+            count += 1
+        return head[:count]
+
+    async def _archive_locked(self) -> int:
+        history = self.handler.redis_history
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.get(self.handler.redis_history_seq)
+            pipe.llen(history)
+            head, length = await pipe.execute()
+        if head is None:
+            # History written before sequence numbers existed
+            await redis_client.setnx(self.handler.redis_history_seq, length)
+            head = length
+        expired = await self._expired(length)
+        if not expired:
+            return 0
+
+        # Appends only grow the tail, and trimming the head is ours under the lock
+        first = int(head) - length
+        await asyncio.to_thread(self.store.write, self.topic, first, expired)
+        await redis_client.ltrim(history, len(expired), -1)
+        self.archived += len(expired)
+        print(
+            f"🗄️ [{self.handler.agent_name}] Archived history #{first + 1}"
+            f"-#{first + len(expired)} of {self.topic}"
+        )
+        return len(expired)
+
+
+__all__ = [
+    "HistoryArchive",
+    "HistoryArchiver",
+    "Segment",
+    "archive",
+    "entry_time",
+    "ARCHIVE_DIR",
+    "HISTORY_RETENTION_ENTRIES",
+    "HISTORY_RETENTION_HOURS",
+]
@@ -0,0 +1,143 @@
+"""WebSocket fan-out with per-client send queues."""
+
+import asyncio
+import json
+import time
+
+from decouple import config
+from fastapi import WebSocket
+
+from app.core.metrics import BROADCAST
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+
+WS_SEND_QUEUE_SIZE = config("WS_SEND_QUEUE_SIZE", default=100, cast=int)
+WS_SLOW_CONSUMER_POLICY = config("WS_SLOW_CONSUMER_POLICY", default="drop_oldest")
+
+
+class _Client:
+    __slots__ = ("websocket", "queue", "task", "dropped")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        # (frame, time it was queued)
+        self.queue: asyncio.Queue[tuple[str, float]] = asyncio.Queue(queue_size)
+        self.task: asyncio.Task | None = None
+        self.dropped = 0
+
+
+class Broadcaster:
+    """Serialize each message once and hand it to one writer task per client.
+
+    Every connection owns a bounded queue drained by its own task, so a slow
+    browser only ever delays itself. When a queue is full the slow consumer
+    policy decides what happens: ``drop_oldest`` discards the oldest queued
+    frame, ``disconnect`` closes the laggard's socket.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_SLOW_CONSUMER_POLICY,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(
+                f"Unknown slow consumer policy {policy!r}, "
+                f"expected one of {SLOW_CONSUMER_POLICIES}"
+            )
+        self.queue_size = queue_size
+        self.policy = policy
+        self._clients: dict[WebSocket, _Client] = {}
+        self._closing: set[asyncio.Task] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.last_fanout_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def connect(self, websocket: WebSocket):
+        """Register an accepted WebSocket and start its writer task."""
+        client = _Client(websocket, self.queue_size)
+        client.task = asyncio.create_task(self._writer(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket: WebSocket):
+        """Forget a WebSocket and stop its writer task."""
+        client = self._clients.pop(websocket, None)
+        if client and client.task:
+            client.task.cancel()
+
+    def broadcast(self, payload: dict) -> int:
+        """Queue a payload for every client; returns the number of recipients."""
+        start = time.perf_counter()
+        text = json.dumps(payload)
+        clients = list(self._clients.values())
+        for client in clients:
+            self._enqueue(client, text, start)
+        self.last_fanout_ms = (time.perf_counter() - start) * 1000
+        return len(clients)
+
+    def send(self, websocket: WebSocket, payload: dict):
+        """Queue a payload for a single client, keeping its frame order."""
+        client = self._clients.get(websocket)
+        if client:
+            self._enqueue(client, json.dumps(payload), time.perf_counter())
+
+    async def aclose(self):
+        """Stop all writer tasks."""
+        tasks = [client.task for client in self._clients.values() if client.task]
+        self._clients.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self._closing, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._clients),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "queued": sum(c.queue.qsize() for c in self._clients.values()),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "last_fanout_ms": round(self.last_fanout_ms, 3),
+        }
+
+    def _enqueue(self, client: _Client, text: str, queued: float):
+        try:
+            client.queue.put_nowait((text, queued))
+            return
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            print("Disconnecting slow WebSocket client")
+            self.disconnected += 1
+            self.disconnect(client.websocket)
+            task = asyncio.create_task(client.websocket.close(code=1013))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            client.queue.get_nowait()
+            client.queue.put_nowait((text, queued))
+            client.dropped += 1
+            self.dropped += 1
+
+    async def _writer(self, client: _Client):
+        try:
+            while True:
+                text, queued = await client.queue.get()
+                await client.websocket.send_text(text)
+                self.sent += 1
+                BROADCAST.observe(time.perf_counter() - queued)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error sending to client: {e}")
+            if self._clients.get(client.websocket) is client:
+                del self._clients[client.websocket]
+
+
+__all__ = ["Broadcaster", "SLOW_CONSUMER_POLICIES"]
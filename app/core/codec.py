@@ -0,0 +1,198 @@
+"""Storage codecs for history entries.
+
+HISTORY_CODEC picks how an entry's messages are serialized: ``json`` (what
+older versions wrote), ``orjson`` (the same JSON without whitespace, faster
+to write) or ``msgpack``. HISTORY_COMPRESSION ``zstd`` compresses them, with
+the shared dictionary in HISTORY_ZSTD_DICT if set (train one with
+``python -m scripts.migrate_history --train-dict``). msgpack and zstandard
+are optional packages, needed only when they are configured or read.
+
+JSON entries are stored as they are, readable by anything. Binary entries
+start with a NUL byte, the serializer and the compression, which no JSON
+entry does, so every reader handles both and a deployment can switch codecs
+and migrate its history while agents run. Keep a dictionary file once
+entries were written with it: they cannot be read without it.
+"""
+
+import importlib
+import importlib.util
+import json
+from pathlib import Path
+
+from decouple import config
+
+HISTORY_CODECS = ("json", "orjson", "msgpack")
+HISTORY_COMPRESSIONS = ("none", "zstd")
+HISTORY_CODEC = config("HISTORY_CODEC", default="json")
+HISTORY_COMPRESSION = config("HISTORY_COMPRESSION", default="none")
+HISTORY_ZSTD_LEVEL = config("HISTORY_ZSTD_LEVEL", default=3, cast=int)
+HISTORY_ZSTD_DICT = config("HISTORY_ZSTD_DICT", default="")
+
+BINARY = b"\x00"
+# Second and third header byte: serializer and compression
+_JSON, _MSGPACK = b"j", b"m"
+_PLAIN, _ZSTD, _ZSTD_DICT = b"-", b"z", b"d"
+
+_HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+if _HAS_ORJSON:
+    import orjson
+
+
+def _require(module: str, package: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise RuntimeError(
+            f"History entries in this format need the {package} package "
+            "(pip install '.[codec]')"
+        ) from None
+
+
+def json_loads(text: str | bytes):
+    return orjson.loads(text) if _HAS_ORJSON else json.loads(text)
+
+
+def compact_json(value) -> str:
+    if _HAS_ORJSON:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"))
+
+
+_decompressors: dict[bytes, object] = {}
+
+
+def _decompressor(compression: bytes):
+    if compression not in _decompressors:
+        zstandard = _require("zstandard", "zstandard")
+        if compression == _ZSTD_DICT:
+            if not HISTORY_ZSTD_DICT:
+                raise RuntimeError(
+                    "History entry needs the zstd dictionary, set HISTORY_ZSTD_DICT"
+                )
+            dictionary = zstandard.ZstdCompressionDict(
+                Path(HISTORY_ZSTD_DICT).read_bytes()
+            )
+            _decompressors[compression] = zstandard.ZstdDecompressor(
+                dict_data=dictionary
+            )
+        else:
+            _decompressors[compression] = zstandard.ZstdDecompressor()
+    return _decompressors[compression]
+
+
+def is_binary(raw: str | bytes) -> bool:
+    return raw[:1] in (BINARY, "\x00")
+
+
+def unpack(raw: str | bytes) -> str | bytes | list:
+    """An entry's JSON text, or its messages if it was stored as msgpack."""
+    if not is_binary(raw):
+        return raw
+    serializer, compression, payload = raw[1:2], raw[2:3], raw[3:]
+    if compression != _PLAIN:
+        payload = _decompressor(compression).decompress(payload)
+    if serializer == _MSGPACK:
+        return _require("msgpack", "msgpack").unpackb(payload, raw=False)
+    return payload
+
+
+def load_entry(raw: str | bytes) -> list[dict]:
+    """The messages of a stored history entry, in any format."""
+    value = unpack(raw)
+    return value if isinstance(value, list) else json_loads(value)
+
+
+def entry_text(raw: str | bytes) -> str:
+    """A stored history entry as JSON text, in any format."""
+    value = unpack(raw)
+    if isinstance(value, list):
+        return compact_json(value)
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class HistoryCodec:
+    """Encoder for new history entries."""
+
+    def __init__(
+        self,
+        codec: str = HISTORY_CODEC,
+        compression: str = HISTORY_COMPRESSION,
+        level: int = HISTORY_ZSTD_LEVEL,
+        dictionary: str = HISTORY_ZSTD_DICT,
+    ):
+        if codec not in HISTORY_CODECS:
+            raise ValueError(f"HISTORY_CODEC must be one of {HISTORY_CODECS}")
+        if compression not in HISTORY_COMPRESSIONS:
+            raise ValueError(
+                f"HISTORY_COMPRESSION must be one of {HISTORY_COMPRESSIONS}"
+            )
+        self.codec = codec
+        self.compression = compression
+        self._msgpack = _require("msgpack", "msgpack") if codec == "msgpack" else None
+        self._compressor = None
+        tag = _PLAIN
+        if compression == "zstd":
+            zstandard = _require("zstandard", "zstandard")
+            options = {"level": level}
+            tag = _ZSTD
+            if dictionary:
+                options["dict_data"] = zstandard.ZstdCompressionDict(
+                    Path(dictionary).read_bytes()
+                )
+                tag = _ZSTD_DICT
+            self._compressor = zstandard.ZstdCompressor(**options)
+        self.binary = codec == "msgpack" or compression == "zstd"
+        self.header = BINARY + (_MSGPACK if self._msgpack else _JSON) + tag
+
+    @property
+    def name(self) -> str:
+        return (
+            self.codec
+            if self.compression == "none"
+            else f"{self.codec}+{self.compression}"
+        )
+
+    def dumps(self, messages: list[dict]) -> str:
+        """An entry as JSON text, the way this codec writes JSON."""
+        return json.dumps(messages) if self.codec == "json" else compact_json(messages)
+
+    def serialize(self, messages: list[dict], text: str | None = None) -> str | bytes:
+        """An entry serialized but not compressed; `text` is its `dumps`."""
+        if self._msgpack:
+            return self._msgpack.packb(messages, use_bin_type=True)
+        return text if text is not None else self.dumps(messages)
+
+    def encode(self, messages: list[dict], text: str | None = None) -> str | bytes:
+        """Stored form of an entry; `text` is its `dumps`, reused when given."""
+        payload = self.serialize(messages, text)
+        if not self.binary:
+            return payload
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if self._compressor is not None:
+            payload = self._compressor.compress(payload)
+        return self.header + payload
+
+
+def train_dictionary(samples: list[bytes], size: int = 112640) -> bytes:
+    """A zstd dictionary trained on sample entries, as `serialize` returns them."""
+    zstandard = _require("zstandard", "zstandard")
+    return zstandard.train_dictionary(size, samples).as_bytes()
+
+
+codec = HistoryCodec()
+
+
+__all__ = [
+    "HistoryCodec",
+    "codec",
+    "compact_json",
+    "entry_text",
+    "is_binary",
+    "json_loads",
+    "load_entry",
+    "train_dictionary",
+    "unpack",
+    "HISTORY_CODECS",
+    "HISTORY_COMPRESSIONS",
+]
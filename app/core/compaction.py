@@ -0,0 +1,115 @@
+"""Background compaction of old history turns into a rolling summary."""
+
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.core.connections import redis_client
+from app.core.history import entry_transcript
+from app.core.redis import RedisHandler, publish_message, read_history
+
+# Only summarize once this many turns have fallen out of the context
+COMPACT_BATCH = 5
+COMPACT_LOCK_TTL = 120
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a chat between several participants. "
+    "Merge the previous summary and the new messages into one concise summary. "
+    "Keep names, decisions, open questions and assigned tasks. "
+    "Reply with the summary only."
+)
+
+
+class HistoryCompactor:
+    """Fold turns that no longer fit the token budget into a rolling summary.
+
+    The summary is stored next to the history as a hash at
+    ``{channel}_history_summary`` with the summary text and the last sequence
+    number it covers. One agent per channel compacts at a time, guarded by a
+    lock key, and announces the new summary on the channel so every agent can
+    update its HistoryCache without reading Redis.
+    """
+
+    def __init__(
+        self,
+        handler: RedisHandler,
+        summarize: Callable[[str, str], Awaitable[str]],
+        batch: int = COMPACT_BATCH,
+    ):
+        self.handler = handler
+        self.summarize = summarize
+        self.batch = batch
+        self.lock_key = f"{handler.redis_history_summary}:lock"
+        self.compactions = 0
+
+    async def run(self):
+        """Compact whenever a history entry was appended."""
+        while True:
+            await self.handler.history_appended.wait()
+            self.handler.history_appended.clear()
+            try:
+                await self.compact()
+            except Exception as e:
+                print(f"[{self.handler.agent_name}] History compaction failed: {e}")
+
+    async def compact(self) -> bool:
+        cache = self.handler.history_cache
+        if not cache.warm:
+            return False
+        upto = cache.compaction_point(self.handler.history_token_budget)
+        if upto - cache.summary_seq < self.batch:
+            return False
+
+        token = uuid.uuid4().hex
+        if not await redis_client.set(
+            self.lock_key, token, nx=True, ex=COMPACT_LOCK_TTL
+        ):
+            return False
+        try:
+            return await self._compact_locked(upto)
+        finally:
+            if await redis_client.get(self.lock_key) == token:
+                await redis_client.delete(self.lock_key)
+
+    async def _compact_locked(self, upto: int) -> bool:
+        handler = self.handler
+        summary = await redis_client.hgetall(handler.redis_history_summary)
+        previous = summary.get("text", "")
+        previous_seq = int(summary.get("seq", 0))
+        if upto <= previous_seq:
+            handler.history_cache.set_summary(previous, previous_seq)
+            return False
+
+        # Entry #seq is at position seq - 1; archived entries are left out
+        _, raw = await read_history(
+            handler.redis_history, previous_seq, upto - previous_seq
+        )
+        lines = [line for entry in raw for line in entry_transcript(entry)]
+        if not lines:
+            return False
+
+        text = (await self.summarize(previous, "\n".join(lines))).strip()
+        await redis_client.hset(
+            handler.redis_history_summary, mapping={"text": text, "seq": upto}
+        )
+        handler.history_cache.set_summary(text, upto)
+        await publish_message(
+            handler.redis_channel,
+            {
+                "type": "summary",
+                "content": "",
+                "sender": handler.agent_name,
+                "summary": text,
+                "summary_seq": upto,
+            },
+        )
+        self.compactions += 1
+        print(f"🗜️ [{handler.agent_name}] Compacted history up to #{upto}")
+        return True
+
+
+def summary_request(previous: str, transcript: str) -> str:
+    """User prompt for the summarizer model."""
+    return f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+
+
+__all__ = ["HistoryCompactor", "SUMMARY_PROMPT", "summary_request"]
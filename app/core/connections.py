@@ -0,0 +1,203 @@
+"""Shared, tunable connection pools for Redis and the model providers' HTTP."""
+
+import importlib.util
+
+import httpx
+import redis.asyncio as aioredis
+from decouple import config
+
+# Redis: REDIS_SOCKET (a unix socket path) takes precedence over REDIS_URL
+REDIS_URL = config("REDIS_URL", default="redis://localhost:6379")
+REDIS_SOCKET = config("REDIS_SOCKET", default="")
+REDIS_MAX_CONNECTIONS = config("REDIS_MAX_CONNECTIONS", default=64, cast=int)
+# Seconds a command waits for a free pooled connection before it fails
+REDIS_POOL_TIMEOUT = config("REDIS_POOL_TIMEOUT", default=5.0, cast=float)
+REDIS_CONNECT_TIMEOUT = config("REDIS_CONNECT_TIMEOUT", default=5.0, cast=float)
+REDIS_SOCKET_KEEPALIVE = config("REDIS_SOCKET_KEEPALIVE", default=True, cast=bool)
+# Idle connections send a PING before the next command, so a dead socket
+# surfaces as ConnectionError instead of a hang.
+REDIS_HEALTH_CHECK_INTERVAL = config(
+    "REDIS_HEALTH_CHECK_INTERVAL", default=30, cast=int
+)
+
+# Provider HTTP: one keep-alive pool for every model call in the process
+HTTP_MAX_CONNECTIONS = config("HTTP_MAX_CONNECTIONS", default=100, cast=int)
+HTTP_MAX_KEEPALIVE = config("HTTP_MAX_KEEPALIVE", default=20, cast=int)
+HTTP_KEEPALIVE_EXPIRY = config("HTTP_KEEPALIVE_EXPIRY", default=60.0, cast=float)
+HTTP_TIMEOUT = config("HTTP_TIMEOUT", default=600.0, cast=float)
+HTTP_CONNECT_TIMEOUT = config("HTTP_CONNECT_TIMEOUT", default=5.0, cast=float)
+# HTTP/2 multiplexes concurrent calls over one connection; needs the h2 package
+HTTP2 = config("HTTP2", default=False, cast=bool)
+
+
+class TrackedConnectionPool(aioredis.BlockingConnectionPool):
+    """Bounded Redis pool that counts created connections and waiting callers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created = 0
+        self.waiting = 0
+
+    def make_connection(self):
+        self.created += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        self.waiting += 1
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(self._in_use_connections),
+            "idle": len(self._available_connections),
+            "waiting": self.waiting,
+            "created": self.created,
+        }
+
+
+def _redis_url() -> str:
+    return f"unix://{REDIS_SOCKET}" if REDIS_SOCKET else REDIS_URL
+
+
+def _redis_options(decode_responses: bool = True) -> dict:
+    options = {
+        "decode_responses": decode_responses,
+        "encoding": "utf-8",
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+    }
+    if not REDIS_SOCKET:
+        options["socket_keepalive"] = REDIS_SOCKET_KEEPALIVE
+    return options
+
+
+# Short commands share a bounded pool: under load callers queue for a
+# connection instead of opening hundreds of sockets.
+redis_pool = TrackedConnectionPool.from_url(
+    _redis_url(),
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    **_redis_options(),
+)
+redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+# History entries may be stored in a binary codec (app.core.codec), so they
+# are read as bytes through a pool that does not decode responses.
+binary_pool = TrackedConnectionPool.from_url(
+    _redis_url(),
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    **_redis_options(decode_responses=False),
+)
+redis_binary = aioredis.Redis(connection_pool=binary_pool)
+
+# Subscriptions and blocking stream reads hold their connection for minutes,
+# so they get their own unbounded pool and never starve the commands.
+listener_pool = aioredis.ConnectionPool.from_url(_redis_url(), **_redis_options())
+redis_listener = aioredis.Redis(connection_pool=listener_pool)
+
+
+class _HTTPStats:
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event: str, _info: dict):
+        if event == "connection.connect_tcp.complete":
+            self.created += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self.trace
+
+
+_http_client: httpx.AsyncClient | None = None
+_http_stats = _HTTPStats()
+
+
+def _http2_available() -> bool:
+    if HTTP2 and importlib.util.find_spec("h2") is None:
+        print("HTTP2 requested but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return HTTP2
+
+
+def http_client() -> httpx.AsyncClient:
+    """The process-wide HTTP client for model providers, created on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            http2=_http2_available(),
+            event_hooks={"request": [_http_stats.on_request]},
+        )
+    return _http_client
+
+
+def _http_pool_stats() -> dict:
+    stats = {
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "requests": _http_stats.requests,
+        "created": _http_stats.created,
+        "tls_handshakes": _http_stats.tls_handshakes,
+        "in_use": 0,
+        "idle": 0,
+        "waiting": 0,
+    }
+    # httpx does not expose its pool, read the transport's httpcore pool
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    if pool is not None:
+        connections = pool.connections
+        stats["idle"] = sum(1 for conn in connections if conn.is_idle())
+        stats["in_use"] = len(connections) - stats["idle"]
+        stats["waiting"] = sum(
+            1 for request in getattr(pool, "_requests", []) if request.is_queued()
+        )
+    return stats
+
+
+def pool_stats() -> dict:
+    """In-use, idle, waiting and created counts of every shared pool."""
+    return {
+        "redis": redis_pool.stats(),
+        "redis_binary": binary_pool.stats(),
+        "redis_listeners": {
+            "in_use": len(listener_pool._in_use_connections),
+            "idle": len(listener_pool._available_connections),
+        },
+        "http": _http_pool_stats(),
+    }
+
+
+async def close_connections():
+    """Close all pooled connections, e.g. when a process shuts down."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    await redis_pool.disconnect()
+    await binary_pool.disconnect()
+    await listener_pool.disconnect()
+
+
+__all__ = [
+    "redis_client",
+    "redis_binary",
+    "redis_listener",
+    "redis_pool",
+    "http_client",
+    "pool_stats",
+    "close_connections",
+]
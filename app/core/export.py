@@ -0,0 +1,224 @@
+"""Streaming export of chat topics to Markdown, JSONL or Parquet files.
+
+Topics are exported concurrently, at most EXPORT_CONCURRENCY at a time, and
+each one page of history at a time, so memory stays bounded by the page size
+however long the histories are. After every page the checkpoint records the
+next history index and the file size; an interrupted or repeated export with
+resume picks up there, exporting only what is new.
+"""
+
+import asyncio
+import importlib.util
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from decouple import config
+
+from app.core.redis_export import (
+    EXPORT_PAGE_SIZE,
+    iter_history_pages,
+    markdown_header,
+    markdown_record,
+    page_records,
+)
+
+EXPORT_FORMATS = ("markdown", "jsonl", "parquet")
+EXPORT_CONCURRENCY = config("EXPORT_CONCURRENCY", default=4, cast=int)
+CHECKPOINT_FILE = ".export-checkpoint.json"
+
+
+class Checkpoint:
+    """Per topic export progress, saved atomically after every page."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.state: dict[str, dict] = {}
+        if path.exists():
+            self.state = json.loads(path.read_text())
+
+    def get(self, topic: str) -> dict | None:
+        return self.state.get(topic)
+
+    def update(self, topic: str, next_index: int, position: int):
+        self.state[topic] = {"next": next_index, "position": position}
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.state, indent=1, sort_keys=True))
+        os.replace(temporary, self.path)
+
+
+class _FileWriter(ABC):
+    """Appends rendered records to ``<topic><suffix>``."""
+
+    suffix = ""
+
+    def __init__(self, directory: Path, topic: str, position: int | None = None):
+        self.path = directory / f"{topic}{self.suffix}"
+        if position is None:
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.file.write(self.header(topic))
+        else:
+            # Drop whatever was written after the last checkpoint
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.truncate(position)
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def header(self, topic: str) -> str:
+        return ""
+
+    @abstractmethod
+    def render(self, record: dict) -> str:
+        """One record as the text appended to the file."""
+
+    def write(self, records: list[dict]) -> int:
+        """Write a page of records; returns the position to resume from."""
+        self.file.write("".join(self.render(record) for record in records))
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class MarkdownWriter(_FileWriter):
+    suffix = ".md"
+
+    def header(self, topic: str) -> str:
+        return markdown_header(topic)
+
+    def render(self, record: dict) -> str:
+        return markdown_record(record)
+
+
+class JsonlWriter(_FileWriter):
+    suffix = ".jsonl"
+
+    def render(self, record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class ParquetWriter:
+    """One Parquet file per page in ``<topic>.parquet/``, a dataset any
+    Parquet reader loads as one table. Needs the optional pyarrow package.
+    """
+
+    def __init__(self, directory: Path, topic: str, position: int | None = None):
+        import pyarrow as pa
+
+        self.path = directory / f"{topic}.parquet"
+        self.path.mkdir(exist_ok=True)
+        if position is None:
+            for part in self.path.glob("part-*.parquet"):
+                part.unlink()
+        self.schema = pa.schema(
+            [
+                ("topic", pa.string()),
+                ("index", pa.int64()),
+                ("role", pa.string()),
+                ("part_kind", pa.string()),
+                ("sender", pa.string()),
+                ("timestamp", pa.string()),
+                ("content", pa.string()),
+            ]
+        )
+
+    def write(self, records: list[dict]) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if records:
+            # Named by the first index, so a page exported again overwrites itself
+            part = self.path / f"part-{records[0]['index']:012d}.parquet"
+            pq.write_table(pa.Table.from_pylist(records, schema=self.schema), part)
+        return 0
+
+    def close(self):
+        pass
+
+
+WRITERS = {"markdown": MarkdownWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def check_format(fmt: str):
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}"
+        )
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise RuntimeError(
+            "Parquet export needs the pyarrow package (pip install '.[export]')"
+        )
+
+
+async def export_topic(
+    topic: str,
+    directory: Path,
+    fmt: str = "markdown",
+    checkpoint: Checkpoint | None = None,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> int:
+    """Export one topic page by page; returns the number of records written."""
+    state = checkpoint.get(topic) if checkpoint else None
+    start = state["next"] if state else 0
+    writer = WRITERS[fmt](directory, topic, state["position"] if state else None)
+    written = 0
+    try:
+        async for first, page in iter_history_pages(topic, start, page_size):
+            records = page_records(topic, first, page)
+            position = writer.write(records)
+            written += len(records)
+            if checkpoint:
+                checkpoint.update(topic, first + len(page), position)
+    finally:
+        writer.close()
+    return written
+
+
+async def export_topics(
+    topics: list[str],
+    directory: str | Path,
+    fmt: str = "markdown",
+    concurrency: int = EXPORT_CONCURRENCY,
+    resume: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> dict[str, int]:
+    """Export topics with at most `concurrency` in flight.
+
+    Returns the records written per topic; a failed topic is reported and
+    the others carry on. With resume every topic continues from the
+    checkpoint in `directory`, otherwise files and checkpoint start over.
+    """
+    check_format(fmt)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = directory / CHECKPOINT_FILE
+    if not resume:
+        checkpoint_path.unlink(missing_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+    semaphore = asyncio.Semaphore(concurrency)
+    written: dict[str, int] = {}
+
+    async def export_one(topic: str):
+        async with semaphore:
+            try:
+                written[topic] = await export_topic(
+                    topic, directory, fmt, checkpoint, page_size
+                )
+                print(f"Exported {written[topic]} messages of {topic}")
+            except Exception as e:
+                print(f"❌ Export of {topic} failed: {e!r}")
+
+    await asyncio.gather(*(export_one(topic) for topic in topics))
+    return written
+
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "Checkpoint",
+    "MarkdownWriter",
+    "JsonlWriter",
+    "ParquetWriter",
+    "export_topic",
+    "export_topics",
+]
@@ -0,0 +1,65 @@
+"""Readiness probes and waiting for services to become ready."""
+
+import asyncio
+import time
+from collections.abc import Callable
+
+import httpx
+from decouple import config
+from fastapi.responses import JSONResponse
+
+from app.core.connections import redis_client
+
+PROBE_TIMEOUT = 1.0
+STARTUP_TIMEOUT = config("AGENT_STARTUP_TIMEOUT", default=60.0, cast=float)
+
+
+async def redis_reachable() -> bool:
+    try:
+        return bool(await asyncio.wait_for(redis_client.ping(), PROBE_TIMEOUT))
+    except Exception:
+        return False
+
+
+def health_response(checks: dict[str, bool]) -> JSONResponse:
+    """200 with the checks when all pass, 503 otherwise."""
+    ready = all(checks.values())
+    return JSONResponse(
+        {"status": "ok" if ready else "unavailable", "checks": checks},
+        status_code=200 if ready else 503,
+    )
+
+
+async def wait_until_ready(
+    urls: dict[str, str],
+    timeout: float = STARTUP_TIMEOUT,
+    interval: float = 0.1,
+    alive: Callable[[str], bool] | None = None,
+) -> dict[str, float | None]:
+    """Poll every /healthz URL in parallel until it answers 200.
+
+    Returns the seconds each service took to become ready, or None for
+    services that timed out or whose process died (``alive(name)`` False).
+    """
+    start = time.perf_counter()
+
+    async def probe(client: httpx.AsyncClient, name: str, url: str) -> float | None:
+        while time.perf_counter() - start < timeout:
+            if alive and not alive(name):
+                return None
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass  # not listening yet
+            await asyncio.sleep(interval)
+        return None
+
+    async with httpx.AsyncClient(timeout=PROBE_TIMEOUT) as client:
+        results = await asyncio.gather(
+            *(probe(client, name, url) for name, url in urls.items())
+        )
+    return dict(zip(urls, results, strict=True))
+
+
+__all__ = ["health_response", "redis_reachable", "wait_until_ready", "STARTUP_TIMEOUT"]
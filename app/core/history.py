@@ -0,0 +1,180 @@
+"""In-process cache of parsed message history."""
+
+from collections import deque
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelRequest,
+    UserPromptPart,
+)
+
+from app.core.codec import load_entry, unpack
+
+# Number of history entries (agent turns) kept hot for the model context
+HISTORY_WINDOW = 10
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def parse_history_entry(raw: str | bytes) -> list[ModelMessage]:
+    """Parse one stored history entry, in any codec, into pydantic-ai messages."""
+    value = unpack(raw)
+    if isinstance(value, list):
+        return ModelMessagesTypeAdapter.validate_python(value)
+    return ModelMessagesTypeAdapter.validate_json(value)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), no tokenizer needed."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(messages: list[ModelMessage]) -> int:
+    return sum(
+        estimate_tokens(str(part.content))
+        for message in messages
+        for part in message.parts
+        if hasattr(part, "content")
+    )
+
+
+def entry_transcript(raw: str | bytes) -> list[str]:
+    """Render a stored history entry as "Sender: text" lines."""
+    lines = []
+    for message in load_entry(raw):
+        for part in message.get("parts", []):
+            content = part.get("content")
+            if not isinstance(content, str) or part.get("part_kind") == "system-prompt":
+                continue
+            if message.get("kind") == "response":
+                lines.append(f"{message.get('agent_sender', 'unknown')}: {content}")
+            else:
+                lines.append(content)
+    return lines
+
+
+class HistoryCache:
+    """The last `window` history entries of a channel, already parsed.
+
+    Every entry written to ``{channel}_history`` gets a sequence number from
+    the ``{channel}_history_seq`` counter. The cache applies entries strictly in
+    sequence order; a gap means an entry was missed, so the cache goes cold and
+    the next read reloads from Redis.
+
+    Turns older than the token budget are folded into a rolling summary (see
+    ``app.core.compaction``), which is prepended to the selected entries.
+    """
+
+    def __init__(self, window: int = HISTORY_WINDOW):
+        self.window = window
+        # (seq, messages, estimated tokens), oldest first
+        self._entries: deque[tuple[int, list[ModelMessage], int]] = deque(maxlen=window)
+        self.seq: int | None = None
+        self.summary: ModelRequest | None = None
+        self.summary_seq = 0
+        self.summary_tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_tokens = 0
+
+    @property
+    def warm(self) -> bool:
+        return self.seq is not None
+
+    def reset(self, seq: int, raw_entries: list[str | bytes]):
+        """Replace the cache contents with a fresh snapshot from Redis."""
+        self._entries.clear()
+        raw_entries = raw_entries[-self.window :]
+        first_seq = seq - len(raw_entries) + 1
+        for offset, raw in enumerate(raw_entries):
+            try:
+                self._add(first_seq + offset, parse_history_entry(raw))
+            except Exception as e:
+                print(f"Invalid message format in Redis: {e}")
+        self.seq = seq
+
+    def append(self, seq: int, raw: str | bytes) -> bool:
+        """Apply the entry with sequence number `seq`; returns False on a gap."""
+        if self.seq is None:
+            return False
+        if seq <= self.seq:
+            return True  # already applied, e.g. our own write echoed back
+        if seq != self.seq + 1:
+            self.invalidate()
+            return False
+        self._add(seq, parse_history_entry(raw))
+        self.seq = seq
+        return True
+
+    def set_summary(self, text: str, seq: int):
+        """Install the rolling summary covering all entries up to `seq`."""
+        if seq < self.summary_seq or not text:
+            return
+        self.summary = ModelRequest(parts=[UserPromptPart(SUMMARY_PREFIX + text)])
+        self.summary_seq = seq
+        self.summary_tokens = estimate_tokens(text)
+
+    def invalidate(self):
+        if self.seq is not None:
+            self.invalidations += 1
+        self.seq = None
+        self._entries.clear()
+
+    def messages(self, token_budget: int | None = None) -> list[ModelMessage]:
+        """Summary plus the newest entries that fit into `token_budget`."""
+        selected = self._select(token_budget)
+        self.last_tokens = sum(tokens for _, _, tokens in selected)
+        messages = [message for _, entry, _ in selected for message in entry]
+        if self.summary is not None:
+            self.last_tokens += self.summary_tokens
+            messages.insert(0, self.summary)
+        return messages
+
+    def compaction_point(self, token_budget: int | None = None) -> int:
+        """Sequence number of the newest entry that no longer makes it into context."""
+        selected = self._select(token_budget)
+        if selected:
+            return selected[0][0] - 1
+        return self.seq or 0
+
+    def stats(self) -> dict:
+        return {
+            "warm": self.warm,
+            "seq": self.seq,
+            "entries": len(self._entries),
+            "summary_seq": self.summary_seq,
+            "last_context_tokens": self.last_tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def _add(self, seq: int, messages: list[ModelMessage]):
+        self._entries.append((seq, messages, message_tokens(messages)))
+
+    def _select(self, token_budget: int | None):
+        entries = [entry for entry in self._entries if entry[0] > self.summary_seq]
+        if token_budget is None:
+            return entries
+
+        remaining = token_budget - (self.summary_tokens if self.summary else 0)
+        selected = []
+        for entry in reversed(entries):
+            remaining -= entry[2]
+            if remaining < 0:
+                break
+            selected.append(entry)
+        selected.reverse()
+        return selected
+
+
+__all__ = [
+    "HistoryCache",
+    "HISTORY_WINDOW",
+    "estimate_tokens",
+    "message_tokens",
+    "entry_transcript",
+    "parse_history_entry",
+]
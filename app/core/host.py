@@ -0,0 +1,72 @@
+"""Run many FastAgents in one process behind a single ASGI app."""
+
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastapi import FastAPI
+
+from app.core.health import health_response, redis_reachable
+from app.core.metrics import metrics_response
+from app.core.provider import model_available
+
+HOST_PREFIX = "/agents"
+
+
+def agent_slug(name: str) -> str:
+    """URL path segment for an agent name, "Dominique" -> "dominique"."""
+    return name.strip().lower().replace(" ", "-")
+
+
+def create_host_app(agent_configs: list[dict]) -> FastAPI:
+    """One FastAPI app serving every agent under ``/agents/<name>/...``.
+
+    All agents share the process-wide Redis pool and model client and one
+    event loop. Starlette does not run the lifespan of mounted apps, so the
+    host enters each agent's lifespan itself and leaves them in reverse
+    order on shutdown.
+    """
+    from app.agents.agent import FastAgent
+
+    agents = {
+        agent_slug(config["name"]): FastAgent(a2a=config) for config in agent_configs
+    }
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        async with AsyncExitStack() as stack:
+            for agent in agents.values():
+                await stack.enter_async_context(
+                    agent.app.router.lifespan_context(agent.app)
+                )
+            print(f"Agent host serving {len(agents)} agents under {HOST_PREFIX}/")
+            yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.agents = agents
+
+    @app.get(HOST_PREFIX)
+    async def list_agents():
+        return {
+            slug: {"name": agent.name, "url": f"{HOST_PREFIX}/{slug}"}
+            for slug, agent in agents.items()
+        }
+
+    @app.get("/metrics")
+    async def metrics():
+        # The registry is per process: one scrape covers every hosted agent
+        return metrics_response()
+
+    @app.get("/healthz")
+    async def healthz():
+        # One Redis ping for the whole host, the pool is shared anyway
+        checks = {"redis": await redis_reachable()}
+        for slug, agent in agents.items():
+            checks[f"{slug}.subscriber"] = agent.redis_handler.listening.is_set()
+            checks[f"{slug}.model"] = model_available(agent.model_spec)
+        return health_response(checks)
+
+    for slug, agent in agents.items():
+        app.mount(f"{HOST_PREFIX}/{slug}", agent.app)
+    return app
+
+
+__all__ = ["create_host_app", "agent_slug", "HOST_PREFIX"]
@@ -0,0 +1,100 @@
+"""Per-agent inbound queue that coalesces messages arriving during a model call."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from decouple import config
+
+from app.core.tracing import Span
+
+INBOX_SIZE = config("AGENT_INBOX_SIZE", default=20, cast=int)
+
+
+@dataclass
+class InboxItem:
+    text: str
+    ack: Callable[[], Awaitable[None]] | None = None
+    # Receive span, ended once the reply is published
+    span: Span | None = None
+
+
+class AgentInbox:
+    """Bounded queue of messages waiting for the agent.
+
+    The responder takes everything that piled up while it was busy as one
+    batch, so N messages that arrive during a slow model call cost one
+    follow-up call instead of N. When the queue is full the oldest message is
+    dropped; it would only add stale context anyway.
+    """
+
+    def __init__(self, maxsize: int = INBOX_SIZE):
+        self._items: deque[InboxItem] = deque()
+        self._ready = asyncio.Event()
+        # Set while nothing is queued and no batch is being answered
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.maxsize = maxsize
+        self.received = 0
+        self.dropped = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: InboxItem) -> InboxItem | None:
+        """Queue an item; returns the item dropped to make room, if any."""
+        dropped = None
+        if len(self._items) >= self.maxsize:
+            dropped = self._items.popleft()
+            self.dropped += 1
+        self._items.append(item)
+        self._idle.clear()
+        self.received += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._ready.set()
+        return dropped
+
+    async def next_batch(self) -> list[InboxItem]:
+        """Wait for at least one item and take everything queued."""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        batch = list(self._items)
+        self._items.clear()
+        self.batches += 1
+        return batch
+
+    @property
+    def idle(self) -> asyncio.Event:
+        """Set while nothing is queued and no batch is being answered."""
+        return self._idle
+
+    def done(self):
+        """Mark the last batch taken with next_batch() as answered."""
+        if not self._items:
+            self._idle.set()
+
+    async def join(self):
+        """Wait until every queued message has been answered."""
+        await self._idle.wait()
+
+    @staticmethod
+    def merge(batch: list[InboxItem]) -> str:
+        """One prompt with a "Sender: text" line per queued message."""
+        return "\n".join(item.text for item in batch)
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "received": self.received,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "coalesced": self.received - self.dropped - self.batches - len(self._items),
+        }
+
+
+__all__ = ["AgentInbox", "InboxItem", "INBOX_SIZE"]
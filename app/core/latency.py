@@ -0,0 +1,42 @@
+"""Rolling latency percentiles over the most recent samples."""
+
+import math
+from collections import deque
+
+
+class LatencyWindow:
+    """The last `size` durations, with nearest-rank percentiles."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, q: float) -> float | None:
+        """The q-th percentile in seconds, None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def stats(self) -> dict:
+        def ms(q):
+            value = self.percentile(q)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "p50_ms": ms(50),
+            "p95_ms": ms(95),
+            "p99_ms": ms(99),
+        }
+
+
+__all__ = ["LatencyWindow"]
@@ -0,0 +1,219 @@
+"""Prometheus metrics without the prometheus_client dependency.
+
+Counters, gauges and histograms with labels, rendered in the Prometheus text
+exposition format. An update is a dict lookup and an addition on the event
+loop thread, cheap enough to leave on. There is one registry per process, so
+in host mode one /metrics scrape covers every agent.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterator
+
+from fastapi.responses import Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format(name: str, labels: dict, value: float) -> str:
+    if labels:
+        pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {value}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _Observations:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf, made cumulative when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, **labels):
+        """The series for `labels`, created on first use; keep it to skip the lookup."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, child in self._children.items():
+            yield self.name, dict(zip(self.labelnames, key, strict=True)), child.value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(_format(*sample) for sample in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Observations(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for key, child in self._children.items():
+            labels = dict(zip(self.labelnames, key, strict=True))
+            total = 0
+            for bound, count in zip(
+                (*self.buckets, float("inf")), child.counts, strict=True
+            ):
+                total += count
+                yield f"{self.name}_bucket", {**labels, "le": _le(bound)}, total
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, total
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+def render() -> str:
+    """Every metric of this process in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response() -> Response:
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+_AGENT = ("agent", "model")
+
+HISTORY_LOAD = Histogram(
+    "agent_history_load_seconds",
+    "Time to load the message history for a model call",
+    _AGENT,
+)
+LLM_CALL = Histogram(
+    "agent_llm_call_seconds", "Duration of model calls, cache hits excluded", _AGENT
+)
+PUBLISH = Histogram(
+    "agent_publish_seconds", "Time to store and publish a reply", _AGENT
+)
+RECEIVED = Counter(
+    "agent_messages_received_total",
+    "Chat messages from other senders seen by the agent",
+    _AGENT,
+)
+SKIPPED = Counter(
+    "agent_messages_skipped_total",
+    "Messages left unanswered, by reason",
+    (*_AGENT, "reason"),
+)
+ANSWERED = Counter(
+    "agent_messages_answered_total", "Replies published by the agent", _AGENT
+)
+FAILED = Counter("agent_call_failures_total", "Agent calls that raised", _AGENT)
+TOKENS = Counter(
+    "agent_tokens_total", "Model tokens used, by direction", (*_AGENT, "direction")
+)
+
+WS_CONNECTIONS = Gauge("chat_websocket_connections", "Open WebSocket connections")
+BROADCAST = Histogram(
+    "chat_broadcast_seconds",
+    "Time from broadcasting a message until it was sent to a client",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+
+class AgentMetrics:
+    """An agent's series of the agent_* metrics, looked up once."""
+
+    def __init__(self, agent: str, model: str):
+        self._labels = {"agent": agent, "model": model}
+        self.history_load = HISTORY_LOAD.labels(**self._labels)
+        self.llm_call = LLM_CALL.labels(**self._labels)
+        self.publish = PUBLISH.labels(**self._labels)
+        self.received = RECEIVED.labels(**self._labels)
+        self.answered = ANSWERED.labels(**self._labels)
+        self.failed = FAILED.labels(**self._labels)
+        self._input_tokens = TOKENS.labels(**self._labels, direction="input")
+        self._output_tokens = TOKENS.labels(**self._labels, direction="output")
+
+    def skipped(self, reason: str):
+        SKIPPED.labels(**self._labels, reason=reason).inc()
+
+    def tokens(self, usage):
+        self._input_tokens.inc(usage.request_tokens or 0)
+        self._output_tokens.inc(usage.response_tokens or 0)
+
+
+__all__ = [
+    "AgentMetrics",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "render",
+    "metrics_response",
+    "CONTENT_TYPE",
+    "WS_CONNECTIONS",
+    "BROADCAST",
+]
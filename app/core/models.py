@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from typing import Literal
 
@@ -23,12 +24,17 @@ class Message(BaseModel):
 class ChatMessage(BaseModel):
     """Format of messages sent to the browser."""
 
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     type: str
     sender: str
     role: Literal["user", "model"]
     content: str
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     color: str = Field(default_factory=lambda: "#e3f2fd")
+    stream_id: str | None = None
+    # Tracing envelope, see app.core.tracing
+    trace_id: str | None = None
+    parent_id: str | None = None
 
     def __init__(self, **data):
         super().__init__(**data)
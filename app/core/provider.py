@@ -1,45 +1,190 @@
+"""Lazy model provider registry.
+
+Models are named ``provider:model`` in agents.yml (``model:``) or with the
+DEFAULT_MODEL setting; a list of names hedges across them (app.core.router).
+A provider's SDK is imported and its model built only when an agent first
+asks for it, so importing this module stays cheap.
+"""
+
+from collections.abc import Callable
+from functools import cache
+from typing import TYPE_CHECKING
+
 from decouple import config
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.anthropic import AnthropicProvider
-from pydantic_ai.providers.openai import OpenAIProvider
-from pydantic_ai.providers.openrouter import OpenRouterProvider
 
-# # see https://ai.pydantic.dev/models/openai/#example-local-usage
-model_name = "llama3.2"
-ollama_model = OpenAIModel(
-    model_name=model_name,
-    provider=OpenAIProvider(base_url="http://localhost:11434/v1"),
-)
-# agent_model = ollama_model
+if TYPE_CHECKING:
+    from pydantic_ai.models import Model
+
+# works great with openrouter, but not with local ollama
+MAX_RESPONSE_TOKENS = 100
+model_settings = {"max_tokens": MAX_RESPONSE_TOKENS}
 
-# !beware openrouter docs are incorrect for pydantic
-# see https://ai.pydantic.dev/models/openai/#openrouter
-# and for models see https://openrouter.ai/models
+DEFAULT_MODEL = config("DEFAULT_MODEL", default="anthropic:claude-3-5-sonnet-latest")
+# other examples:
+#   anthropic:claude-3-haiku-20240307
+#   openrouter:google/gemma-3-1b-it:free
+#   openrouter:nousresearch/deephermes-3-mistral-24b-preview:free
+#   openrouter:deepseek/deepseek-r1-0528-qwen3-8b:free
+#   ollama:llama3.2
 
-model_name = "google/gemma-3-1b-it:free"
-# model_name = "nousresearch/deephermes-3-mistral-24b-preview:free"
-# model_name = "deepseek/deepseek-r1-0528-qwen3-8b:free"
 
-openrouter_model = OpenAIModel(
-    model_name=model_name,
-    provider=OpenRouterProvider(api_key=config("OPENROUTER_API_KEY")),
-)
-# agent_model = openrouter_model
+def _without_sdk_retries(provider):
+    """Leave retries to app.core.resilience instead of multiplying them."""
+    provider.client.max_retries = 0
+    return provider
 
 
-claude_model = "claude-3-5-sonnet-latest"
-# claude_model = 'claude-3-haiku-20240307'
+def _anthropic(model_name: str) -> "Model":
+    from pydantic_ai.models.anthropic import AnthropicModel
+    from pydantic_ai.providers.anthropic import AnthropicProvider
 
-anthropic_model = AnthropicModel(
-    claude_model, provider=AnthropicProvider(api_key=config("ANTHROPIC_API_KEY"))
-)
-agent_model = anthropic_model
+    from app.core.connections import http_client
 
+    return AnthropicModel(
+        model_name,
+        provider=_without_sdk_retries(
+            AnthropicProvider(
+                api_key=config("ANTHROPIC_API_KEY", default=None),
+                http_client=http_client(),
+            )
+        ),
+    )
+
+
+def _openrouter(model_name: str) -> "Model":
+    # !beware openrouter docs are incorrect for pydantic
+    # see https://ai.pydantic.dev/models/openai/#openrouter
+    # and for models see https://openrouter.ai/models
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openrouter import OpenRouterProvider
+
+    from app.core.connections import http_client
+
+    return OpenAIModel(
+        model_name,
+        provider=_without_sdk_retries(
+            OpenRouterProvider(
+                api_key=config("OPENROUTER_API_KEY", default=None),
+                http_client=http_client(),
+            )
+        ),
+    )
+
+
+def _ollama(model_name: str) -> "Model":
+    # see https://ai.pydantic.dev/models/openai/#example-local-usage
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+    from app.core.connections import http_client
+
+    return OpenAIModel(
+        model_name,
+        provider=_without_sdk_retries(
+            OpenAIProvider(
+                base_url=config("OLLAMA_BASE_URL", default="http://localhost:11434/v1"),
+                http_client=http_client(),
+            )
+        ),
+    )
+
+
+def _test(model_name: str) -> "Model":
+    """Canned replies without network access, for tests and benchmarks."""
+    from pydantic_ai.models.test import TestModel
+
+    return TestModel(custom_output_text=model_name or None)
+
+
+PROVIDERS: dict[str, Callable[[str], "Model"]] = {
+    "anthropic": _anthropic,
+    "openrouter": _openrouter,
+    "ollama": _ollama,
+    "test": _test,
+}
+# Setting holding each provider's API key; the others need none
+API_KEY_SETTINGS = {
+    "anthropic": "ANTHROPIC_API_KEY",
+    "openrouter": "OPENROUTER_API_KEY",
+}
+
+
+def parse_model_spec(spec: str) -> tuple[str, str]:
+    """Split "provider:model"; the model name may contain colons itself."""
+    provider, _, model_name = spec.partition(":")
+    if provider not in PROVIDERS:
+        raise ValueError(
+            f"Unknown model provider {provider!r} in {spec!r}, expected one of {sorted(PROVIDERS)}"
+        )
+    return provider, model_name
+
+
+def get_model(spec: str | list[str] | None = None) -> "Model":
+    """The model for `spec`, built on first use and shared afterwards.
+
+    A list of specs races them with hedged requests and falls back in order.
+    """
+    if isinstance(spec, list):
+        spec = tuple(spec)
+    return _build_model(spec)
+
+
+@cache
+def _build_model(spec: str | tuple[str, ...] | None) -> "Model":
+    if isinstance(spec, tuple):
+        from pydantic_ai.exceptions import UserError
+
+        from app.core.router import HedgedModel
+
+        models = []
+        for item in spec:
+            try:
+                models.append(get_model(item))
+            except UserError as e:
+                # E.g. a missing API key, the other providers still serve
+                print(f"⚠️ Skipping model {item}: {e}")
+        if not models:
+            raise UserError(f"No model of {list(spec)} is usable")
+        return HedgedModel(*models)
+    from app.core.ratelimit import rate_limited
+    from app.core.resilience import resilient
+
+    provider, model_name = parse_model_spec(spec or DEFAULT_MODEL)
+    # Retries outside the rate limiter, so every attempt waits for its turn
+    return resilient(rate_limited(PROVIDERS[provider](model_name), provider), provider)
+
+
+def model_available(spec: str | list[str] | None = None) -> bool:
+    """Whether a call to `spec` can succeed right now.
+
+    True if a provider of the spec has its API key set and no open circuit
+    (app.core.resilience); for a list one usable provider is enough.
+    """
+    from app.core.resilience import circuit_open
+
+    for item in spec if isinstance(spec, list) else [spec]:
+        provider, _ = parse_model_spec(item or DEFAULT_MODEL)
+        setting = API_KEY_SETTINGS.get(provider)
+        has_key = setting is None or config(setting, default=None)
+        if has_key and not circuit_open(provider):
+            return True
+    return False
+
+
+def __getattr__(name: str):
+    # Backwards compatible ``from app.core.provider import agent_model``
+    if name == "agent_model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# works great with openrouter, but not with local ollama
-MAX_RESPONSE_TOKENS = 100
-model_settings = {"max_tokens": MAX_RESPONSE_TOKENS}
 
 # Export for use in other modules
-__all__ = ["agent_model", "model_settings", "MAX_RESPONSE_TOKENS"]
+__all__ = [
+    "get_model",
+    "parse_model_spec",
+    "model_available",
+    "model_settings",
+    "MAX_RESPONSE_TOKENS",
+    "DEFAULT_MODEL",
+    "PROVIDERS",
+]
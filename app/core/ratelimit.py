@@ -0,0 +1,224 @@
+"""Cluster-wide token buckets for provider requests and tokens per minute.
+
+Every model call reserves one request and its estimated tokens from a bucket
+in Redis, keyed by provider and model, so all agent processes (and machines)
+sharing the Redis server share the quota. A reservation may drive the bucket
+below zero; the caller then sleeps until its share has refilled. Callers are
+thus served in the order they reached Redis instead of polling and racing.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from decouple import config
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from app.core.connections import redis_client
+from app.core.history import message_tokens
+
+# Per model defaults, 0 means unlimited; override per provider with e.g.
+# RATE_LIMIT_ANTHROPIC_RPM or RATE_LIMIT_OPENROUTER_TPM
+RATE_LIMIT_RPM = config("RATE_LIMIT_RPM", default=0, cast=int)
+RATE_LIMIT_TPM = config("RATE_LIMIT_TPM", default=0, cast=int)
+# A call that would have to wait longer than this is rejected
+RATE_LIMIT_MAX_WAIT = config("RATE_LIMIT_MAX_WAIT", default=60.0, cast=float)
+RATE_LIMIT_PREFIX = "ratelimit"
+
+# KEYS[1] bucket hash; ARGV rpm, tpm, tokens, max_wait.
+# Refills both buckets for the time since the last call (Redis clock, so
+# hosts need not agree on the time), reserves the call and returns
+# {granted, seconds to wait} as strings, Lua numbers would be truncated.
+_RESERVE = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local cost, max_wait = tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+local requests = math.min(rpm, (tonumber(state[1]) or rpm) + elapsed * rpm / 60) - 1
+local tokens = math.min(tpm, (tonumber(state[2]) or tpm) + elapsed * tpm / 60) - cost
+local wait = 0
+if rpm > 0 and requests < 0 then wait = math.max(wait, -requests * 60 / rpm) end
+if tpm > 0 and tokens < 0 then wait = math.max(wait, -tokens * 60 / tpm) end
+if wait > max_wait then return {'0', tostring(wait)} end
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120 + math.ceil(wait))
+return {'1', tostring(wait)}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """The call would have waited longer than RATE_LIMIT_MAX_WAIT."""
+
+    def __init__(self, key: str, wait: float):
+        super().__init__(f"Rate limit for {key} needs a {wait:.1f}s wait")
+        self.key = key
+        self.wait = wait
+
+
+def limits_for(provider: str) -> tuple[int, int]:
+    """(requests, tokens) per minute configured for a provider."""
+    name = provider.upper()
+    return (
+        config(f"RATE_LIMIT_{name}_RPM", default=RATE_LIMIT_RPM, cast=int),
+        config(f"RATE_LIMIT_{name}_TPM", default=RATE_LIMIT_TPM, cast=int),
+    )
+
+
+@dataclass
+class TokenBucket:
+    """Requests and tokens per minute for one provider:model in Redis."""
+
+    key: str
+    rpm: int = 0
+    tpm: int = 0
+    max_wait: float = RATE_LIMIT_MAX_WAIT
+    client: object = None
+    acquired: int = 0
+    waited: int = 0
+    wait_seconds: float = 0.0
+    longest_wait: float = 0.0
+    rejected: int = 0
+
+    def __post_init__(self):
+        self.client = self.client or redis_client
+        self._reserve = self.client.register_script(_RESERVE)
+
+    @property
+    def redis_key(self) -> str:
+        return f"{RATE_LIMIT_PREFIX}:{self.key}"
+
+    def _cost(self, tokens: int) -> int:
+        # A call larger than the whole bucket could never be served otherwise
+        return min(tokens, self.tpm) if self.tpm else 0
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Reserve a call of `tokens` and wait for its turn; returns seconds waited."""
+        cost = self._cost(tokens)
+        granted, wait = await self._reserve(
+            keys=[self.redis_key], args=[self.rpm, self.tpm, cost, self.max_wait]
+        )
+        wait = float(wait)
+        if granted != "1":
+            self.rejected += 1
+            raise RateLimitExceeded(self.key, wait)
+        self.acquired += 1
+        if wait > 0:
+            self.waited += 1
+            self.wait_seconds += wait
+            self.longest_wait = max(self.longest_wait, wait)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Hand the reservation back to the callers queued behind us
+                await self._adjust(requests=1, tokens=cost)
+                raise
+        return wait
+
+    async def settle(self, reserved: int, used: int):
+        """Charge the difference between the estimated and the actual tokens."""
+        if self.tpm and used:
+            await self._adjust(tokens=self._cost(reserved) - used)
+
+    async def _adjust(self, requests: int = 0, tokens: int = 0):
+        pipe = self.client.pipeline(transaction=True)
+        if requests:
+            pipe.hincrbyfloat(self.redis_key, "requests", requests)
+        if tokens:
+            pipe.hincrbyfloat(self.redis_key, "tokens", tokens)
+        await pipe.execute()
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "longest_wait_s": round(self.longest_wait, 3),
+            "rejected": self.rejected,
+        }
+
+
+_buckets: dict[str, TokenBucket] = {}
+
+
+def rate_limit_stats() -> dict:
+    """Stats of every bucket used by this process."""
+    return {key: bucket.stats() for key, bucket in _buckets.items()}
+
+
+def _estimate(
+    messages: list[ModelMessage], model_settings: ModelSettings | None
+) -> int:
+    """Tokens a call will use: its prompt plus the allowed response."""
+    return message_tokens(messages) + (model_settings or {}).get("max_tokens", 0)
+
+
+@dataclass(init=False)
+class RateLimitedModel(WrapperModel):
+    """Take every request of the wrapped model through a TokenBucket."""
+
+    bucket: TokenBucket
+
+    def __init__(self, wrapped: Model, bucket: TokenBucket):
+        super().__init__(wrapped)
+        self.bucket = bucket
+
+    @property
+    def base_url(self) -> str | None:
+        return self.wrapped.base_url
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        reserved = _estimate(messages, model_settings)
+        await self.bucket.acquire(reserved)
+        response = await self.wrapped.request(
+            messages, model_settings, model_request_parameters
+        )
+        await self.bucket.settle(reserved, response.usage.total_tokens or 0)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        reserved = _estimate(messages, model_settings)
+        await self.bucket.acquire(reserved)
+        async with self.wrapped.request_stream(
+            messages, model_settings, model_request_parameters
+        ) as response:
+            yield response
+        await self.bucket.settle(reserved, response.usage().total_tokens or 0)
+
+
+def rate_limited(model: Model, provider: str) -> Model:
+    """`model` behind its provider's limits, or unchanged without limits."""
+    rpm, tpm = limits_for(provider)
+    if not (rpm or tpm):
+        return model
+    key = f"{model.system}:{model.model_name}"
+    bucket = _buckets.setdefault(key, TokenBucket(key, rpm, tpm))
+    return RateLimitedModel(model, bucket)
+
+
+__all__ = [
+    "RateLimitExceeded",
+    "RateLimitedModel",
+    "TokenBucket",
+    "rate_limited",
+    "rate_limit_stats",
+    "limits_for",
+]
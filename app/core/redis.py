@@ -2,18 +2,46 @@
 
 import asyncio
 import json
+import time
+import uuid
 from datetime import datetime
 
 import redis.asyncio as aioredis
 from decouple import config
-from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
+from pydantic_ai.messages import ModelMessage
 
-# Redis connection
-redis_client = aioredis.from_url(
-    config("REDIS_URL", default="redis://localhost:6379"),
-    encoding="utf-8",
-    decode_responses=True,
-)
+from app.core.codec import codec, json_loads
+from app.core.connections import redis_binary, redis_client, redis_listener
+from app.core.history import HISTORY_WINDOW, HistoryCache
+from app.core.inbox import AgentInbox, InboxItem
+from app.core.metrics import AgentMetrics
+from app.core.topics import register_topic
+from app.core.tracing import current_span, span, start_span
+
+# Pooled clients live in app.core.connections; redis_listener serves
+# subscriptions and blocking reads that hold a connection for a long time.
+
+# Pub/sub listener tuning: block up to LISTEN_TIMEOUT seconds waiting for a
+# message, and back off up to RECONNECT_MAX_DELAY seconds between reconnects.
+LISTEN_TIMEOUT = config("REDIS_LISTEN_TIMEOUT", default=30.0, cast=float)
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = config("REDIS_RECONNECT_MAX_DELAY", default=10.0, cast=float)
+
+# Transport for chat messages between agents: fire-and-forget "pubsub", or
+# "streams" (XADD/XREADGROUP) with acks, replay after restarts and replicas
+TRANSPORTS = ("pubsub", "streams")
+REDIS_TRANSPORT = config("REDIS_TRANSPORT", default="pubsub")
+if REDIS_TRANSPORT not in TRANSPORTS:
+    raise ValueError(f"REDIS_TRANSPORT must be one of {TRANSPORTS}")
+
+# Streams tuning: approximate stream length cap, and how long a delivered but
+# unacknowledged entry may sit with a dead consumer before it is reclaimed
+STREAM_MAXLEN = config("REDIS_STREAM_MAXLEN", default=10000, cast=int)
+STREAM_RECLAIM_IDLE_MS = config("REDIS_STREAM_RECLAIM_IDLE_MS", default=60000, cast=int)
+STREAM_BATCH = 10
+# A consumer resets the idle time of the entries it still holds this often,
+# so an entry a busy agent is still answering is never reclaimed by another
+STREAM_REFRESH_MS = max(STREAM_RECLAIM_IDLE_MS // 4, 100)
 
 # Create unique channel name including model for multi-model support
 today = datetime.now().strftime("%Y-%m-%d")
@@ -27,35 +55,203 @@ model_name_sanitized = (
 REDIS_CHANNEL = f"chat-{today}-{model_name_sanitized}"
 
 
+def stream_channel(channel: str) -> str:
+    """Side channel for token deltas, so agents are not woken for every chunk."""
+    return f"{channel}:stream"
+
+
+def events_key(channel: str) -> str:
+    """Redis stream that carries a channel's messages with the streams transport."""
+    return f"{channel}_events"
+
+
+async def publish_message(channel: str, message: dict):
+    """Send a chat message to every agent on the channel via REDIS_TRANSPORT."""
+    data = json.dumps(message)
+    if REDIS_TRANSPORT == "streams":
+        await redis_client.xadd(
+            events_key(channel), {"data": data}, maxlen=STREAM_MAXLEN, approximate=True
+        )
+    else:
+        await redis_client.publish(channel, data)
+
+
+# Entries of a history list by position, counted from the first entry ever
+# written: the list head is at {history}_seq minus the list length once old
+# entries were archived (app.core.archive). Returns the position of the first
+# entry returned, later than the requested one if that was archived.
+_READ_HISTORY = """
+local length = redis.call('LLEN', KEYS[1])
+local head = tonumber(redis.call('GET', KEYS[2]) or length)
+local base = head - length
+local first = math.max(tonumber(ARGV[1]), base)
+local last = tonumber(ARGV[1]) + tonumber(ARGV[2]) - 1
+if last < first then
+  return {first, {}}
+end
+return {first, redis.call('LRANGE', KEYS[1], first - base, last - base)}
+"""
+_read_history = redis_client.register_script(_READ_HISTORY)
+
+# Reset the idle time of the pending entries ARGV[3..] that still belong to
+# consumer ARGV[2] of group ARGV[1]; entries another consumer took are skipped
+_REFRESH_PENDING = """
+local refreshed = 0
+for i = 3, #ARGV do
+  local pending = redis.call('XPENDING', KEYS[1], ARGV[1], ARGV[i], ARGV[i], 1)
+  if pending[1] and pending[1][2] == ARGV[2] then
+    redis.call('XCLAIM', KEYS[1], ARGV[1], ARGV[2], 0, ARGV[i], 'JUSTID')
+    refreshed = refreshed + 1
+  end
+end
+return refreshed
+"""
+_refresh_pending = redis_client.register_script(_REFRESH_PENDING)
+
+
+async def read_history(history: str, start: int, count: int) -> tuple[int, list[str]]:
+    """Up to `count` entries of a history list from position `start` on.
+
+    Returns the position of the first entry with the entries, atomically, so
+    neither appends nor trims in between can shift them. Entries are bytes,
+    in whatever codec they were written (app.core.codec).
+    """
+    first, entries = await _read_history(
+        keys=[history, f"{history}_seq"], args=[start, count], client=redis_binary
+    )
+    return int(first), entries
+
+
 class RedisHandler:
     """Handles Redis pub/sub operations for agents."""
 
-    def __init__(self, agent_name: str, redis_channel: str, redis_history: str):
+    def __init__(
+        self,
+        agent_name: str,
+        redis_channel: str,
+        redis_history: str,
+        stream: bool = False,
+        history_token_budget: int | None = None,
+        scheduler=None,
+        metrics: AgentMetrics | None = None,
+    ):
         self.agent_name = agent_name
         self.redis_channel = redis_channel
         self.redis_history = redis_history
+        self.redis_history_seq = f"{redis_history}_seq"
+        self.redis_history_summary = f"{redis_history}_summary"
+        self.stream = stream
+        self.history_token_budget = history_token_budget
+        # Optional TurnScheduler deciding whether this agent answers a message
+        self.scheduler = scheduler
+        self.history_cache = HistoryCache(HISTORY_WINDOW)
+        # Set whenever a history entry is written or observed
+        self.history_appended = asyncio.Event()
+        # Whether this process has added the channel to the topic registry
+        self.topic_registered = False
+        # Messages waiting for the agent while a model call is in flight
+        self.inbox = AgentInbox()
+        # Set while the channel subscription (or consumer group) is attached
+        self.listening = asyncio.Event()
+        self.metrics = metrics or AgentMetrics(agent_name, "")
+        # Set by drain(): no new messages are taken, the queued ones answered
+        self.draining = False
+        self._receiver: asyncio.Task | None = None
 
     async def listen_and_respond(self, agent_call_func):
-        """Listen for Redis messages and respond using agent_call_func."""
-        pubsub = redis_client.pubsub()
-        await pubsub.subscribe(self.redis_channel)
+        """Listen for Redis messages and respond using agent_call_func.
 
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True)
-            if message:
-                try:
-                    await self._process_message(message, agent_call_func)
-                except Exception as e:
-                    print(f"[{self.agent_name}] Error handling message: {e}")
-            await asyncio.sleep(0.5)
-
-    async def _process_message(self, message, agent_call_func):
-        """Process a single Redis message."""
+        Receiving and answering are decoupled: the listener only updates the
+        history cache and queues messages in the inbox, and a single responder
+        answers everything that queued up during the previous call at once.
+        """
+        responder = asyncio.create_task(self._respond_loop(agent_call_func))
+        self._receiver = asyncio.create_task(self._receive())
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            if not self.draining or asyncio.current_task().cancelling():
+                raise
+            # Drained: nothing new comes in, the queued messages are answered
+            await responder
+        finally:
+            self._receiver.cancel()
+            self.listening.clear()
+            responder.cancel()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop receiving and wait until the queued messages are answered.
+
+        Used before a replica is stopped; returns False if messages were still
+        queued after `timeout` seconds.
+        """
+        self.draining = True
+        if self._receiver:
+            self._receiver.cancel()
+        self.listening.clear()
+        try:
+            await asyncio.wait_for(self.inbox.join(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def _receive(self):
+        if REDIS_TRANSPORT == "streams":
+            await self._consume()
+            return
+
+        async for message in subscribe(self.redis_channel, ready=self.listening):
+            try:
+                await self._process_message(message)
+            except Exception as e:
+                print(f"[{self.agent_name}] Error handling message: {e}")
+
+    async def _consume(self):
+        """Streams transport: one consumer group per agent, ack once answered."""
+        # Read on only once the inbox is answered, so a busy replica leaves
+        # new entries to idle ones instead of queueing them
+        consumer = StreamConsumer(
+            self.redis_channel,
+            group=self.agent_name,
+            ready=self.listening,
+            idle=self.inbox.idle,
+        )
+        async for entry_id, fields in consumer.messages():
+
+            async def ack(entry_id=entry_id):
+                await consumer.ack(entry_id)
+
+            try:
+                queued = await self._process_message(fields, ack=ack)
+            except Exception as e:
+                print(f"[{self.agent_name}] Error handling message: {e}")
+                queued = False
+            if not queued:
+                # Ack failures too, a poison message must not be redelivered forever
+                await ack()
+
+    async def _process_message(self, message, ack=None) -> bool:
+        """Process a single Redis message; returns True if it was queued."""
         chat_message = json.loads(message["data"])
         sender = chat_message["sender"]
+        self._observe_history(chat_message)
 
+        if chat_message.get("type") == "summary":
+            self.history_cache.set_summary(
+                chat_message["summary"], chat_message["summary_seq"]
+            )
+            return False
+
+        if chat_message.get("type") == "stream":
+            return False
         if sender == self.agent_name:
-            return
+            self.metrics.skipped("own")
+            return False
+
+        self.metrics.received.inc()
+        if self.scheduler and not await self.scheduler.acquire_turn(chat_message):
+            self.metrics.skipped("turn")
+            return False
 
         content = chat_message.get("content", chat_message.get("response", ""))
         msg_to_process = (
@@ -65,65 +261,433 @@ class RedisHandler:
         msg = msg_to_process[:60] + "..." if len(msg_to_process) > 60 else ""
         print(f"📥 [{self.agent_name}] Received from {sender}: {msg}")
 
-        response = await agent_call_func(msg_to_process)
-        await self.publish_response(response)
+        receive = start_span("receive", self.agent_name, chat_message, sender=sender)
+        dropped = self.inbox.put(InboxItem(msg_to_process, ack, receive))
+        if dropped is not None:
+            print(f"⚠️ [{self.agent_name}] Inbox full, dropped oldest message")
+            self.metrics.skipped("inbox_full")
+            if dropped.span:
+                dropped.span.attributes["dropped"] = True
+                dropped.span.end()
+            if dropped.ack:
+                await dropped.ack()
+        return True
 
-    async def publish_response(self, response):
+    async def _respond_loop(self, agent_call_func):
+        """Answer queued messages, one agent call per batch."""
+        while True:
+            batch = await self.inbox.next_batch()
+            if len(batch) > 1:
+                print(f"📚 [{self.agent_name}] Coalesced {len(batch)} messages")
+            # The reply continues the trace of the newest message in the batch
+            token = current_span.set(batch[-1].span)
+            try:
+                await self._respond(self.inbox.merge(batch), agent_call_func)
+            except Exception as e:
+                # Stay silent: other agents would take error text as input
+                print(f"[{self.agent_name}] Error handling message, not answering: {e}")
+            finally:
+                current_span.reset(token)
+                for item in batch:
+                    if item.span:
+                        item.span.attributes["coalesced"] = len(batch)
+                        item.span.end()
+                    if item.ack:
+                        await item.ack()
+                self.inbox.done()
+
+    async def _respond(self, prompt: str, agent_call_func):
+        if self.stream:
+            stream_id = uuid.uuid4().hex
+
+            async def on_delta(delta: str):
+                await self.publish_delta(stream_id, delta)
+
+            response = await agent_call_func(prompt, on_delta=on_delta)
+            await self.publish_response(response, stream_id=stream_id)
+        else:
+            response = await agent_call_func(prompt)
+            await self.publish_response(response)
+
+    async def publish_delta(self, stream_id: str, delta: str):
+        """Publish an incremental chunk of a response that is still streaming."""
+        chunk = {
+            "type": "stream",
+            "content": delta,
+            "sender": self.agent_name,
+            "stream_id": stream_id,
+            "role": "user",
+        }
+        await redis_client.publish(
+            stream_channel(self.redis_channel), json.dumps(chunk)
+        )
+
+    async def publish_response(self, response, stream_id: str | None = None):
         """Publish agent response to Redis."""
+        started = time.perf_counter()
         try:
-            chat_message = {
-                "type": "message",
-                "content": response.output.strip(),
-                "sender": self.agent_name,
-                "timestamp": datetime.now().isoformat(),
-                "role": "user",
-            }
-
-            print(f"Publish to Redis by {self.agent_name}: {chat_message['content']}")
-            if not chat_message["content"]:
-                print(response)
+            with span("publish", self.agent_name) as publishing:
+                chat_message = {
+                    "id": uuid.uuid4().hex,
+                    "type": "message",
+                    "content": response.output.strip(),
+                    "sender": self.agent_name,
+                    "timestamp": datetime.now().isoformat(),
+                    "role": "user",
+                    **publishing.envelope(),
+                }
+                if stream_id:
+                    chat_message["stream_id"] = stream_id
 
-            await redis_client.publish(self.redis_channel, json.dumps(chat_message))
-            await self._store_message_history(response)
+                print(
+                    f"Publish to Redis by {self.agent_name}: {chat_message['content']}"
+                )
+                if not chat_message["content"]:
+                    print(response)
 
-            # Add small pause after publishing response
-            await asyncio.sleep(1)
+                # Store first, so listeners can apply the entry to their caches
+                entry, seq = await self._store_message_history(response)
+                chat_message["history_seq"] = seq
+                chat_message["history"] = entry
+                await publish_message(self.redis_channel, chat_message)
+            self.metrics.publish.observe(time.perf_counter() - started)
+            self.metrics.answered.inc()
 
         except Exception as e:
             print(f"{self.agent_name} publish error: {e}")
 
-    async def _store_message_history(self, response):
-        """Store message with sender metadata in Redis history."""
-        messages_data = json.loads(response.new_messages_json())
+    async def _store_message_history(self, response) -> tuple[str, int]:
+        """Store message with sender metadata in Redis history.
+
+        Returns the stored entry and its sequence number.
+        """
+        messages_data = json_loads(response.new_messages_json())
         for msg in messages_data:
             if msg.get("kind") == "response":
                 msg["agent_sender"] = self.agent_name
 
-        enhanced_messages_json = json.dumps(messages_data)
-        await redis_client.rpush(self.redis_history, enhanced_messages_json)
+        # Peers and the cache get JSON; Redis gets the configured codec
+        enhanced_messages_json = codec.dumps(messages_data)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.rpush(
+                self.redis_history, codec.encode(messages_data, enhanced_messages_json)
+            )
+            pipe.incr(self.redis_history_seq)
+            if not self.topic_registered:
+                register_topic(pipe, self.redis_channel)
+            seq = (await pipe.execute())[1]
+        self.topic_registered = True
+
+        self.history_cache.append(seq, enhanced_messages_json)
+        self.history_appended.set()
+        return enhanced_messages_json, seq
+
+    def _observe_history(self, chat_message: dict):
+        """Apply a history entry announced by another writer to the cache."""
+        seq = chat_message.get("history_seq")
+        entry = chat_message.get("history")
+        if seq is None or entry is None:
+            return
+        try:
+            self.history_cache.append(seq, entry)
+        except Exception as e:
+            print(f"Invalid message format in Redis: {e}")
+            self.history_cache.invalidate()
+        self.history_appended.set()
 
     async def get_message_history(self) -> list[ModelMessage]:
-        """Fetch recent message history from Redis."""
-        raw = await redis_client.lrange(self.redis_history, -10, -1)
-        messages: list[ModelMessage] = []
+        """Return recent message history, from the cache when it is in sync."""
+        if self.history_cache.warm:
+            self.history_cache.hits += 1
+        else:
+            self.history_cache.misses += 1
+            await self._load_message_history()
+        return self.history_cache.messages(self.history_token_budget)
+
+    async def _load_message_history(self):
+        """Cold start: read the latest window and its sequence number from Redis."""
+        # Bytes, as entries may be stored in a binary codec
+        async with redis_binary.pipeline(transaction=True) as pipe:
+            pipe.get(self.redis_history_seq)
+            pipe.llen(self.redis_history)
+            pipe.lrange(self.redis_history, -self.history_cache.window, -1)
+            pipe.hgetall(self.redis_history_summary)
+            seq, length, raw, summary = await pipe.execute()
+        summary = {key.decode(): value.decode() for key, value in summary.items()}
+
+        if seq is None:
+            # History written before sequence numbers existed
+            await redis_client.setnx(self.redis_history_seq, length)
+            seq = length
+        self.history_cache.reset(int(seq), raw)
+        if summary:
+            self.history_cache.set_summary(summary["text"], int(summary["seq"]))
+
+
+async def subscribe(
+    *channels: str,
+    timeout: float = LISTEN_TIMEOUT,
+    ready: asyncio.Event | None = None,
+):
+    """Yield pub/sub messages from channels as soon as Redis pushes them.
 
-        for item in raw:
+    Blocks on the socket instead of polling. When the connection drops, a fresh
+    subscription is opened with exponential backoff, so callers can simply
+    ``async for`` over this generator for the lifetime of the process.
+    `ready` is set while the subscription is attached.
+    """
+    delay = RECONNECT_MIN_DELAY
+    while True:
+        pubsub = redis_listener.pubsub()
+        try:
+            await pubsub.subscribe(*channels)
+            if ready:
+                ready.set()
+            delay = RECONNECT_MIN_DELAY
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=timeout
+                )
+                if message and message["type"] == "message":
+                    yield message
+        except (OSError, aioredis.RedisError) as e:
+            if ready:
+                ready.clear()
+            print(f"Redis subscription to {channels} lost: {e}, retry in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+        finally:
             try:
-                json_data = item.decode("utf-8") if isinstance(item, bytes) else item
-                parsed = ModelMessagesTypeAdapter.validate_json(json_data)
-                messages.extend(parsed)
-            except Exception as e:
-                print(f"Invalid message format in Redis: {e}")
+                await pubsub.aclose()
+            except Exception:
+                pass
+
 
-        return messages
+class StreamConsumer:
+    """Read a channel's event stream as one consumer of a consumer group.
+
+    Every agent is its own group, so each agent sees every message, while
+    replicas of the same agent share the group and split the load. The group
+    remembers the last delivered ID, and the consumer name is stable across
+    restarts (agent name and supervisor replica index), so a restarted
+    replica first replays the entries it had received but not acknowledged.
+    Entries left unacknowledged by a crashed replica are reclaimed with
+    XAUTOCLAIM after STREAM_RECLAIM_IDLE_MS; a live replica keeps the idle
+    time of the entries it still holds below that, however long they wait.
+    Given an `idle` event, new entries are only read while it is set, so
+    a replica busy with one entry does not take the next from an idle one.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        group: str,
+        consumer: str | None = None,
+        timeout: float = LISTEN_TIMEOUT,
+        ready: asyncio.Event | None = None,
+        idle: asyncio.Event | None = None,
+    ):
+        self.key = events_key(channel)
+        # Set while the consumer group exists and reads are succeeding
+        self.ready = ready or asyncio.Event()
+        # New entries are only read while this is set (always, if None)
+        self.idle = idle
+        self.group = group
+        replica = config("SUPERVISOR_REPLICA", default=0, cast=int)
+        self.consumer = consumer or config(
+            "REDIS_STREAM_CONSUMER", default=f"{group}-{replica}"
+        )
+        self.block_ms = int(timeout * 1000)
+        self._last_reclaim = 0.0
+        self._last_refresh = time.monotonic()
+        # Yielded but not yet acknowledged, e.g. waiting in the agent's inbox
+        self._in_flight: set[str] = set()
+        # Acknowledged while Redis was unreachable, acked again on reconnect
+        self._unacked: set[str] = set()
+
+    async def ensure_group(self, start: str = "0"):
+        """Create the group if needed; a new group reads the stream from `start`."""
+        try:
+            await redis_client.xgroup_create(
+                self.key, self.group, id=start, mkstream=True
+            )
+        except aioredis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def messages(self):
+        """Yield (entry_id, fields) pairs; call ack() once an entry is handled."""
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await self.ensure_group()
+                if self._unacked:
+                    await redis_client.xack(self.key, self.group, *self._unacked)
+                    self._unacked.clear()
+                self.ready.set()
+                # Entries delivered to this consumer before a restart come
+                # first, except those still being handled since a reconnect
+                cursor = "0"
+                while True:
+                    cursor, entries = await self._read(cursor)
+                    if cursor is None:
+                        break
+                    for entry_id, fields in entries:
+                        if entry_id not in self._in_flight:
+                            yield self._deliver(entry_id, fields)
+                delay = RECONNECT_MIN_DELAY
+
+                while True:
+                    await self._wait_idle()
+                    await self._refresh()
+                    for entry_id, fields in await self._reclaim():
+                        if entry_id not in self._in_flight:
+                            yield self._deliver(entry_id, fields)
+                    _, entries = await self._read(">")
+                    for entry_id, fields in entries:
+                        yield self._deliver(entry_id, fields)
+            except (OSError, aioredis.RedisError) as e:
+                self.ready.clear()
+                print(f"Redis stream {self.key} lost: {e}, retry in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def ack(self, entry_id: str):
+        self._in_flight.discard(entry_id)
+        try:
+            await redis_client.xack(self.key, self.group, entry_id)
+        except (OSError, aioredis.RedisError) as e:
+            print(f"Ack of {entry_id} on {self.key} failed: {e}, retry on reconnect")
+            self._unacked.add(entry_id)
+
+    def _deliver(self, entry_id: str, fields: dict) -> tuple[str, dict]:
+        self._in_flight.add(entry_id)
+        return entry_id, fields
+
+    async def _read(self, cursor: str) -> tuple[str | None, list]:
+        """The last entry ID read (None if there was none) and the live entries."""
+        # One entry at a time: a replica busy with a slow model call should
+        # not sit on a batch that an idle replica could be answering
+        response = await redis_listener.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.key: cursor},
+            count=1,
+            # Wake up in time for the next refresh
+            block=min(self.block_ms, STREAM_REFRESH_MS) if cursor == ">" else None,
+        )
+        entries = response[0][1] if response else []
+        return (entries[-1][0] if entries else None), await self._live(entries)
+
+    async def _wait_idle(self):
+        """Hold off new entries until those already yielded are handled."""
+        while self.idle is not None and not self.idle.is_set():
+            await self._refresh()
+            try:
+                await asyncio.wait_for(self.idle.wait(), STREAM_REFRESH_MS / 1000)
+            except TimeoutError:
+                pass
+
+    async def _refresh(self):
+        """Reset the idle time of in-flight entries, so they are not reclaimed."""
+        now = time.monotonic()
+        if not self._in_flight or now - self._last_refresh < STREAM_REFRESH_MS / 1000:
+            return
+        self._last_refresh = now
+        await _refresh_pending(
+            keys=[self.key],
+            args=[self.group, self.consumer, *self._in_flight],
+            client=redis_client,
+        )
+
+    async def _reclaim(self) -> list:
+        """Take over entries another consumer left unacknowledged for too long."""
+        now = time.monotonic()
+        if now - self._last_reclaim < STREAM_RECLAIM_IDLE_MS / 2000:
+            return []
+        self._last_reclaim = now
+        response = await redis_client.xautoclaim(
+            self.key,
+            self.group,
+            self.consumer,
+            min_idle_time=STREAM_RECLAIM_IDLE_MS,
+            count=STREAM_BATCH,
+        )
+        # [next_id, entries] on Redis 6.2, [next_id, entries, deleted] on 7+
+        claimed = response[1]
+        if any(entry_id is None for entry_id, _ in claimed):
+            # Redis 6.2 claims trimmed entries but returns them without an ID,
+            # so they are found and acknowledged in our own pending list
+            cursor = "0"
+            while cursor is not None:
+                cursor, _ = await self._read(cursor)
+        return await self._live(claimed)
+
+    async def _live(self, entries: list) -> list:
+        """Drop and acknowledge pending entries trimmed away by MAXLEN.
+
+        They come back without fields and would otherwise stay pending forever.
+        """
+        trimmed = [entry_id for entry_id, fields in entries if entry_id and not fields]
+        if trimmed:
+            await redis_client.xack(self.key, self.group, *trimmed)
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+
+async def create_groups(channel: str, groups: list[str], start: str = "$"):
+    """Create the consumer groups of a channel's agents, reading from `start`.
+
+    Called when the agents are registered, before any of them runs, so no
+    message sent while they start up is missed and none from before is read.
+    """
+    for group in groups:
+        await StreamConsumer(channel, group).ensure_group(start)
+
+
+async def read_events(channel: str, timeout: float = LISTEN_TIMEOUT):
+    """Yield new entries of a channel's event stream without a consumer group.
+
+    Used by observers like the chat server that want every message but take
+    no part in work distribution.
+    """
+    key = events_key(channel)
+    last_id = "$"
+    delay = RECONNECT_MIN_DELAY
+    while True:
+        try:
+            response = await redis_listener.xread(
+                {key: last_id}, count=STREAM_BATCH, block=int(timeout * 1000)
+            )
+            delay = RECONNECT_MIN_DELAY
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    yield fields
+        except (OSError, aioredis.RedisError) as e:
+            print(f"Redis stream {key} lost: {e}, retry in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
 
 
 async def publish_to_redis(msg):
     """Publish a chat message to Redis channel."""
     try:
-        await redis_client.publish(REDIS_CHANNEL, json.dumps(msg.model_dump()))
+        await publish_message(REDIS_CHANNEL, msg.model_dump())
     except Exception as e:
         print(f"Error publishing to Redis: {e}")
 
 
-__all__ = ["redis_client", "REDIS_CHANNEL", "RedisHandler", "publish_to_redis"]
+__all__ = [
+    "redis_client",
+    "REDIS_CHANNEL",
+    "RedisHandler",
+    "publish_to_redis",
+    "subscribe",
+    "stream_channel",
+    "events_key",
+    "publish_message",
+    "read_events",
+    "StreamConsumer",
+    "create_groups",
+    "REDIS_TRANSPORT",
+]
@@ -1,82 +1,140 @@
 """Redis export utilities for chat dialogues."""
 
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from pydantic_ai.messages import ModelMessagesTypeAdapter
+from decouple import config
 
-from app.core.redis import redis_client
+from app.core.archive import archive
+from app.core.codec import load_entry
+from app.core.connections import redis_client
+from app.core.redis import read_history
+from app.core.topics import list_topics
 
+# History entries read per LRANGE while streaming a topic
+EXPORT_PAGE_SIZE = config("EXPORT_PAGE_SIZE", default=500, cast=int)
 
-async def list_chat_topics() -> list[str]:
-    """List all chat topics (channels) stored in Redis."""
-    try:
-        chat_keys = await redis_client.keys("*-chat-*")
-        history_keys = await redis_client.keys("*-chat-*_history")
-
-        topics = set()
-        for key in chat_keys:
-            if not key.endswith("_history"):
-                topics.add(key)
 
-        for key in history_keys:
-            base_key = key.replace("_history", "")
-            topics.add(base_key)
+async def list_chat_topics(rescan: bool = False) -> list[str]:
+    """List all chat topics (channels) stored in Redis.
 
-        return sorted(topics)
+    Reads the topic registry (app.core.topics); KEYS would block the server
+    for every client while it walks the whole keyspace.
+    """
+    try:
+        return sorted(await list_topics(rescan=rescan))
     except Exception as e:
         print(f"Error listing chat topics: {e}")
         return []
 
 
+def entry_records(topic: str, index: int, entry: str | bytes) -> list[dict]:
+    """Flat records for the text parts of one stored history entry.
+
+    No pydantic validation: the export needs the content, not pydantic-ai
+    messages, and keeps the agent_sender added on write.
+    """
+    records = []
+    for msg in load_entry(entry):
+        role = msg.get("kind", "unknown")
+        for part in msg.get("parts") or ():
+            content = part.get("content")
+            if content is None:
+                continue
+            records.append(
+                {
+                    "topic": topic,
+                    "index": index,
+                    "role": role,
+                    "part_kind": part.get("part_kind"),
+                    "sender": msg.get("agent_sender"),
+                    "timestamp": part.get("timestamp") or msg.get("timestamp"),
+                    "content": content
+                    if isinstance(content, str)
+                    else json.dumps(content),
+                }
+            )
+    return records
+
+
+async def iter_history_pages(
+    topic: str, start: int = 0, page_size: int = EXPORT_PAGE_SIZE
+) -> AsyncIterator[tuple[int, list[str | bytes]]]:
+    """(position of the first entry, entries) for the topic's history from `start`.
+
+    Entries moved out of Redis by the retention policy are read from the
+    archive. One read per page, so a long history is never held in memory.
+    """
+    history_key = f"{topic}_history"
+    while True:
+        first, page = await read_history(history_key, start, page_size)
+        if first > start:
+            # Archived, possibly while this export was running
+            for position, entries in archive.pages(topic, start, page_size, end=first):
+                yield position, entries
+            if not page:
+                start = first
+                continue
+        if page:
+            yield first, page
+        if len(page) < page_size:
+            return
+        start = first + len(page)
+
+
+def page_records(topic: str, start: int, page: list[str | bytes]) -> list[dict]:
+    """Message records of a page of history entries; bad entries are skipped."""
+    records = []
+    for index, entry in enumerate(page, start):
+        try:
+            records.extend(entry_records(topic, index, entry))
+        except (ValueError, AttributeError) as e:
+            print(f"Error parsing message {topic}[{index}]: {e}")
+    return records
+
+
+async def stream_chat_messages(
+    topic: str, start: int = 0, page_size: int = EXPORT_PAGE_SIZE
+) -> AsyncIterator[dict]:
+    """Every message record of a topic, oldest first, in bounded memory."""
+    async for first, page in iter_history_pages(topic, start, page_size):
+        for record in page_records(topic, first, page):
+            yield record
+
+
 async def get_chat_messages(topic: str, limit: int = 50) -> list[dict]:
-    """Get chat messages for a specific topic from Redis."""
+    """Get the messages of the last `limit` history entries of a topic."""
     try:
-        messages = []
         history_key = f"{topic}_history"
-        raw_history = await redis_client.lrange(history_key, -limit, -1)
-
-        for item in raw_history:
-            try:
-                json_data = item.decode("utf-8") if isinstance(item, bytes) else item
-                parsed_messages = ModelMessagesTypeAdapter.validate_json(json_data)
-
-                for msg in parsed_messages:
-                    if hasattr(msg, "parts") and msg.parts:
-                        for part in msg.parts:
-                            if hasattr(part, "content"):
-                                content = part.content
-                                timestamp = datetime.now().isoformat()
-                                messages.append(
-                                    {
-                                        "content": content,
-                                        "timestamp": timestamp,
-                                        "role": getattr(msg, "kind", "unknown"),
-                                    }
-                                )
-            except Exception as e:
-                print(f"Error parsing message: {e}")
-
-        return messages
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.get(f"{history_key}_seq")
+            pipe.llen(history_key)
+            head, length = await pipe.execute()
+        start = max(int(head or length) - limit, 0)
+        return [record async for record in stream_chat_messages(topic, start)]
     except Exception as e:
         print(f"Error getting chat messages: {e}")
         return []
 
 
-async def export_topic_to_markdown(topic: str) -> str:
-    """Export a topic's messages to markdown format."""
-    messages = await get_chat_messages(topic)
-
-    markdown_lines = [f"# Chat Export: {topic}\n"]
-    markdown_lines.append(
-        f"Exported on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+def markdown_header(topic: str) -> str:
+    return (
+        f"# Chat Export: {topic}\n\n"
+        f"Exported on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
     )
 
-    for msg in messages:
-        timestamp = msg.get("timestamp", "")
-        content = msg.get("content", "")
-        role = msg.get("role", "")
 
-        markdown_lines.append(f"**{role}** ({timestamp})")
-        markdown_lines.append(f"{content}\n")
+def markdown_record(record: dict) -> str:
+    role = record["role"]
+    if record.get("sender"):
+        role = f"{role} {record['sender']}"
+    return f"**{role}** ({record.get('timestamp') or ''})\n{record['content']}\n\n"
+
 
-    return "\n".join(markdown_lines)
+async def export_topic_to_markdown(topic: str) -> str:
+    """Export a topic's messages to markdown format."""
+    lines = [markdown_header(topic)]
+    async for record in stream_chat_messages(topic):
+        lines.append(markdown_record(record))
+    return "".join(lines)
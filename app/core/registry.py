@@ -1,19 +1,36 @@
 """Agent registry loading and management."""
 
-import multiprocessing
+import asyncio
 import signal
 import sys
 import time
+from functools import partial
 
 import uvicorn
+from decouple import config
 from fastapi import FastAPI
 
+from app.core.connections import close_connections
+from app.core.health import STARTUP_TIMEOUT
+from app.core.host import HOST_PREFIX, agent_slug
+from app.core.redis import REDIS_CHANNEL, REDIS_TRANSPORT, create_groups
+from app.core.supervisor import AutoscalePolicy, Service, Supervisor
 from app.core.utils import combine_prompt, load_agent_registry
 
+# "process": one uvicorn process per agent replica,
+# "host": all agents in one process under /agents/<name>
+HOST_MODES = ("process", "host")
+AGENT_HOST_MODE = config("AGENT_HOST_MODE", default="process")
+
+# The browser talks to the chat server, so it keeps a well-known port;
+# agents get free ports assigned by the supervisor.
+REBEL_PORT = config("REBEL_PORT", default=7999, cast=int)
+
 
 def get_active_agents(registry: dict) -> list[dict]:
     """Extract list of active agents with their configurations."""
     active_agents = []
+    participants = {}
     if "agents" in registry:
         for agent_name, agent_config in registry["agents"].items():
             if agent_config.get("active", False):
@@ -21,7 +38,19 @@ def get_active_agents(registry: dict) -> list[dict]:
                 agent_data = {
                     "name": agent_config.get("name", agent_name.title()),
                     "system_prompt": combined_prompt,
+                    "stream": agent_config.get("stream", False),
+                    "history_token_budget": agent_config.get("history_token_budget"),
+                    "cache": agent_config.get("cache", False),
+                    "model": agent_config.get("model"),
+                    "replicas": agent_config.get("replicas", 1),
+                    "autoscale": agent_config.get("autoscale"),
+                    "turn_taking": (registry.get("meta") or {}).get("turn_taking"),
+                    "history_retention": (registry.get("meta") or {}).get(
+                        "history_retention"
+                    ),
+                    "participants": participants,
                 }
+                participants[agent_data["name"]] = agent_config["system_prompt"]
                 active_agents.append(agent_data)
     return active_agents
 
@@ -61,26 +90,92 @@ def start_agent_process(agent_config: dict, port: int):
     uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
 
 
-def start_rebel_agent():
+def start_agent_host(agent_configs: list[dict], port: int):
+    """Start all agents in one process behind a single uvicorn server."""
+
+    def signal_handler(_signum, _frame):
+        print(f"\nShutting down agent host on port {port}...")
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    from app.core.host import create_host_app
+
+    print(f"Starting agent host with {len(agent_configs)} agents on port {port}...")
+    app = create_host_app(agent_configs)
+    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+
+
+def start_rebel_agent(port: int = REBEL_PORT):
     """Start the Agent Rebel (chat server) process."""
 
     def signal_handler(_signum, _frame):
-        print("\nShutting down Agent Rebel on port 7999...")
+        print(f"\nShutting down Agent Rebel on port {port}...")
         sys.exit(0)
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    print("Starting Agent Rebel on port 7999...")
+    print(f"Starting Agent Rebel on port {port}...")
 
     uvicorn.run(
-        "app.chat_server:app", host="0.0.0.0", port=7999, reload=False, log_level="info"
+        "app.chat_server:app", host="0.0.0.0", port=port, reload=False, log_level="info"
     )
 
 
-def start_all_agents():
-    """Start all active agents and the chat server."""
-    processes = []
+def build_services(active_agents: list[dict], mode: str) -> list[Service]:
+    """Supervised services for the chat server and the active agents."""
+    services = [Service("Agent Rebel", start_rebel_agent, port=REBEL_PORT)]
+    if mode == "host":
+        services.append(Service("Agent host", partial(start_agent_host, active_agents)))
+        return services
+
+    for agent_config in active_agents:
+        replicas = agent_config["replicas"]
+        autoscale = agent_config.get("autoscale")
+        policy = (
+            AutoscalePolicy(**{"min_replicas": replicas, **autoscale})
+            if autoscale
+            else None
+        )
+        most = policy.max_replicas if policy else replicas
+        if (
+            most > 1
+            and REDIS_TRANSPORT != "streams"
+            and not agent_config.get("turn_taking")
+        ):
+            # Every replica subscribes to the channel and would answer every message
+            raise ValueError(
+                f"{agent_config['name']} runs up to {most} replicas on pub/sub: "
+                "set REDIS_TRANSPORT=streams or meta.turn_taking in agents.yml"
+            )
+        services.append(
+            Service(
+                agent_config["name"],
+                partial(start_agent_process, agent_config),
+                replicas=replicas,
+                autoscale=policy,
+            )
+        )
+    return services
+
+
+async def register_stream_groups(active_agents: list[dict]):
+    """Create every agent's consumer group before the agents start."""
+    try:
+        await create_groups(REDIS_CHANNEL, [agent["name"] for agent in active_agents])
+    finally:
+        await close_connections()
+
+
+def start_all_agents(mode: str = AGENT_HOST_MODE):
+    """Start all active agents and the chat server, and keep them running."""
+    if mode not in HOST_MODES:
+        raise ValueError(
+            f"Unknown agent host mode {mode!r}, expected one of {HOST_MODES}"
+        )
+    supervisor = None
 
     try:
         # Load agent registry
@@ -91,55 +186,43 @@ def start_all_agents():
         active_agents = get_active_agents(registry)
         print(f"Found {len(active_agents)} active agents")
 
-        # Start Agent Rebel in separate process
-        rebel_process = multiprocessing.Process(target=start_rebel_agent)
-        rebel_process.start()
-        processes.append(rebel_process)
-
-        # Give Agent Rebel time to start
-        time.sleep(3)
+        if REDIS_TRANSPORT == "streams":
+            asyncio.run(register_stream_groups(active_agents))
 
-        # Start each active agent in its own process
-        starting_port = 8001
+        started = time.perf_counter()
+        supervisor = Supervisor(build_services(active_agents, mode))
+        all_ready = supervisor.start()
 
-        for i, agent_config in enumerate(active_agents):
-            port = starting_port + i
-            process = multiprocessing.Process(
-                target=start_agent_process, args=(agent_config, port)
+        print("\nServices:")
+        for replica in supervisor.replicas:
+            seconds = replica.ready_after
+            state = (
+                f"ready after {seconds:.2f}s" if seconds is not None else "NOT READY"
             )
-            process.start()
-            processes.append(process)
-
-            print(f"Started {agent_config['name']} on port {port}")
-            time.sleep(2)
-
-        print(f"\nAll {len(active_agents)} agents started successfully!")
-        print("Ports:")
-        print("  - Agent Rebel: 7999")
-        for i, agent_config in enumerate(active_agents):
-            print(f"  - {agent_config['name']}: {starting_port + i}")
+            print(f"  - {replica.service.name}: {replica.url} ({state})")
+        if mode == "host":
+            host_url = supervisor.endpoints()["Agent host"][0]
+            for agent_config in active_agents:
+                slug = agent_slug(agent_config["name"])
+                print(f"    - {agent_config['name']}: {host_url}{HOST_PREFIX}/{slug}")
+
+        if not all_ready:
+            print(f"\n⚠️ Some services were not ready after {STARTUP_TIMEOUT:.0f}s")
+        print(
+            f"\nCold start: {len(active_agents)} agents ({mode} mode) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
 
         print("\nPress Ctrl+C to stop all agents...")
-
-        # Wait for all processes
-        try:
-            for process in processes:
-                process.join()
-        except KeyboardInterrupt:
-            print("\nStopping all agents...")
+        supervisor.run()
 
     except KeyboardInterrupt:
         print("\nStopping all agents...")
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        # Clean up all processes
-        for process in processes:
-            if process.is_alive():
-                process.terminate()
-                process.join(timeout=5)
-                if process.is_alive():
-                    process.kill()
+        if supervisor:
+            supervisor.stop()
 
         print("All agents stopped.")
 
@@ -149,4 +232,7 @@ __all__ = [
     "get_active_agents",
     "start_all_agents",
     "start_agent_process",
+    "start_agent_host",
+    "build_services",
+    "HOST_MODES",
 ]
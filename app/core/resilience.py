@@ -0,0 +1,289 @@
+"""Retries with jittered backoff and per-provider circuit breakers.
+
+Transient provider errors (429, 5xx, timeouts, dropped connections) are
+retried with capped, fully jittered exponential backoff, or after the
+provider's Retry-After. Consecutive transient failures open the provider's
+circuit: calls then fail fast with CircuitOpenError until a single trial
+call after BREAKER_RESET seconds succeeds.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+from decouple import config
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from app.core.ratelimit import RateLimitExceeded
+
+# Retries after the first attempt, and the backoff bounds in seconds
+MODEL_RETRIES = config("MODEL_RETRIES", default=3, cast=int)
+RETRY_BASE_DELAY = config("RETRY_BASE_DELAY", default=0.5, cast=float)
+RETRY_MAX_DELAY = config("RETRY_MAX_DELAY", default=30.0, cast=float)
+# Consecutive transient failures that open a provider's circuit, and the
+# seconds it stays open before a trial call
+BREAKER_FAILURES = config("BREAKER_FAILURES", default=5, cast=int)
+BREAKER_RESET = config("BREAKER_RESET", default=30.0, cast=float)
+
+# 529 is Anthropic's "overloaded"
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+
+class CircuitOpenError(Exception):
+    """The provider failed repeatedly; calls fail fast until `retry_in` passes."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"Circuit for {provider} is open, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def _causes(exc: BaseException) -> Iterator[BaseException]:
+    """`exc` and the exceptions it was raised from, e.g. the SDK's API error."""
+    while exc is not None:
+        yield exc
+        exc = exc.__cause__
+
+
+def is_transient(exc: Exception) -> bool:
+    """True for errors that a later attempt may not hit."""
+    for error in _causes(exc):
+        if isinstance(error, ModelHTTPError):
+            return error.status_code in TRANSIENT_STATUS
+        if isinstance(error, (httpx.TransportError, TimeoutError)):
+            return True
+    return False
+
+
+def retry_after(exc: Exception) -> float | None:
+    """Seconds from the Retry-After header of the provider's response, if any."""
+    for error in _causes(exc):
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    return None
+
+
+def backoff_delay(attempt: int, after: float | None = None) -> float:
+    """Seconds before retry `attempt` (0-based): Retry-After or full jitter."""
+    if after is not None:
+        return after
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def error_status(exc: Exception) -> tuple[int, float | None]:
+    """HTTP status and Retry-After seconds to report a failed agent call with."""
+    if isinstance(exc, CircuitOpenError):
+        return 503, exc.retry_in
+    if isinstance(exc, RateLimitExceeded):
+        return 429, exc.wait
+    return 502, None
+
+
+@dataclass
+class CircuitBreaker:
+    """Closed → open after `failures` transient errors → half open → closed."""
+
+    provider: str
+    failures: int = BREAKER_FAILURES
+    reset_after: float = BREAKER_RESET
+    state: str = "closed"
+    consecutive: int = 0
+    opened_at: float = 0.0
+    opened: int = 0
+    rejected: int = 0
+    retries: int = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may go to the provider."""
+        if self.state == "closed":
+            return
+        retry_in = self.opened_at + self.reset_after - time.monotonic()
+        if self.state == "open" and retry_in <= 0:
+            # Let one trial call through, everyone else keeps failing fast
+            self.state = "half_open"
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.provider, max(retry_in, 0))
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive = 0
+
+    def record_failure(self):
+        self.consecutive += 1
+        if self.state == "half_open" or self.consecutive >= self.failures:
+            if self.state != "open":
+                print(
+                    f"🔌 Circuit for {self.provider} opened after {self.consecutive} failures"
+                )
+                self.opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """The call ended without a verdict on the provider, e.g. it was cancelled."""
+        if self.state == "half_open":
+            self.state = "open"
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retries": self.retries,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    return _breakers.setdefault(provider, CircuitBreaker(provider))
+
+
+def circuit_open(provider: str) -> bool:
+    """Whether calls to `provider` currently fail fast."""
+    breaker = _breakers.get(provider)
+    return (
+        breaker is not None
+        and breaker.state == "open"
+        and breaker.opened_at + breaker.reset_after > time.monotonic()
+    )
+
+
+def circuit_stats() -> dict:
+    """State and counters of every provider's circuit in this process."""
+    return {provider: breaker.stats() for provider, breaker in _breakers.items()}
+
+
+@dataclass(init=False)
+class ResilientModel(WrapperModel):
+    """Retry transient failures of the wrapped model behind a circuit breaker."""
+
+    breaker: CircuitBreaker
+    retries: int
+
+    def __init__(
+        self, wrapped: Model, breaker: CircuitBreaker, retries: int = MODEL_RETRIES
+    ):
+        super().__init__(wrapped)
+        self.breaker = breaker
+        self.retries = retries
+
+    @property
+    def base_url(self) -> str | None:
+        return self.wrapped.base_url
+
+    async def _failed(self, exc: Exception, attempt: int) -> bool:
+        """Record a failed attempt; True after sleeping if it should be retried."""
+        if not is_transient(exc):
+            self.breaker.release()
+            return False
+        self.breaker.record_failure()
+        delay = backoff_delay(attempt, retry_after(exc))
+        if (
+            attempt >= self.retries
+            or delay > RETRY_MAX_DELAY
+            or self.breaker.state == "open"
+        ):
+            return False
+        self.breaker.retries += 1
+        print(
+            f"🔁 {self.breaker.provider} failed ({exc!r}), "
+            f"retry {attempt + 1}/{self.retries} in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+        return True
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = await self.wrapped.request(
+                    messages, model_settings, model_request_parameters
+                )
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as exc:
+                if not await self._failed(exc, attempt):
+                    raise
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        # Only opening the stream is retried, deltas may already be published
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            async with AsyncExitStack() as stack:
+                try:
+                    response = await stack.enter_async_context(
+                        self.wrapped.request_stream(
+                            messages, model_settings, model_request_parameters
+                        )
+                    )
+                except asyncio.CancelledError:
+                    self.breaker.release()
+                    raise
+                except Exception as exc:
+                    if not await self._failed(exc, attempt):
+                        raise
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                yield response
+                return
+
+
+def resilient(model: Model, provider: str) -> Model:
+    """`model` with retries, sharing its provider's circuit breaker."""
+    return ResilientModel(model, breaker_for(provider))
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ResilientModel",
+    "resilient",
+    "is_transient",
+    "retry_after",
+    "backoff_delay",
+    "error_status",
+    "circuit_stats",
+]
@@ -0,0 +1,222 @@
+"""Hedged requests and latency-aware fallback across model providers.
+
+`HedgedModel` sends a request to the first model and, if no answer came
+within that model's usual (p95) latency, hedges with the next one; the first
+answer wins and the slower request is cancelled. Errors and timeouts fall
+through to the next model immediately. Latencies are tracked per model in a
+rolling window shared by all agents in the process.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+
+from decouple import config
+from pydantic_ai.exceptions import FallbackExceptionGroup
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.settings import ModelSettings
+
+from app.core.latency import LatencyWindow
+
+# Hedge once a request is slower than this percentile of recent calls
+HEDGE_QUANTILE = config("HEDGE_QUANTILE", default=95, cast=float)
+# Hedge delay until HEDGE_MIN_SAMPLES calls were timed, and its lower bound
+HEDGE_DEFAULT_DELAY = config("HEDGE_DEFAULT_DELAY", default=5.0, cast=float)
+HEDGE_MIN_DELAY = config("HEDGE_MIN_DELAY", default=1.0, cast=float)
+HEDGE_MIN_SAMPLES = config("HEDGE_MIN_SAMPLES", default=10, cast=int)
+# Give up on a single model call after this many seconds
+MODEL_TIMEOUT = config("MODEL_TIMEOUT", default=60.0, cast=float)
+
+_latencies: dict[str, LatencyWindow] = {}
+
+
+def model_key(model: Model) -> str:
+    return f"{model.system}:{model.model_name}"
+
+
+def model_latency(model: Model) -> LatencyWindow:
+    """The process-wide latency window of `model`."""
+    return _latencies.setdefault(model_key(model), LatencyWindow())
+
+
+@dataclass(init=False)
+class HedgedModel(Model):
+    """Race `models` in order, hedging slow calls and skipping failed ones.
+
+    Streaming requests only fall back on errors opening the stream: a stream
+    is consumed by the caller, so it cannot be raced and the loser discarded.
+    """
+
+    models: list[Model]
+    quantile: float
+    default_delay: float
+    min_delay: float
+    timeout: float
+    requests: int = field(default=0, repr=False)
+    hedged: int = field(default=0, repr=False)
+    wins: Counter = field(default_factory=Counter, repr=False)
+    failures: Counter = field(default_factory=Counter, repr=False)
+
+    def __init__(
+        self,
+        primary: Model,
+        *fallbacks: Model,
+        quantile: float = HEDGE_QUANTILE,
+        default_delay: float = HEDGE_DEFAULT_DELAY,
+        min_delay: float = HEDGE_MIN_DELAY,
+        timeout: float = MODEL_TIMEOUT,
+    ):
+        self.models = [primary, *fallbacks]
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.timeout = timeout
+        self.requests = 0
+        self.hedged = 0
+        self.wins = Counter()
+        self.failures = Counter()
+
+    @property
+    def model_name(self) -> str:
+        return f"hedged:{','.join(model_key(model) for model in self.models)}"
+
+    @property
+    def system(self) -> str:
+        return "hedged"
+
+    @property
+    def base_url(self) -> str | None:
+        return self.models[0].base_url
+
+    def hedge_delay(self, model: Model) -> float:
+        """Seconds to wait for `model` before hedging with the next one."""
+        window = model_latency(model)
+        if len(window) < HEDGE_MIN_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, window.percentile(self.quantile))
+
+    async def _call(
+        self,
+        model: Model,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        started = time.perf_counter()
+        response = await asyncio.wait_for(
+            model.request(
+                messages,
+                model_settings,
+                model.customize_request_parameters(model_request_parameters),
+            ),
+            self.timeout,
+        )
+        model_latency(model).record(time.perf_counter() - started)
+        return response
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        self.requests += 1
+        waiting = list(self.models)
+        running: dict[asyncio.Task, tuple[Model, float]] = {}
+        exceptions: list[Exception] = []
+
+        def launch() -> Model:
+            model = waiting.pop(0)
+            task = asyncio.create_task(
+                self._call(model, messages, model_settings, model_request_parameters)
+            )
+            running[task] = (model, time.perf_counter())
+            return model
+
+        latest = launch()
+        try:
+            while running:
+                delay = self.hedge_delay(latest) if waiting else None
+                done, _ = await asyncio.wait(
+                    running, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedged += 1
+                    latest = launch()
+                    continue
+                for task in done:
+                    model, _ = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as exc:
+                        print(f"⚠️ {model_key(model)} failed: {exc!r}")
+                        self.failures[model_key(model)] += 1
+                        exceptions.append(exc)
+                        continue
+                    self.wins[model_key(model)] += 1
+                    return response
+                if waiting:
+                    latest = launch()
+        finally:
+            for task, (model, started) in running.items():
+                task.cancel()
+                # The loser took at least this long; recording it keeps a
+                # provider that keeps losing from looking fast
+                model_latency(model).record(time.perf_counter() - started)
+            await asyncio.gather(*running, return_exceptions=True)
+
+        raise FallbackExceptionGroup("All models from HedgedModel failed", exceptions)
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        self.requests += 1
+        exceptions: list[Exception] = []
+        for model in self.models:
+            async with AsyncExitStack() as stack:
+                try:
+                    response = await stack.enter_async_context(
+                        model.request_stream(
+                            messages,
+                            model_settings,
+                            model.customize_request_parameters(
+                                model_request_parameters
+                            ),
+                        )
+                    )
+                except Exception as exc:
+                    print(f"⚠️ {model_key(model)} failed: {exc!r}")
+                    self.failures[model_key(model)] += 1
+                    exceptions.append(exc)
+                    continue
+                self.wins[model_key(model)] += 1
+                yield response
+                return
+
+        raise FallbackExceptionGroup("All models from HedgedModel failed", exceptions)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "models": {
+                model_key(model): {
+                    "wins": self.wins[model_key(model)],
+                    "failures": self.failures[model_key(model)],
+                    "hedge_delay_s": round(self.hedge_delay(model), 3),
+                    **model_latency(model).stats(),
+                }
+                for model in self.models
+            },
+        }
+
+
+__all__ = ["HedgedModel", "model_latency", "model_key", "MODEL_TIMEOUT"]
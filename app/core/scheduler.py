@@ -0,0 +1,121 @@
+"""Floor control: decide which agents answer a message."""
+
+import re
+import uuid
+import zlib
+
+from app.core.connections import redis_client
+
+POLICIES = ("round_robin", "addressed_first", "relevance")
+
+_WORD = re.compile(r"[a-zA-Z]{3,}")
+
+
+def _words(text: str) -> set[str]:
+    return {word.lower() for word in _WORD.findall(text)}
+
+
+def message_id(chat_message: dict) -> str:
+    """Stable id of a chat message, also for senders that do not set one."""
+    if chat_message.get("id"):
+        return chat_message["id"]
+    key = "|".join(
+        str(chat_message.get(field, "")) for field in ("sender", "timestamp", "content")
+    )
+    return f"{zlib.crc32(key.encode()):08x}"
+
+
+class TurnScheduler:
+    """Grant the turn for each message to at most `max_responders` agents.
+
+    Every agent ranks the participants with the same deterministic policy, so
+    they all agree on who speaks without talking to each other:
+
+    - ``round_robin``: the participants after the sender, in registry order
+    - ``addressed_first``: participants named in the message, then round robin
+    - ``relevance``: word overlap between the message and each system prompt
+
+    The winners then take a lease in Redis (``SET NX PX``) per message and
+    slot, so replicas of the same agent never answer the same message twice.
+    """
+
+    def __init__(
+        self,
+        agent_name: str,
+        redis_channel: str,
+        participants: dict[str, str],
+        policy: str = "addressed_first",
+        max_responders: int = 1,
+        lease_ms: int = 30000,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(
+                f"Unknown turn-taking policy {policy!r}, expected one of {POLICIES}"
+            )
+        self.agent_name = agent_name
+        self.redis_channel = redis_channel
+        self.participants = list(participants)
+        self.keywords = {name: _words(prompt) for name, prompt in participants.items()}
+        self.policy = policy
+        self.max_responders = max_responders
+        self.lease_ms = lease_ms
+        self.granted = 0
+        self.declined = 0
+        self.lost = 0
+
+    def rank(self, sender: str, content: str, msg_id: str) -> list[str]:
+        """Participants other than the sender, best candidate first."""
+        order = self._round_robin(sender, msg_id)
+        if self.policy == "addressed_first":
+            addressed = [name for name in order if self._addressed(name, content)]
+            return addressed + [name for name in order if name not in addressed]
+        if self.policy == "relevance":
+            words = _words(content)
+            # sorted() is stable, so equal scores keep round-robin order
+            return sorted(order, key=lambda name: -len(words & self.keywords[name]))
+        return order
+
+    def responders(self, sender: str, content: str, msg_id: str) -> list[str]:
+        return self.rank(sender, content, msg_id)[: self.max_responders]
+
+    async def acquire_turn(self, chat_message: dict) -> bool:
+        """True if this agent holds the floor for the message."""
+        msg_id = message_id(chat_message)
+        responders = self.responders(
+            chat_message.get("sender", ""), chat_message.get("content", ""), msg_id
+        )
+        if self.agent_name not in responders:
+            self.declined += 1
+            return False
+
+        slot = responders.index(self.agent_name)
+        lease = f"{self.redis_channel}_floor:{msg_id}:{slot}"
+        if await redis_client.set(lease, uuid.uuid4().hex, nx=True, px=self.lease_ms):
+            self.granted += 1
+            return True
+        self.lost += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "max_responders": self.max_responders,
+            "granted": self.granted,
+            "declined": self.declined,
+            "lost": self.lost,
+        }
+
+    def _round_robin(self, sender: str, msg_id: str) -> list[str]:
+        if sender in self.participants:
+            start = self.participants.index(sender) + 1
+        else:
+            start = zlib.crc32(msg_id.encode()) % max(len(self.participants), 1)
+        rotated = self.participants[start:] + self.participants[:start]
+        return [name for name in rotated if name != sender]
+
+    @staticmethod
+    def _addressed(name: str, content: str) -> bool:
+        return re.search(rf"\b{re.escape(name)}\b", content, re.IGNORECASE) is not None
+
+
+__all__ = ["TurnScheduler", "POLICIES", "message_id"]
@@ -0,0 +1,302 @@
+"""Process supervisor: restarts, replicas and load-based scaling."""
+
+import asyncio
+import errno
+import multiprocessing
+import os
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import httpx
+from decouple import config
+
+from app.core.health import PROBE_TIMEOUT, wait_until_ready
+
+RESTART_MIN_DELAY = 1.0
+RESTART_MAX_DELAY = config("SUPERVISOR_RESTART_MAX_DELAY", default=60.0, cast=float)
+# A replica that ran this long without crashing gets its backoff reset
+RESTART_STABLE_AFTER = 30.0
+SUPERVISOR_INTERVAL = 0.5
+AUTOSCALE_INTERVAL = config("AUTOSCALE_INTERVAL", default=5.0, cast=float)
+# Seconds a replica being scaled down may take to answer its queued messages
+DRAIN_TIMEOUT = config("SUPERVISOR_DRAIN_TIMEOUT", default=30.0, cast=float)
+# Set in every replica to its index within the service, 0 for the first
+REPLICA_ENV = "SUPERVISOR_REPLICA"
+
+
+def free_port() -> int:
+    """A TCP port that is free right now, picked by the OS."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def port_in_use(port: int) -> bool:
+    """Whether another process listens on `port`."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("", port))
+        except OSError as e:
+            return e.errno == errno.EADDRINUSE
+        return False
+
+
+def restart_delay(restarts: int) -> float:
+    """Exponential backoff before the next restart of a crashing replica."""
+    return min(RESTART_MIN_DELAY * 2**restarts, RESTART_MAX_DELAY)
+
+
+@dataclass
+class AutoscalePolicy:
+    """Replica bounds and the load that triggers scaling.
+
+    Scale up when the mean inbox depth per replica exceeds `inbox_depth` or
+    the worst replica's p95 agent call latency exceeds `p95_ms`. Scale down
+    once depth and latency are well below both (a quarter of the depth, half
+    the latency). `cooldown` seconds pass between two scaling steps.
+    """
+
+    min_replicas: int = 1
+    max_replicas: int = 4
+    inbox_depth: float = 5
+    p95_ms: float | None = None
+    cooldown: float = 30.0
+
+    def decide(self, replicas: int, depths: list[float], p95s: list[float]) -> int:
+        """+1, -1 or 0 replicas for the observed load."""
+        if not depths:
+            return 0
+        depth = sum(depths) / len(depths)
+        p95 = max(p95s, default=None)
+        busy = depth > self.inbox_depth or (
+            self.p95_ms is not None and p95 is not None and p95 > self.p95_ms
+        )
+        idle = depth <= self.inbox_depth / 4 and (
+            self.p95_ms is None or p95 is None or p95 < self.p95_ms / 2
+        )
+        if busy and replicas < self.max_replicas:
+            return 1
+        if idle and replicas > self.min_replicas:
+            return -1
+        return 0
+
+
+@dataclass
+class Service:
+    """A process type to keep running: `target(port)` serves on `port`."""
+
+    name: str
+    target: Callable[[int], None]
+    replicas: int = 1
+    # Fixed port for a single replica, e.g. the chat server; else picked freely
+    port: int | None = None
+    health_path: str = "/healthz"
+    # POSTed before a replica is scaled down, see AutoscalePolicy
+    drain_path: str = "/drain"
+    autoscale: AutoscalePolicy | None = None
+    last_scaled: float = 0.0
+
+
+@dataclass
+class Replica:
+    service: Service
+    port: int
+    # Kept across restarts and reused after scaling down, so a replica's
+    # Redis stream consumer name (app.core.redis.StreamConsumer) is stable
+    index: int = 0
+    process: multiprocessing.Process | None = None
+    started: float = 0.0
+    restarts: int = 0
+    restart_at: float | None = None
+    # Seconds from start until /healthz passed, None if it never did
+    ready_after: float | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.port}"
+
+
+class Supervisor:
+    """Keep every service's replicas running.
+
+    Crashed replicas are restarted on a fresh port with exponential backoff.
+    A free port can be taken by another process before the replica binds it;
+    such a replica is started again on a new port right away. Services with
+    an AutoscalePolicy are polled on ``/stats`` every AUTOSCALE_INTERVAL
+    seconds and gain or lose one replica at a time; a replica is drained
+    before it is stopped.
+    """
+
+    def __init__(self, services: list[Service]):
+        self.services = services
+        self.replicas: list[Replica] = []
+        self.restarts = 0
+        self._last_autoscale = 0.0
+
+    def start(self) -> bool:
+        """Start every replica and wait until all of them pass /healthz."""
+        for service in self.services:
+            for _ in range(service.replicas):
+                self._add_replica(service)
+        asyncio.run(self._wait_ready(self.replicas))
+        return all(replica.ready_after is not None for replica in self.replicas)
+
+    def run(self):
+        """Supervise until interrupted."""
+        while True:
+            now = time.monotonic()
+            for replica in list(self.replicas):
+                self._check(replica, now)
+            if now - self._last_autoscale >= AUTOSCALE_INTERVAL:
+                self._last_autoscale = now
+                asyncio.run(self._autoscale())
+            time.sleep(SUPERVISOR_INTERVAL)
+
+    def stop(self, timeout: float = 5.0):
+        for replica in self.replicas:
+            _terminate(replica.process, timeout)
+
+    def endpoints(self) -> dict[str, list[str]]:
+        """Service name -> base URLs of its running replicas."""
+        endpoints = {service.name: [] for service in self.services}
+        for replica in self.replicas:
+            endpoints[replica.service.name].append(replica.url)
+        return endpoints
+
+    def _add_replica(self, service: Service) -> Replica:
+        used = {r.index for r in self.replicas if r.service is service}
+        index = next(i for i in range(len(used) + 1) if i not in used)
+        replica = Replica(service, service.port or free_port(), index)
+        self.replicas.append(replica)
+        self._spawn(replica)
+        return replica
+
+    def _spawn(self, replica: Replica):
+        replica.process = multiprocessing.Process(
+            target=_run_replica,
+            args=(replica.service.target, replica.index, replica.port),
+            daemon=False,
+        )
+        replica.process.start()
+        replica.started = time.monotonic()
+        replica.restart_at = None
+
+    def _check(self, replica: Replica, now: float):
+        if replica.process.is_alive():
+            return
+        if replica.restart_at is None:
+            if replica.service.port is None and port_in_use(replica.port):
+                print(
+                    f"⚠️ Port {replica.port} of {replica.service.name} was taken, "
+                    "starting on another"
+                )
+                replica.port = free_port()
+                self._spawn(replica)
+                return
+            if now - replica.started >= RESTART_STABLE_AFTER:
+                replica.restarts = 0
+            delay = restart_delay(replica.restarts)
+            replica.restart_at = now + delay
+            print(
+                f"💥 {replica.service.name} on port {replica.port} exited "
+                f"(code {replica.process.exitcode}), restarting in {delay:.0f}s"
+            )
+        elif now >= replica.restart_at:
+            replica.restarts += 1
+            self.restarts += 1
+            if replica.service.port is None:
+                replica.port = free_port()
+            self._spawn(replica)
+            print(f"🔁 Restarted {replica.service.name} on port {replica.port}")
+
+    async def _wait_ready(self, replicas: list[Replica]):
+        by_url = {f"{r.url}{r.service.health_path}": r for r in replicas}
+        ready = await wait_until_ready(
+            {url: url for url in by_url},
+            alive=lambda url: by_url[url].process.is_alive(),
+        )
+        for url, seconds in ready.items():
+            by_url[url].ready_after = seconds
+
+    async def _autoscale(self):
+        if not any(service.autoscale for service in self.services):
+            return
+        now = time.monotonic()
+        async with httpx.AsyncClient(timeout=PROBE_TIMEOUT) as client:
+            for service in self.services:
+                policy = service.autoscale
+                if policy is None or now - service.last_scaled < policy.cooldown:
+                    continue
+                replicas = [r for r in self.replicas if r.service is service]
+                depths, p95s = await _load(client, replicas)
+                step = policy.decide(len(replicas), depths, p95s)
+                if step > 0:
+                    replica = self._add_replica(service)
+                    print(
+                        f"📈 Scaled {service.name} up to {len(replicas) + 1} ({replica.url})"
+                    )
+                elif step < 0:
+                    replica = replicas[-1]
+                    self.replicas.remove(replica)
+                    await _drain(client, replica)
+                    _terminate(replica.process)
+                    print(f"📉 Scaled {service.name} down to {len(replicas) - 1}")
+                if step:
+                    service.last_scaled = now
+
+
+async def _load(client: httpx.AsyncClient, replicas: list[Replica]):
+    """Inbox depth and p95 latency (ms) of every replica that answers /stats."""
+    depths, p95s = [], []
+    for replica in replicas:
+        try:
+            stats = (await client.get(f"{replica.url}/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            continue
+        depths.append(stats.get("inbox", {}).get("depth", 0))
+        if (p95 := stats.get("latency", {}).get("p95_ms")) is not None:
+            p95s.append(p95)
+    return depths, p95s
+
+
+async def _drain(client: httpx.AsyncClient, replica: Replica):
+    """Let a replica answer the messages in its inbox before it is stopped."""
+    try:
+        response = await client.post(
+            f"{replica.url}{replica.service.drain_path}",
+            params={"timeout": DRAIN_TIMEOUT},
+            timeout=DRAIN_TIMEOUT + PROBE_TIMEOUT,
+        )
+        drained = response.json().get("drained", False)
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"⚠️ Could not drain {replica.service.name} at {replica.url}: {e!r}")
+        return
+    if not drained:
+        print(f"⚠️ {replica.service.name} at {replica.url} stopped with messages queued")
+
+
+def _run_replica(target: Callable[[int], None], index: int, port: int):
+    os.environ[REPLICA_ENV] = str(index)
+    target(port)
+
+
+def _terminate(process: multiprocessing.Process | None, timeout: float = 5.0):
+    if process is None or not process.is_alive():
+        return
+    process.terminate()
+    process.join(timeout=timeout)
+    if process.is_alive():
+        process.kill()
+
+
+__all__ = [
+    "Supervisor",
+    "Service",
+    "AutoscalePolicy",
+    "free_port",
+    "port_in_use",
+    "restart_delay",
+]
@@ -0,0 +1,68 @@
+"""Background task helpers: supervised restarts and event-loop lag monitoring."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+RESTART_MIN_DELAY = 0.5
+RESTART_MAX_DELAY = 30.0
+
+
+async def supervise(name: str, task_factory: Callable[[], Awaitable[None]]):
+    """Run task_factory forever, restarting it with backoff when it fails.
+
+    A run that lasted longer than RESTART_MAX_DELAY resets the backoff, so a
+    task that crashes once a day restarts immediately rather than slowly.
+    """
+    delay = RESTART_MIN_DELAY
+    while True:
+        started = time.monotonic()
+        try:
+            await task_factory()
+            print(f"Task {name} exited, restarting")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Task {name} crashed: {e}, restarting in {delay}s")
+
+        if time.monotonic() - started > RESTART_MAX_DELAY:
+            delay = RESTART_MIN_DELAY
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RESTART_MAX_DELAY)
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up compared to a fixed schedule.
+
+    Lag above a few milliseconds means some coroutine is blocking the loop
+    (CPU-bound work or a busy-wait) and every WebSocket is being delayed.
+    """
+
+    def __init__(self, interval: float = 0.5, warn_threshold: float = 0.1):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.samples = 0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.samples += 1
+            if lag > self.warn_threshold:
+                print(f"⚠️ Event loop lag {lag * 1000:.1f} ms")
+
+    def stats(self) -> dict:
+        return {
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "samples": self.samples,
+        }
+
+
+__all__ = ["supervise", "LoopLagMonitor"]
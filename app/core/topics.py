@@ -0,0 +1,94 @@
+"""Registry of chat topics, so listing them never needs KEYS.
+
+A topic is a channel with a ``{channel}_history`` list. Its name goes into
+the TOPICS_KEY sorted set, scored by creation time, in the same transaction
+as the first history entry a process writes for it. Histories written before
+the registry existed are found once with an incremental SCAN and registered.
+"""
+
+import re
+import time
+from datetime import datetime
+
+import redis.asyncio as aioredis
+from decouple import config
+
+from app.core.connections import redis_client
+
+TOPICS_KEY = config("REDIS_TOPICS_KEY", default="chat_topics")
+# Set once a SCAN has registered every history written before the registry
+TOPICS_BACKFILLED_KEY = f"{TOPICS_KEY}_backfilled"
+# Keys per SCAN call: each call is short, so live traffic is served in between
+SCAN_COUNT = config("REDIS_SCAN_COUNT", default=1000, cast=int)
+HISTORY_SUFFIX = "_history"
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def register_topic(pipe, topic: str, created: float | None = None):
+    """Queue the ZADD NX that registers `topic` on a pipeline or client."""
+    return pipe.zadd(
+        TOPICS_KEY, {topic: time.time() if created is None else created}, nx=True
+    )
+
+
+def _created_from_name(topic: str) -> float:
+    """Best guess for an unregistered topic: the date in its name, or now."""
+    match = _DATE.search(topic)
+    if match:
+        try:
+            return datetime.strptime(match.group(), "%Y-%m-%d").timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+async def scan_topics(
+    client: aioredis.Redis = redis_client, pattern: str = "*chat-*"
+) -> list[str]:
+    """Topics with a history list, found with SCAN instead of KEYS."""
+    topics = set()
+    async for key in client.scan_iter(
+        match=f"{pattern}{HISTORY_SUFFIX}", count=SCAN_COUNT, _type="list"
+    ):
+        topics.add(key.removesuffix(HISTORY_SUFFIX))
+    return sorted(topics)
+
+
+async def backfill_topics(client: aioredis.Redis = redis_client) -> int:
+    """Register every history found by SCAN; returns how many were new."""
+    topics = await scan_topics(client)
+    added = 0
+    if topics:
+        async with client.pipeline(transaction=False) as pipe:
+            for topic in topics:
+                register_topic(pipe, topic, _created_from_name(topic))
+            added = sum(await pipe.execute())
+    await client.set(TOPICS_BACKFILLED_KEY, int(time.time()))
+    return added
+
+
+async def list_topics(
+    client: aioredis.Redis = redis_client,
+    since: float | None = None,
+    rescan: bool = False,
+) -> list[str]:
+    """Registered topics, oldest first, optionally only those created since `since`.
+
+    The first call (or any call with rescan) backfills the registry with SCAN.
+    """
+    if rescan or not await client.exists(TOPICS_BACKFILLED_KEY):
+        added = await backfill_topics(client)
+        print(f"🔎 Registered {added} topics found by SCAN")
+    return await client.zrangebyscore(
+        TOPICS_KEY, "-inf" if since is None else since, "+inf"
+    )
+
+
+__all__ = [
+    "TOPICS_KEY",
+    "register_topic",
+    "scan_topics",
+    "backfill_topics",
+    "list_topics",
+]
@@ -0,0 +1,190 @@
+"""End-to-end message tracing across Redis hops.
+
+Every chat message envelope carries a ``trace_id`` shared by the whole chain
+of replies it causes, and a ``parent_id``: the span that published it. Each
+process records its spans (receive, history_load, model_call, publish,
+relay) and, with TRACING on, appends them to its own file in TRACE_DIR as
+OTLP/JSON lines, the format of the OpenTelemetry collector's file exporter.
+``python -m scripts.trace_waterfall`` renders them per conversation.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from decouple import config
+
+TRACING = config("TRACING", default=False, cast=bool)
+TRACE_DIR = config("TRACE_DIR", default="traces")
+
+# The span the current task works under, e.g. an agent's receive span
+current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass
+class Span:
+    name: str
+    service: str
+    trace_id: str = field(default_factory=new_trace_id)
+    parent_id: str | None = None
+    span_id: str = field(default_factory=new_span_id)
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict = field(default_factory=dict)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            exporter.export(self)
+
+    def envelope(self) -> dict:
+        """Fields that make a message published in this span its child."""
+        return {"trace_id": self.trace_id, "parent_id": self.span_id}
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "agent-rebel"}, "spans": [span]}],
+                }
+            ]
+        }
+
+
+def start_span(
+    name: str, service: str, message: dict | None = None, **attributes
+) -> Span:
+    """A span continuing the trace of `message`, or of the current span."""
+    if message and message.get("trace_id"):
+        trace_id, parent_id = message["trace_id"], message.get("parent_id")
+        return Span(name, service, trace_id, parent_id, attributes=attributes)
+    parent = current_span.get()
+    if parent is not None:
+        return Span(
+            name, service, parent.trace_id, parent.span_id, attributes=attributes
+        )
+    return Span(name, service, attributes=attributes)
+
+
+@contextmanager
+def span(name: str, service: str, message: dict | None = None, **attributes):
+    """Record a span around the block; it is the current span inside it."""
+    current = start_span(name, service, message, **attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    finally:
+        current_span.reset(token)
+        current.end()
+
+
+class SpanExporter:
+    """Append finished spans to ``<TRACE_DIR>/<service>-<pid>.jsonl``.
+
+    One file per process, so concurrent writers never interleave lines.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR, enabled: bool = TRACING):
+        self.directory = Path(directory)
+        self.enabled = enabled
+        self.exported = 0
+        self._files: dict[str, object] = {}
+
+    def export(self, span: Span):
+        if not self.enabled:
+            return
+        file = self._files.get(span.service)
+        if file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            slug = span.service.lower().replace(" ", "-")
+            path = self.directory / f"{slug}-{os.getpid()}.jsonl"
+            file = self._files[span.service] = open(path, "a", buffering=1)
+        file.write(json.dumps(span.to_otlp()) + "\n")
+        self.exported += 1
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+
+exporter = SpanExporter()
+
+
+def _attributes(attributes: list[dict]) -> dict:
+    return {attr["key"]: attr["value"]["stringValue"] for attr in attributes}
+
+
+def load_spans(directory: str | Path = TRACE_DIR) -> list[dict]:
+    """Every exported span as a flat dict, read back from the OTLP files."""
+    spans = []
+    for path in sorted(Path(directory).glob("*.jsonl")):
+        for line in path.read_text().splitlines():
+            if not line.strip():
+                continue
+            for resource in json.loads(line)["resourceSpans"]:
+                service = _attributes(resource["resource"]["attributes"])[
+                    "service.name"
+                ]
+                for scope in resource["scopeSpans"]:
+                    spans.extend(
+                        {
+                            "trace_id": raw["traceId"],
+                            "span_id": raw["spanId"],
+                            "parent_id": raw.get("parentSpanId"),
+                            "name": raw["name"],
+                            "service": service,
+                            "start_ns": int(raw["startTimeUnixNano"]),
+                            "end_ns": int(raw["endTimeUnixNano"]),
+                            "attributes": _attributes(raw.get("attributes", [])),
+                        }
+                        for raw in scope["spans"]
+                    )
+    return spans
+
+
+__all__ = [
+    "Span",
+    "span",
+    "start_span",
+    "current_span",
+    "exporter",
+    "load_spans",
+    "new_trace_id",
+    "TRACING",
+    "TRACE_DIR",
+]
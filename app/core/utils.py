@@ -1,6 +1,7 @@
 import colorsys
 import hashlib
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
@@ -48,6 +49,7 @@ def load_agent_registry() -> dict:
         return yaml.safe_load(f)
 
 
+@lru_cache(maxsize=1024)
 def name_to_pastel_hex(name: str) -> str:
     """Generate a consistent pastel HEX color for a given name string."""
     # Hash the name and convert to an integer
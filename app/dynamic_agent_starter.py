@@ -1,17 +1,27 @@
 #!/usr/bin/env python3
 """
 Dynamic agent starter that reads from agent_registry.yml and creates
-FastAPI apps for each active agent, starting uvicorn on sequential ports.
+FastAPI apps for each active agent, starting uvicorn on free ports under a
+supervisor that restarts crashed agents.
 """
 
+import argparse
 import multiprocessing
 
-from app.core.registry import start_all_agents
+from app.core.registry import AGENT_HOST_MODE, HOST_MODES, start_all_agents
 
 
 def main():
     """Main function to start all active agents."""
-    start_all_agents()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--mode",
+        choices=HOST_MODES,
+        default=AGENT_HOST_MODE,
+        help="one process per agent, or all agents in one host process",
+    )
+    args = parser.parse_args()
+    start_all_agents(mode=args.mode)
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Benchmarks for the agent message loop."""
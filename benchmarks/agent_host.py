@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Memory and startup time: one process per agent versus one agent host.
+
+For each agent count the script starts fresh interpreters that build the
+agents, run their lifespans (Redis subscription included) and report their
+peak RSS once ready. Process mode spawns one interpreter per agent, up to
+``--max-processes``; larger counts are extrapolated from the measured
+per-process cost and marked with "~". Needs a local Redis.
+
+Run with ``python -m benchmarks.agent_host [counts...]``.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+def _configs(count: int) -> list[dict]:
+    return [
+        {"name": f"Bench{i}", "system_prompt": f"You are Bench{i}."}
+        for i in range(count)
+    ]
+
+
+async def _child(mode: str, count: int):
+    """Build `count` agents in this process and report once they are running."""
+    if mode == "host":
+        from app.core.host import create_host_app
+
+        app = create_host_app(_configs(count))
+    else:
+        from app.agents.agent import FastAgent
+
+        app = FastAgent(a2a=_configs(count)[0]).app
+
+    async with app.router.lifespan_context(app):
+        await asyncio.sleep(0.2)  # let the listeners subscribe
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps({"rss_mb": rss_mb}), flush=True)
+        sys.stdin.read()
+
+
+def _start(mode: str, count: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.agent_host", "--child", mode, str(count)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+
+def _measure(mode: str, processes: int, agents_per_process: int) -> tuple[float, float]:
+    """Wall time until every process is ready, and their summed RSS in MB."""
+    start = time.perf_counter()
+    children = [_start(mode, agents_per_process) for _ in range(processes)]
+    rss = 0.0
+    try:
+        for child in children:
+            # Skip the agents' own startup logging
+            for line in child.stdout:
+                if line.startswith('{"rss_mb"'):
+                    rss += json.loads(line)["rss_mb"]
+                    break
+            else:
+                raise RuntimeError(f"{mode} child exited before it was ready")
+        return time.perf_counter() - start, rss
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+
+
+def main(counts: list[int], max_processes: int):
+    print(f"{'agents':>7} {'mode':>8} {'startup s':>10} {'RSS MB':>9} {'MB/agent':>9}")
+    for count in counts:
+        seconds, rss = _measure("host", 1, count)
+        print(
+            f"{count:>7} {'host':>8} {seconds:>10.2f} {rss:>9.0f} {rss / count:>9.1f}"
+        )
+
+        measured = min(count, max_processes)
+        seconds, rss = _measure("process", measured, 1)
+        marker = " "
+        if measured < count:
+            # Processes share nothing, so memory scales linearly; startup on
+            # this machine is bound by CPU, so it scales with count as well.
+            seconds, rss, marker = (
+                seconds * count / measured,
+                rss * count / measured,
+                "~",
+            )
+        print(
+            f"{count:>7} {'process':>8} {marker}{seconds:>9.2f} {marker}{rss:>8.0f} {rss / count:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("counts", nargs="*", type=int, default=[5, 50, 500])
+    parser.add_argument("--max-processes", type=int, default=5)
+    parser.add_argument(
+        "--child", nargs=2, metavar=("MODE", "COUNT"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(_child(args.child[0], int(args.child[1])))
+    else:
+        main(args.counts, args.max_processes)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Redis memory and decode time per history entry for each storage codec.
+
+Encodes realistic entries with every codec whose packages are installed,
+stores them in a scratch list to read Redis' MEMORY USAGE, and times the
+decode paths of get_message_history (parse_history_entry) and of the export
+(load_entry). Run with ``python -m benchmarks.history_codec [entries]``.
+"""
+
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+import uuid
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from app.core.codec import HistoryCodec, load_entry
+from app.core.connections import close_connections, redis_binary
+from app.core.history import parse_history_entry
+
+ENTRY_WORDS = 60
+
+
+def _codecs() -> list[HistoryCodec]:
+    serializers = ["json", "orjson"]
+    if importlib.util.find_spec("msgpack"):
+        serializers.append("msgpack")
+    codecs = [HistoryCodec(serializer) for serializer in serializers]
+    if importlib.util.find_spec("zstandard"):
+        codecs += [HistoryCodec(serializer, "zstd") for serializer in serializers[1:]]
+    return codecs
+
+
+async def _entries(count: int) -> list[list[dict]]:
+    agent = Agent(TestModel(custom_output_text="word " * ENTRY_WORDS))
+    entries = []
+    for i in range(count):
+        result = await agent.run(f"Ada: message {i} " + "lorem ipsum " * ENTRY_WORDS)
+        messages = json.loads(result.new_messages_json())
+        messages[-1]["agent_sender"] = "Bench"
+        entries.append(messages)
+    return entries
+
+
+def _per_entry_us(func, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+async def _redis_bytes(stored: list) -> float:
+    key = f"bench-codec-{uuid.uuid4().hex[:8]}"
+    await redis_binary.rpush(key, *stored)
+    usage = await redis_binary.memory_usage(key, samples=0)
+    await redis_binary.delete(key)
+    return usage / len(stored)
+
+
+async def main(count: int):
+    entries = await _entries(count)
+    print(f"{count} entries, {ENTRY_WORDS}-word prompt and reply each")
+    print(
+        f"{'codec':<14} {'bytes':>7} {'redis':>7} {'encode us':>10} {'parse us':>9} {'load us':>8}"
+    )
+    for codec in _codecs():
+        stored = [codec.encode(messages) for messages in entries]
+        encode = _per_entry_us(codec.encode, entries)
+        parse = _per_entry_us(parse_history_entry, stored)
+        load = _per_entry_us(load_entry, stored)
+        size = sum(len(raw) for raw in stored) / count
+        redis_size = await _redis_bytes(stored)
+        print(
+            f"{codec.name:<14} {size:>7.0f} {redis_size:>7.0f} {encode:>10.1f} "
+            f"{parse:>9.1f} {load:>8.1f}"
+        )
+    await close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Cost of get_message_history per LLM call: Redis + parse versus the cache.
+
+Fills a history list with realistic entries and times both paths against a
+local Redis. Run with ``python -m benchmarks.history_load [calls]``.
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from app.core.redis import RedisHandler, redis_client
+
+ENTRY_WORDS = 60
+
+
+async def _fill_history(handler: RedisHandler, entries: int):
+    agent = Agent(TestModel(custom_output_text="word " * ENTRY_WORDS))
+    for i in range(entries):
+        result = await agent.run(f"Ada: message {i} " + "lorem ipsum " * ENTRY_WORDS)
+        await handler._store_message_history(result)
+
+
+async def _time_calls(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def main(calls: int):
+    channel = f"bench-history-{uuid.uuid4().hex[:8]}"
+    handler = RedisHandler("Bench", channel, f"{channel}_history")
+    await _fill_history(handler, 20)
+
+    async def uncached():
+        handler.history_cache.invalidate()
+        await handler.get_message_history()
+
+    before = await _time_calls(uncached, calls)
+    await handler.get_message_history()
+    after = await _time_calls(handler.get_message_history, calls)
+
+    await redis_client.delete(handler.redis_history, handler.redis_history_seq)
+    print(f"calls: {calls}, window: {handler.history_cache.window} entries")
+    print(f"LRANGE + validate_json: {before:9.1f} us/call")
+    print(f"warm cache:             {after:9.1f} us/call")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
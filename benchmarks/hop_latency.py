@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Measure publish -> receive latency of one agent hop over a local Redis.
+
+Run with ``python -m benchmarks.hop_latency [count]`` while redis-server is up.
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+
+from app.core.redis import redis_client, subscribe
+
+
+async def measure_hops(count: int = 200) -> list[float]:
+    """Publish `count` messages and return the per-hop latency in milliseconds."""
+    channel = f"bench-hop-{uuid.uuid4().hex[:8]}"
+    listener = subscribe(channel)
+    latencies: list[float] = []
+
+    # Prime the subscription so the first measured hop excludes SUBSCRIBE setup
+    receiver = asyncio.ensure_future(anext(listener))
+    while not receiver.done():
+        await redis_client.publish(channel, json.dumps({"warmup": True}))
+        await asyncio.sleep(0.01)
+    await receiver
+
+    for i in range(count):
+        start = time.perf_counter()
+        await redis_client.publish(channel, json.dumps({"seq": i}))
+        while json.loads((await anext(listener))["data"]).get("seq") != i:
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    await listener.aclose()
+    return latencies
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latencies = asyncio.run(measure_hops(count))
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"hops: {count}")
+    print(f"p50:  {quantiles[49]:.3f} ms")
+    print(f"p95:  {quantiles[94]:.3f} ms")
+    print(f"max:  {max(latencies):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
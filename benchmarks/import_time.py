@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Import cost of the agent process and of the test suite.
+
+Runs ``python -X importtime`` in fresh interpreters and reports the
+cumulative time of each scenario's top-level imports (median of `runs`).
+Run with ``python -m benchmarks.import_time [runs]`` from the repository
+root; point it at another checkout by running it from there.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Dummy keys so older checkouts that read them at import can be compared
+ENV = {**os.environ, "ANTHROPIC_API_KEY": "x", "OPENROUTER_API_KEY": "x"}
+
+_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+
+def _test_modules() -> list[str]:
+    return sorted(f"tests.{path.stem}" for path in Path("tests").glob("test_*.py"))
+
+
+SCENARIOS = {
+    "agent module": "import app.agents.agent",
+    "agent process": (
+        "import app.agents.agent, app.core.registry; "
+        "from app.agents.agent import FastAgent; "
+        "FastAgent({'name': 'Bench', 'system_prompt': 'x'})"
+    ),
+    "chat server": "import app.chat_server",
+    "utils (prompt helpers)": "import app.core.utils",
+    "test modules": "; ".join(f"import {module}" for module in _test_modules()),
+}
+
+
+def _cumulative_ms(statement: str) -> float:
+    """Sum of cumulative times of the top-level imports, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=ENV,
+        check=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        # Top-level imports are not indented
+        if match and not match.group(2).startswith(" "):
+            total += int(match.group(1))
+    return total / 1000
+
+
+def main(runs: int):
+    print(f"{'scenario':<24} {'import ms':>10}")
+    for name, statement in SCENARIOS.items():
+        median = statistics.median(_cumulative_ms(statement) for _ in range(runs))
+        print(f"{name:<24} {median:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""Offline end-to-end benchmark suite for the agent mesh.
+
+Drives the real message loop with pydantic-ai TestModel/FunctionModel in place
+of an LLM, so it needs no API keys and no network:
+
+- ``message_loop``: publish a chat message, the agent receives, calls the
+  model, stores history and publishes; timed until the reply arrives
+- ``chat``: concurrent POST /chat requests against a FastAgent app
+- ``ws_fanout``: Broadcaster fan-out to many WebSocket clients
+- ``history_load``: get_message_history from Redis and from the warm cache
+
+Each scenario reports throughput, p50/p95/p99 latency and the peak RSS. The
+results are written as JSON, named after the current commit, so two commits
+can be compared with ``--compare``. Uses REDIS_URL if a server answers there,
+otherwise a throwaway ``redis-server`` on a free port.
+
+Run with ``python -m benchmarks.suite [--quick] [--compare old.json]``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path("benchmarks/results")
+
+# Sizes of the full run; --quick divides them by ten
+SIZES = {
+    "messages": 300,
+    "requests": 2000,
+    "concurrency": 20,
+    "clients": 500,
+    "frames": 100,
+}
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and nearest-rank percentiles of latencies in seconds."""
+    ordered = sorted(latencies)
+
+    def ms(q):
+        if not ordered:
+            return None
+        return round(ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1] * 1000, 3)
+
+    return {
+        "ops": len(ordered),
+        "seconds": round(elapsed, 3),
+        "throughput_per_s": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(50),
+        "p95_ms": ms(95),
+        "p99_ms": ms(99),
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def _redis_answers(url: str) -> bool:
+    import redis
+
+    try:
+        return redis.Redis.from_url(url, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+def _redis_server_binary() -> str | None:
+    try:
+        import redislite
+
+        return redislite.__redis_executable__
+    except ImportError:
+        return shutil.which("redis-server")
+
+
+@contextmanager
+def local_redis():
+    """REDIS_URL if it answers, else a throwaway redis-server; yields the URL."""
+    url = os.environ.get("REDIS_URL", "redis://localhost:6379")
+    if _redis_answers(url):
+        yield url
+        return
+    binary = _redis_server_binary()
+    if binary is None:
+        sys.exit(f"No Redis at {url} and no redis-server binary to start one")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [binary, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 10
+        while not _redis_answers(url):
+            if time.monotonic() > deadline:
+                sys.exit(f"redis-server did not start on port {port}")
+            time.sleep(0.05)
+        print(f"Started redis-server on port {port}")
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _bench_model(llm_delay: float):
+    """TestModel, or a FunctionModel that takes `llm_delay` seconds per call."""
+    from pydantic_ai.messages import ModelResponse, TextPart
+    from pydantic_ai.models.function import FunctionModel
+    from pydantic_ai.models.test import TestModel
+
+    if not llm_delay:
+        return TestModel(custom_output_text="pong " * 20)
+
+    async def reply(_messages, _info):
+        await asyncio.sleep(llm_delay)
+        return ModelResponse(parts=[TextPart("pong " * 20)])
+
+    return FunctionModel(reply, model_name="bench")
+
+
+def _bench_agent(channel: str, llm_delay: float):
+    from pydantic_ai import Agent
+
+    from app.agents.agent import FastAgent
+
+    config = {"name": "Bench", "system_prompt": "You are Bench.", "model": "test"}
+    agent = FastAgent(config, redis_channel=channel)
+    agent.agent = Agent(_bench_model(llm_delay), system_prompt=agent.system_prompt)
+    return agent
+
+
+async def _cleanup(channel: str):
+    from app.core.connections import redis_client
+
+    history = f"{channel}_history"
+    await redis_client.delete(history, f"{history}_seq", f"{history}_summary")
+
+
+async def bench_message_loop(messages: int, llm_delay: float) -> dict:
+    """Publish -> agent receive, model call, history write, publish -> reply."""
+    from app.core.redis import publish_message, subscribe
+
+    channel = f"bench-loop-{uuid.uuid4().hex[:8]}"
+    agent = _bench_agent(channel, llm_delay)
+    listener = subscribe(channel)
+    latencies = []
+    async with agent.app.router.lifespan_context(agent.app):
+        await asyncio.wait_for(agent.redis_handler.listening.wait(), 10)
+        # Prime our own subscription before timing
+        primed = asyncio.ensure_future(anext(listener))
+        while not primed.done():
+            await publish_message(channel, {"type": "warmup", "sender": "Bench"})
+            await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        for i in range(messages):
+            sent = time.perf_counter()
+            await publish_message(
+                channel,
+                {
+                    "type": "message",
+                    "sender": "Driver",
+                    "content": f"ping {i}",
+                    "role": "user",
+                },
+            )
+            while True:
+                reply = json.loads((await anext(listener))["data"])
+                if reply.get("sender") == "Bench" and reply.get("type") == "message":
+                    break
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - started
+    await listener.aclose()
+    await _cleanup(channel)
+    return summarize(latencies, elapsed)
+
+
+async def bench_chat(requests: int, concurrency: int, llm_delay: float) -> dict:
+    """POST /chat through the ASGI app with `concurrency` clients."""
+    import httpx
+
+    channel = f"bench-chat-{uuid.uuid4().hex[:8]}"
+    agent = _bench_agent(channel, llm_delay)
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient):
+        for i in remaining:
+            sent = time.perf_counter()
+            response = await client.post("/chat", json={"message": f"ping {i}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - sent)
+
+    transport = httpx.ASGITransport(app=agent.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    await _cleanup(channel)
+    return summarize(latencies, elapsed)
+
+
+async def bench_ws_fanout(clients: int, frames: int) -> dict:
+    """Broadcast `frames` messages to `clients` WebSockets; latency per delivery."""
+    from app.core.broadcast import Broadcaster
+    from app.core.models import ChatMessage
+    from benchmarks.ws_fanout import FakeWebSocket, _payload
+
+    sockets = [FakeWebSocket() for _ in range(clients)]
+    broadcaster = Broadcaster(queue_size=frames)
+    for ws in sockets:
+        broadcaster.connect(ws)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(frames):
+        sent = time.perf_counter()
+        broadcaster.broadcast(ChatMessage(**_payload(i)).model_dump())
+        while any(len(ws.received) <= i for ws in sockets):
+            await asyncio.sleep(0)
+        latencies.extend(ws.received[i] - sent for ws in sockets)
+    elapsed = time.perf_counter() - started
+    await broadcaster.aclose()
+    return summarize(latencies, elapsed)
+
+
+async def bench_history_load(calls: int) -> dict:
+    """get_message_history: LRANGE + parse of a full window, and the warm cache."""
+    from app.core.redis import RedisHandler
+    from benchmarks.history_load import _fill_history
+
+    channel = f"bench-history-{uuid.uuid4().hex[:8]}"
+    handler = RedisHandler("Bench", channel, f"{channel}_history")
+    await _fill_history(handler, 20)
+
+    results = {}
+    for name, invalidate in (("uncached", True), ("cached", False)):
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(calls):
+            if invalidate:
+                handler.history_cache.invalidate()
+            sent = time.perf_counter()
+            await handler.get_message_history()
+            latencies.append(time.perf_counter() - sent)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+    await _cleanup(channel)
+    return results
+
+
+async def run_suite(
+    sizes: dict, llm_delay: float, only: list[str] | None = None
+) -> dict:
+    scenarios = {
+        "message_loop": lambda: bench_message_loop(sizes["messages"], llm_delay),
+        "chat": lambda: bench_chat(sizes["requests"], sizes["concurrency"], llm_delay),
+        "ws_fanout": lambda: bench_ws_fanout(sizes["clients"], sizes["frames"]),
+        "history_load": lambda: bench_history_load(sizes["messages"]),
+    }
+    results = {}
+    for name, scenario in scenarios.items():
+        if only and name not in only:
+            continue
+        print(f"Running {name}...", flush=True)
+        # Keep the agents' per-message logging out of the report
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            results[name] = await scenario()
+    from app.core.connections import close_connections
+
+    await close_connections()
+    return results
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _rows(scenarios: dict, prefix: str = ""):
+    """(name, summary) for every summary, nested ones as "parent.child"."""
+    for name, value in scenarios.items():
+        if "p50_ms" in value:
+            yield prefix + name, value
+        else:
+            yield from _rows(value, f"{prefix}{name}.")
+
+
+def print_results(results: dict, baseline: dict | None = None):
+    header = f"{'scenario':<22} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header + ("   vs baseline p95, ops/s" if baseline else ""))
+    old = dict(_rows(baseline["scenarios"])) if baseline else {}
+    for name, row in _rows(results["scenarios"]):
+        line = (
+            f"{name:<22} {row['throughput_per_s']:>10} {row['p50_ms']:>9} "
+            f"{row['p95_ms']:>9} {row['p99_ms']:>9}"
+        )
+        if name in old and old[name]["p95_ms"] and old[name]["throughput_per_s"]:
+            p95 = (row["p95_ms"] / old[name]["p95_ms"] - 1) * 100
+            ops = (row["throughput_per_s"] / old[name]["throughput_per_s"] - 1) * 100
+            line += f"   {p95:+6.1f}%  {ops:+6.1f}%"
+        print(line)
+    print(
+        f"peak RSS: {max(row['peak_rss_mb'] for _, row in _rows(results['scenarios']))} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--quick", action="store_true", help="a tenth of the default sizes"
+    )
+    parser.add_argument(
+        "--llm-delay", type=float, default=0.0, help="seconds per model call"
+    )
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument(
+        "--output", type=Path, help="results file, default results/<commit>.json"
+    )
+    parser.add_argument(
+        "--compare", type=Path, help="earlier results file to compare with"
+    )
+    args = parser.parse_args()
+
+    sizes = {k: max(1, v // 10) if args.quick else v for k, v in SIZES.items()}
+    with local_redis() as url:
+        # Settings are read at import time, so point the app at the server first
+        os.environ["REDIS_URL"] = url
+        os.environ.setdefault("REDIS_TRANSPORT", "pubsub")
+        scenarios = asyncio.run(run_suite(sizes, args.llm_delay, args.only))
+
+    commit = _commit()
+    results = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "llm_delay": args.llm_delay,
+        "scenarios": scenarios,
+    }
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print()
+    print_results(results, baseline)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
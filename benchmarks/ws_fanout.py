@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare sequential WebSocket relay with the queued Broadcaster.
+
+Uses fake WebSocket clients, one of which is slow, and reports how long the
+fast clients wait for each message. Run with
+``python -m benchmarks.ws_fanout [clients] [messages]``.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from app.core.broadcast import Broadcaster
+from app.core.models import ChatMessage
+
+SLOW_SEND_DELAY = 0.02
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received: list[float] = []
+
+    async def send_text(self, _text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(time.perf_counter())
+
+    async def send_json(self, data: dict):
+        await self.send_text(str(data))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def _payload(i: int) -> dict:
+    return {
+        "type": "message",
+        "content": f"message {i}",
+        "sender": "Ada",
+        "role": "user",
+    }
+
+
+async def run_sequential(clients: list[FakeWebSocket], messages: int) -> list[float]:
+    """The old relay loop: build a ChatMessage and await each send in turn."""
+    waits = []
+    for i in range(messages):
+        start = time.perf_counter()
+        for connection in clients:
+            msg = ChatMessage(**_payload(i))
+            await connection.send_json(msg.model_dump())
+        waits.extend(ws.received[-1] - start for ws in clients if not ws.delay)
+    return waits
+
+
+async def run_broadcaster(clients: list[FakeWebSocket], messages: int) -> list[float]:
+    broadcaster = Broadcaster(queue_size=messages)
+    for ws in clients:
+        broadcaster.connect(ws)
+    fast = [ws for ws in clients if not ws.delay]
+
+    waits = []
+    for i in range(messages):
+        start = time.perf_counter()
+        broadcaster.broadcast(ChatMessage(**_payload(i)).model_dump())
+        while any(len(ws.received) <= i for ws in fast):
+            await asyncio.sleep(0)
+        waits.extend(ws.received[i] - start for ws in fast)
+
+    await broadcaster.aclose()
+    return waits
+
+
+def _report(name: str, waits: list[float], elapsed: float):
+    quantiles = statistics.quantiles(waits, n=100)
+    print(
+        f"{name:<12} total {elapsed * 1000:9.1f} ms   "
+        f"fast-client p50 {quantiles[49] * 1000:8.3f} ms   "
+        f"p99 {quantiles[98] * 1000:8.3f} ms"
+    )
+
+
+async def main(client_count: int, messages: int):
+    print(
+        f"{client_count} clients (1 slow, {SLOW_SEND_DELAY * 1000:.0f} ms/send), {messages} messages"
+    )
+    for name, runner in (
+        ("sequential", run_sequential),
+        ("broadcaster", run_broadcaster),
+    ):
+        clients = [FakeWebSocket(SLOW_SEND_DELAY)] + [
+            FakeWebSocket() for _ in range(client_count - 1)
+        ]
+        start = time.perf_counter()
+        waits = await runner(clients, messages)
+        _report(name, waits, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    client_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(client_count, messages))
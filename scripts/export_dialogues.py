@@ -1,29 +1,78 @@
 #!/usr/bin/env python3
-"""Simple export script to replace the deleted helpers/export_dialogues.py"""
+"""Export Redis chat topics to Markdown, JSONL or Parquet files.
 
-import asyncio
-from pathlib import Path
-
-from app.core.redis_export import export_topic_to_markdown, list_chat_topics
+python -m scripts.export_dialogues                    # every topic to markdown
+python -m scripts.export_dialogues --format jsonl --resume
+"""
 
+import argparse
+import asyncio
+import time
 
-async def export_all_dialogues():
-    """Export all Redis chat topics to markdown files."""
-    topics = await list_chat_topics()
-    export_dir = Path("agent-dialogues")
-    export_dir.mkdir(exist_ok=True)
+from app.core.connections import close_connections
+from app.core.export import EXPORT_CONCURRENCY, EXPORT_FORMATS, export_topics
+from app.core.redis_export import EXPORT_PAGE_SIZE, list_chat_topics
 
-    for topic in topics:
-        markdown_content = await export_topic_to_markdown(topic)
-        file_path = export_dir / f"{topic}.md"
 
-        with open(file_path, "w") as f:
-            f.write(markdown_content)
+async def export_all_dialogues(
+    output: str = "agent-dialogues",
+    fmt: str = "markdown",
+    concurrency: int = EXPORT_CONCURRENCY,
+    page_size: int = EXPORT_PAGE_SIZE,
+    resume: bool = False,
+    rescan: bool = False,
+):
+    """Export all Redis chat topics to files in `output`."""
+    started = time.perf_counter()
+    try:
+        topics = await list_chat_topics(rescan=rescan)
+        written = await export_topics(
+            topics, output, fmt, concurrency, resume, page_size
+        )
+        print(
+            f"Exported {sum(written.values())} messages of {len(written)}/{len(topics)} "
+            f"topics to {output} in {time.perf_counter() - started:.1f}s"
+        )
+    finally:
+        await close_connections()
 
-        print(f"Exported {topic} to {file_path}")
 
-    print(f"Exported {len(topics)} topics to {export_dir}")
+def main():
+    parser = argparse.ArgumentParser(description="Export Redis chat topics")
+    parser.add_argument("--output", default="agent-dialogues", help="output directory")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="markdown")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=EXPORT_CONCURRENCY,
+        help="topics exported at once",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=EXPORT_PAGE_SIZE,
+        help="history entries per read",
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="continue from the last checkpoint"
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="SCAN for histories missing from the topic registry",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        export_all_dialogues(
+            args.output,
+            args.format,
+            args.concurrency,
+            args.page_size,
+            args.resume,
+            args.rescan,
+        )
+    )
 
 
 if __name__ == "__main__":
-    asyncio.run(export_all_dialogues())
+    main()
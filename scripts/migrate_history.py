@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Re-encode stored history entries with the configured HISTORY_CODEC.
+
+Readers understand every codec, so this can run while agents are writing:
+each entry is replaced only if it still holds the value that was read, in
+small batches so no script blocks Redis for long.
+
+    python -m scripts.migrate_history --dry-run         # sizes before and after
+    python -m scripts.migrate_history                   # migrate every topic
+    python -m scripts.migrate_history --train-dict history.zdict
+"""
+
+import argparse
+import asyncio
+
+from app.core.codec import HistoryCodec, codec, load_entry, train_dictionary
+from app.core.connections import close_connections, redis_client
+from app.core.redis import read_history
+from app.core.topics import list_topics
+
+# Replace entries by position (see app.core.redis.read_history) if unchanged:
+# ARGV[1] is the position of the first entry, then old and new value pairs
+_REWRITE = """
+local length = redis.call('LLEN', KEYS[1])
+local head = tonumber(redis.call('GET', KEYS[2]) or length)
+local first = tonumber(ARGV[1]) - (head - length)
+local changed = 0
+for i = 2, #ARGV, 2 do
+  local index = first + (i - 2) / 2
+  if index >= 0 and index < length and redis.call('LINDEX', KEYS[1], index) == ARGV[i] then
+    redis.call('LSET', KEYS[1], index, ARGV[i + 1])
+    changed = changed + 1
+  end
+end
+return changed
+"""
+_rewrite = redis_client.register_script(_REWRITE)
+
+
+def _bytes(value: str | bytes) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+async def migrate_topic(
+    topic: str, target: HistoryCodec = codec, batch: int = 100, dry_run: bool = False
+) -> dict:
+    """Re-encode one topic's history; returns entries and bytes before and after."""
+    history = f"{topic}_history"
+    stats = {"entries": 0, "changed": 0, "bytes_before": 0, "bytes_after": 0}
+    start = 0
+    while True:
+        first, entries = await read_history(history, start, batch)
+        pairs = []
+        for raw in entries:
+            encoded = _bytes(target.encode(load_entry(raw)))
+            stats["bytes_before"] += len(raw)
+            stats["bytes_after"] += len(encoded)
+            if encoded != raw:
+                pairs.extend((raw, encoded))
+        stats["entries"] += len(entries)
+        if pairs and not dry_run:
+            stats["changed"] += await _rewrite(
+                keys=[history, f"{history}_seq"],
+                args=[first, *pairs],
+                client=redis_client,
+            )
+        if len(entries) < batch:
+            return stats
+        start = first + len(entries)
+
+
+async def train(path: str, target: HistoryCodec = codec, samples: int = 5000):
+    """Write a zstd dictionary trained on up to `samples` recent entries."""
+    data = []
+    for topic in reversed(await list_topics()):
+        history = f"{topic}_history"
+        length = await redis_client.llen(history)
+        head, _ = await read_history(history, 0, 0)
+        _, entries = await read_history(
+            history, head + max(length - samples, 0), samples
+        )
+        data.extend(_bytes(target.serialize(load_entry(raw))) for raw in entries)
+        samples -= len(entries)
+        if samples <= 0:
+            break
+    with open(path, "wb") as file:
+        file.write(train_dictionary(data))
+    print(
+        f"Trained a zstd dictionary on {len(data)} entries, set HISTORY_ZSTD_DICT={path}"
+    )
+
+
+async def migrate(dry_run: bool = False, batch: int = 100):
+    totals = {"entries": 0, "changed": 0, "bytes_before": 0, "bytes_after": 0}
+    for topic in await list_topics():
+        stats = await migrate_topic(topic, batch=batch, dry_run=dry_run)
+        for key, value in stats.items():
+            totals[key] += value
+        print(f"{topic}: {stats['changed']}/{stats['entries']} entries re-encoded")
+    saved = totals["bytes_before"] - totals["bytes_after"]
+    print(
+        f"{'Would re-encode' if dry_run else 'Re-encoded'} {totals['entries']} entries as "
+        f"{codec.name}: {totals['bytes_before'] / 1e6:.1f} MB -> "
+        f"{totals['bytes_after'] / 1e6:.1f} MB ({saved / max(totals['bytes_before'], 1):.0%} saved)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-encode history with HISTORY_CODEC")
+    parser.add_argument("--dry-run", action="store_true", help="only report the sizes")
+    parser.add_argument(
+        "--batch", type=int, default=100, help="entries replaced per script"
+    )
+    parser.add_argument(
+        "--train-dict", metavar="PATH", help="train a zstd dictionary instead"
+    )
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            if args.train_dict:
+                await train(args.train_dict)
+            else:
+                await migrate(args.dry_run, args.batch)
+        finally:
+            await close_connections()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
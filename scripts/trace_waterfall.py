@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Waterfall view of a conversation's spans, to find the slow hop.
+
+Reads the OTLP/JSON span files written with TRACING=True (app.core.tracing)
+and prints one trace as an indented tree with a time bar per span, followed
+by the spans with the most time of their own and the slowest Redis hops.
+
+    python -m scripts.trace_waterfall            # list traces, show the newest
+    python -m scripts.trace_waterfall <trace_id> # show one trace
+"""
+
+import argparse
+from collections import defaultdict
+
+from app.core.tracing import TRACE_DIR, load_spans
+
+BAR_WIDTH = 40
+
+
+def _ms(ns: int) -> float:
+    return ns / 1e6
+
+
+def list_traces(spans: list[dict]) -> list[dict]:
+    """One summary per trace, newest first."""
+    traces = defaultdict(list)
+    for span in spans:
+        traces[span["trace_id"]].append(span)
+    summaries = []
+    for trace_id, members in traces.items():
+        start = min(span["start_ns"] for span in members)
+        end = max(span["end_ns"] for span in members)
+        services = {span["service"] for span in members}
+        summaries.append(
+            {
+                "trace_id": trace_id,
+                "start_ns": start,
+                "duration_ms": _ms(end - start),
+                "spans": len(members),
+                "services": len(services),
+            }
+        )
+    return sorted(summaries, key=lambda trace: trace["start_ns"], reverse=True)
+
+
+def _tree(members: list[dict]) -> list[tuple[int, dict]]:
+    """Spans depth first, children by start time, with their depth."""
+    ids = {span["span_id"] for span in members}
+    children = defaultdict(list)
+    for span in members:
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children[parent].append(span)
+
+    ordered = []
+
+    def visit(parent, depth):
+        for span in sorted(children[parent], key=lambda span: span["start_ns"]):
+            ordered.append((depth, span))
+            visit(span["span_id"], depth + 1)
+
+    visit(None, 0)
+    return ordered
+
+
+def self_times(members: list[dict]) -> dict[str, float]:
+    """Milliseconds each span spent outside its children in the same service."""
+    own = {span["span_id"]: span["end_ns"] - span["start_ns"] for span in members}
+    by_id = {span["span_id"]: span for span in members}
+    for span in members:
+        parent = by_id.get(span["parent_id"])
+        if parent and parent["service"] == span["service"]:
+            own[parent["span_id"]] -= span["end_ns"] - span["start_ns"]
+    return {span_id: _ms(max(ns, 0)) for span_id, ns in own.items()}
+
+
+def hops(members: list[dict]) -> list[tuple[float, dict, dict]]:
+    """(ms, parent, child) for every message passed between services."""
+    by_id = {span["span_id"]: span for span in members}
+    result = []
+    for span in members:
+        parent = by_id.get(span["parent_id"])
+        if parent and parent["service"] != span["service"]:
+            result.append((_ms(span["start_ns"] - parent["end_ns"]), parent, span))
+    return sorted(result, key=lambda hop: hop[0], reverse=True)
+
+
+def render(spans: list[dict], trace_id: str) -> str:
+    members = [span for span in spans if span["trace_id"] == trace_id]
+    if not members:
+        return f"No spans for trace {trace_id}"
+    start = min(span["start_ns"] for span in members)
+    total = max(span["end_ns"] for span in members) - start or 1
+
+    lines = [f"Trace {trace_id}: {_ms(total):.1f} ms, {len(members)} spans", ""]
+    lines.append(f"{'start ms':>9} {'ms':>8}  {'service':<16} {'span':<24} timeline")
+    for depth, span in _tree(members):
+        offset = span["start_ns"] - start
+        duration = span["end_ns"] - span["start_ns"]
+        left = int(offset / total * BAR_WIDTH)
+        width = max(1, int(duration / total * BAR_WIDTH))
+        bar = " " * left + "█" * min(width, BAR_WIDTH - left)
+        label = "  " * depth + span["name"]
+        lines.append(
+            f"{_ms(offset):>9.1f} {_ms(duration):>8.1f}  {span['service'][:16]:<16} "
+            f"{label[:24]:<24} |{bar:<{BAR_WIDTH}}|"
+        )
+
+    own = self_times(members)
+    by_id = {span["span_id"]: span for span in members}
+    lines.extend(["", "Most time of their own:"])
+    for span_id in sorted(own, key=own.get, reverse=True)[:3]:
+        span = by_id[span_id]
+        lines.append(f"  {own[span_id]:>8.1f} ms  {span['service']} {span['name']}")
+    slow_hops = hops(members)
+    if slow_hops:
+        lines.extend(["", "Slowest hops between services:"])
+        for ms, parent, child in slow_hops[:3]:
+            lines.append(
+                f"  {ms:>8.1f} ms  {parent['service']} {parent['name']}"
+                f" -> {child['service']} {child['name']}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace_id", nargs="?", help="trace to show, default the newest")
+    parser.add_argument("--dir", default=TRACE_DIR, help="span files directory")
+    parser.add_argument("--limit", type=int, default=10, help="traces to list")
+    args = parser.parse_args()
+
+    spans = load_spans(args.dir)
+    traces = list_traces(spans)
+    if not traces:
+        print(f"No spans in {args.dir}/, run the agents with TRACING=True")
+        return
+    trace_id = args.trace_id
+    if trace_id is None:
+        print(f"{'trace':<34} {'ms':>9} {'spans':>6} {'services':>9}")
+        for trace in traces[: args.limit]:
+            print(
+                f"{trace['trace_id']:<34} {trace['duration_ms']:>9.1f} "
+                f"{trace['spans']:>6} {trace['services']:>9}"
+            )
+        print()
+        trace_id = traces[0]["trace_id"]
+    print(render(spans, trace_id))
+
+
+if __name__ == "__main__":
+    main()
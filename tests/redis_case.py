@@ -0,0 +1,50 @@
+"""Shared fixtures for tests that need a Redis server at REDIS_URL."""
+
+import unittest
+from unittest.mock import patch
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.connections import REDIS_URL
+
+
+def redis_available() -> bool:
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+requires_redis = unittest.skipUnless(
+    redis_available(), "needs a Redis server at REDIS_URL"
+)
+
+
+class RedisTestCase(unittest.IsolatedAsyncioTestCase):
+    """A text and a binary Redis client per test.
+
+    Pooled clients are bound to the event loop they first ran on, and every
+    test has its own loop, so the module level ``redis_client`` of each module
+    in `client_modules` (``redis_binary`` for `binary_modules`) is replaced by
+    this test's client.
+    """
+
+    client_modules: tuple[str, ...] = ()
+    binary_modules: tuple[str, ...] = ()
+
+    async def asyncSetUp(self):
+        self.client = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+        self.binary = aioredis.Redis.from_url(REDIS_URL)
+        self.addAsyncCleanup(self.client.aclose)
+        self.addAsyncCleanup(self.binary.aclose)
+        for module in self.client_modules:
+            self.patch(f"{module}.redis_client", self.client)
+        for module in self.binary_modules:
+            self.patch(f"{module}.redis_binary", self.binary)
+
+    def patch(self, target: str, value):
+        """Replace `target` with `value` until the test has ended."""
+        patcher = patch(target, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
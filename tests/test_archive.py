@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for history retention and the archive (needs a Redis server).
+Tests: 1) entries past the retention move to the archive and keep their
+positions, 2) the export reads archived and hot entries as one history,
+3) entries older than the retention hours are archived, the newest window
+never
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.archive import HistoryArchive, HistoryArchiver
+from app.core.history import HISTORY_WINDOW
+from app.core.redis import RedisHandler, read_history
+from app.core.redis_export import stream_chat_messages
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+def _entry(n: int, age: timedelta = timedelta(0)) -> str:
+    stamp = (datetime.now(timezone.utc) - age).isoformat()
+    part = {"part_kind": "text", "content": f"a{n}"}
+    return json.dumps([{"kind": "response", "timestamp": stamp, "parts": [part]}])
+
+
+@requires_redis
+class TestHistoryArchive(RedisTestCase):
+    """Tests for app.core.archive."""
+
+    client_modules = ("app.core.redis", "app.core.redis_export", "app.core.archive")
+    binary_modules = ("app.core.redis", "app.core.archive")
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryArchive(self.tmp.name)
+        self.patch("app.core.redis_export.archive", self.store)
+        self.topic = f"test-chat-{uuid.uuid4().hex[:8]}"
+        self.handler = RedisHandler("Bot", self.topic, f"{self.topic}_history")
+
+    async def asyncTearDown(self):
+        history = self.handler.redis_history
+        await self.client.delete(history, f"{history}_seq")
+        self.tmp.cleanup()
+
+    async def _fill(self, entries: list[str]):
+        await self.client.rpush(self.handler.redis_history, *entries)
+        await self.client.incrby(self.handler.redis_history_seq, len(entries))
+
+    async def test_entries_retention(self):
+        """Test 1: Only the last N entries stay in Redis."""
+        await self._fill([_entry(n) for n in range(30)])
+        archiver = HistoryArchiver(self.handler, entries=12, store=self.store)
+        self.assertEqual(await archiver.archive(), 18)
+        self.assertEqual(await archiver.archive(), 0)
+
+        self.assertEqual(await self.client.llen(self.handler.redis_history), 12)
+        first, entries = await read_history(self.handler.redis_history, 5, 20)
+        self.assertEqual(first, 18)
+        self.assertIn(b'"a18"', entries[0])
+        segment = self.store.segments(self.topic)[0]
+        self.assertEqual((segment.first, segment.last), (0, 17))
+
+    async def test_export_reads_archive(self):
+        """Test 2: Archived and hot entries are exported in order."""
+        await self._fill([_entry(n) for n in range(30)])
+        await HistoryArchiver(self.handler, entries=12, store=self.store).archive()
+
+        records = [
+            record async for record in stream_chat_messages(self.topic, 3, page_size=7)
+        ]
+        self.assertEqual([record["index"] for record in records], list(range(3, 30)))
+        self.assertEqual(records[-1]["content"], "a29")
+
+    async def test_hours_retention(self):
+        """Test 3: Old entries are archived, but never the newest window."""
+        old = [_entry(n, timedelta(hours=5)) for n in range(HISTORY_WINDOW + 5)]
+        await self._fill(old + [_entry(99)])
+        archiver = HistoryArchiver(self.handler, hours=1, store=self.store)
+        self.assertEqual(await archiver.archive(), 6)
+        self.assertEqual(
+            await self.client.llen(self.handler.redis_history), HISTORY_WINDOW
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
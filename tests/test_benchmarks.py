@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline benchmark suite.
+Tests: 1) percentiles use the nearest rank, 2) the fan-out scenario runs
+without Redis, 3) results are compared against a baseline
+"""
+
+import asyncio
+import io
+import sys
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.suite import bench_ws_fanout, print_results, summarize
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Tests for benchmarks.suite."""
+
+    def test_summarize(self):
+        """Test 1: p50/p95/p99 of 1..100 ms are 50, 95 and 99 ms."""
+        summary = summarize([i / 1000 for i in range(100, 0, -1)], elapsed=2.0)
+        self.assertEqual(
+            (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]), (50, 95, 99)
+        )
+        self.assertEqual(summary["throughput_per_s"], 50)
+
+    def test_ws_fanout(self):
+        """Test 2: Every frame reaches every client."""
+        summary = asyncio.run(bench_ws_fanout(clients=5, frames=4))
+        self.assertEqual(summary["ops"], 20)
+        self.assertGreater(summary["peak_rss_mb"], 0)
+
+    def test_compare(self):
+        """Test 3: Changes against the baseline are printed per scenario."""
+        old = {"scenarios": {"chat": summarize([0.010] * 10, 1.0)}}
+        new = {"scenarios": {"chat": summarize([0.005] * 10, 0.5)}}
+        output = io.StringIO()
+        with redirect_stdout(output):
+            print_results(new, old)
+        self.assertIn("-50.0%", output.getvalue())
+        self.assertIn("+100.0%", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
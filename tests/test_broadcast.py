@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket Broadcaster.
+Tests: 1) one slow client does not delay others, 2) drop_oldest policy, 3) disconnect policy
+"""
+
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.broadcast import Broadcaster
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent: list[dict] = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, text: str):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def _drain():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBroadcaster(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.broadcast.Broadcaster."""
+
+    async def test_slow_client_does_not_block_others(self):
+        """Test 1: A stuck client leaves delivery to the others untouched."""
+        broadcaster = Broadcaster(queue_size=10)
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        broadcaster.connect(slow)
+        broadcaster.connect(fast)
+
+        for i in range(3):
+            self.assertEqual(broadcaster.broadcast({"n": i}), 2)
+        await _drain()
+
+        self.assertEqual([m["n"] for m in fast.sent], [0, 1, 2])
+        self.assertEqual(slow.sent, [])
+
+        slow.gate.set()
+        await _drain()
+        self.assertEqual([m["n"] for m in slow.sent], [0, 1, 2])
+        await broadcaster.aclose()
+
+    async def test_drop_oldest_keeps_newest_frames(self):
+        """Test 2: A full queue discards its oldest frame."""
+        broadcaster = Broadcaster(queue_size=2, policy="drop_oldest")
+        slow = FakeWebSocket(blocked=True)
+        broadcaster.connect(slow)
+        broadcaster.broadcast({"n": 0})
+        await _drain()  # writer takes frame 0 and blocks on it
+
+        for i in range(1, 5):
+            broadcaster.broadcast({"n": i})
+        slow.gate.set()
+        await _drain()
+
+        self.assertEqual([m["n"] for m in slow.sent], [0, 3, 4])
+        self.assertEqual(broadcaster.stats()["dropped"], 2)
+        await broadcaster.aclose()
+
+    async def test_disconnect_policy_closes_laggard(self):
+        """Test 3: With 'disconnect', the slow client is closed and forgotten."""
+        broadcaster = Broadcaster(queue_size=1, policy="disconnect")
+        slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+        broadcaster.connect(slow)
+        broadcaster.connect(fast)
+
+        for i in range(3):
+            broadcaster.broadcast({"n": i})
+            await _drain()
+
+        self.assertEqual(len(broadcaster), 1)
+        self.assertEqual(slow.closed_with, 1013)
+        self.assertEqual([m["n"] for m in fast.sent], [0, 1, 2])
+        await broadcaster.aclose()
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            Broadcaster(policy="block")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
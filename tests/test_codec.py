@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the history entry codecs.
+Tests: 1) entries written by every available codec parse to the same
+messages, 2) binary entries are told apart from JSON, 3) the migration
+re-encodes entries but leaves ones changed meanwhile (needs a Redis server)
+"""
+
+import asyncio
+import importlib.util
+import json
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from app.core.codec import HistoryCodec, entry_text, is_binary, load_entry
+from app.core.history import parse_history_entry
+from scripts import migrate_history
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+def _messages() -> list[dict]:
+    result = asyncio.run(Agent(TestModel(), system_prompt="Be brief.").run("hello"))
+    return json.loads(result.new_messages_json())
+
+
+def _codecs() -> list[HistoryCodec]:
+    codecs = [HistoryCodec("json"), HistoryCodec("orjson")]
+    if importlib.util.find_spec("msgpack"):
+        codecs.append(HistoryCodec("msgpack"))
+    if importlib.util.find_spec("zstandard"):
+        codecs.append(HistoryCodec("orjson", "zstd"))
+    return codecs
+
+
+class TestHistoryCodec(unittest.TestCase):
+    """Tests for app.core.codec."""
+
+    def test_round_trip(self):
+        """Test 1: Every codec's entries read back as the same messages."""
+        messages = _messages()
+        expected = parse_history_entry(json.dumps(messages))
+        for codec in _codecs():
+            with self.subTest(codec=codec.name):
+                raw = codec.encode(messages, codec.dumps(messages))
+                self.assertEqual(is_binary(raw), codec.binary)
+                self.assertEqual(parse_history_entry(raw), expected)
+                self.assertEqual(load_entry(raw), messages)
+
+    def test_binary_header(self):
+        """Test 2: A NUL byte marks binary entries, which JSON never starts with."""
+        messages = _messages()
+        text = json.dumps(messages)
+        raw = b"\x00j-" + text.encode()
+        self.assertTrue(is_binary(raw))
+        self.assertFalse(is_binary(text))
+        self.assertEqual(load_entry(raw), messages)
+        self.assertEqual(json.loads(entry_text(raw)), messages)
+        with self.assertRaises(ValueError):
+            HistoryCodec("pickle")
+
+
+@requires_redis
+class TestMigration(RedisTestCase):
+    """Tests for scripts.migrate_history."""
+
+    client_modules = ("scripts.migrate_history",)
+    binary_modules = ("app.core.redis",)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.history = f"test-chat-{uuid.uuid4().hex[:8]}_history"
+
+    async def asyncTearDown(self):
+        await self.client.delete(self.history)
+
+    async def test_migrate(self):
+        """Test 3: Old entries are rewritten, concurrently changed ones are not."""
+        messages = await asyncio.to_thread(_messages)
+        await self.client.rpush(self.history, *[json.dumps(messages)] * 5)
+        target = HistoryCodec("orjson")
+
+        real_rewrite = migrate_history._rewrite
+
+        async def rewrite_after_change(keys, args, client):
+            await self.client.lset(self.history, 0, json.dumps(messages, indent=1))
+            return await real_rewrite(keys=keys, args=args, client=client)
+
+        with patch("scripts.migrate_history._rewrite", rewrite_after_change):
+            stats = await migrate_history.migrate_topic(
+                self.history.removesuffix("_history"), target, batch=2
+            )
+        self.assertEqual((stats["entries"], stats["changed"]), (5, 4))
+        self.assertLess(stats["bytes_after"], stats["bytes_before"])
+        stored = await self.client.lrange(self.history, 0, -1)
+        self.assertIn("\n", stored[0])
+        self.assertEqual(set(stored[1:]), {target.dumps(messages)})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
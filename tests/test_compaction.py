@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for history compaction (needs a Redis server).
+Tests: 1) nothing is summarized until COMPACT_BATCH turns fell out of the
+context, then they are, 2) only one compactor per channel runs at a time,
+3) the summary is announced and installed by the other agents
+"""
+
+import asyncio
+import json
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.compaction import COMPACT_BATCH, HistoryCompactor
+from app.core.history import SUMMARY_PREFIX
+from app.core.redis import RedisHandler
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+def _entry(text: str) -> str:
+    part = {"part_kind": "user-prompt", "content": text}
+    return json.dumps([{"kind": "request", "parts": [part]}])
+
+
+@requires_redis
+class TestHistoryCompactor(RedisTestCase):
+    """Tests for app.core.compaction.HistoryCompactor."""
+
+    client_modules = ("app.core.redis", "app.core.compaction")
+    binary_modules = ("app.core.redis",)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.topic = f"test-chat-{uuid.uuid4().hex[:8]}"
+        self.summaries: list[tuple[str, str]] = []
+
+    async def asyncTearDown(self):
+        history = f"{self.topic}_history"
+        await self.client.delete(
+            history, f"{history}_seq", f"{history}_summary", f"{history}_summary:lock"
+        )
+        await self.client.aclose()
+        await self.binary.aclose()
+
+    def _handler(self, name: str) -> RedisHandler:
+        # A one token budget leaves all but the newest entry outside the context
+        return RedisHandler(
+            name, self.topic, f"{self.topic}_history", history_token_budget=1
+        )
+
+    async def _fill(self, count: int, *handlers: RedisHandler):
+        entries = [_entry(f"m{n}") for n in range(count)]
+        await self.client.rpush(f"{self.topic}_history", *entries)
+        await self.client.set(f"{self.topic}_history_seq", count)
+        for handler in handlers:
+            handler.history_cache.reset(count, entries)
+
+    async def _summarize(self, previous: str, transcript: str) -> str:
+        self.summaries.append((previous, transcript))
+        await asyncio.sleep(0.05)
+        return f"summary of {len(transcript.splitlines())} lines"
+
+    async def test_batch_threshold(self):
+        """Test 1: Fewer than COMPACT_BATCH old turns are left alone."""
+        handler = self._handler("Ada")
+        compactor = HistoryCompactor(handler, self._summarize)
+        await self._fill(COMPACT_BATCH, handler)
+        self.assertFalse(await compactor.compact())
+        self.assertEqual(self.summaries, [])
+
+        await self._fill(COMPACT_BATCH + 2, handler)
+        self.assertTrue(await compactor.compact())
+        ((previous, transcript),) = self.summaries
+        self.assertEqual(previous, "")
+        self.assertEqual(
+            transcript.splitlines(), [f"m{n}" for n in range(COMPACT_BATCH + 1)]
+        )
+        stored = await self.client.hgetall(f"{self.topic}_history_summary")
+        self.assertEqual(
+            stored,
+            {
+                "text": f"summary of {COMPACT_BATCH + 1} lines",
+                "seq": str(COMPACT_BATCH + 1),
+            },
+        )
+        self.assertEqual(compactor.compactions, 1)
+
+    async def test_one_compactor_per_channel(self):
+        """Test 2: Two agents compacting at once summarize only once."""
+        ada, bob = self._handler("Ada"), self._handler("Bob")
+        await self._fill(10, ada, bob)
+        results = await asyncio.gather(
+            HistoryCompactor(ada, self._summarize).compact(),
+            HistoryCompactor(bob, self._summarize).compact(),
+        )
+        self.assertEqual(sorted(results), [False, True])
+        self.assertEqual(len(self.summaries), 1)
+        self.assertFalse(await self.client.exists(f"{self.topic}_history_summary:lock"))
+
+    async def test_summary_propagates(self):
+        """Test 3: Other agents install the announced summary."""
+        ada, bob = self._handler("Ada"), self._handler("Bob")
+        await self._fill(10, ada, bob)
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.topic)
+        await pubsub.get_message(timeout=1)  # subscribe confirmation
+
+        self.assertTrue(await HistoryCompactor(ada, self._summarize).compact())
+        self.assertEqual(ada.history_cache.summary_seq, 9)
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+        await pubsub.aclose()
+        self.assertEqual(json.loads(message["data"])["type"], "summary")
+
+        self.assertFalse(await bob._process_message(message))
+        self.assertEqual(bob.history_cache.summary_seq, 9)
+        first = bob.history_cache.messages(bob.history_token_budget)[0]
+        self.assertEqual(first.parts[0].content, SUMMARY_PREFIX + "summary of 9 lines")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
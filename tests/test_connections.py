@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared connection pools.
+Tests: 1) REDIS_SOCKET switches to a unix socket pool, 2) one shared HTTP client
+with the configured limits, 3) pool stats report every pool
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from redis.asyncio.connection import UnixDomainSocketConnection
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core import connections
+from app.core.connections import TrackedConnectionPool, http_client, pool_stats
+
+
+class TestConnections(unittest.TestCase):
+    """Tests for app.core.connections."""
+
+    def test_unix_socket(self):
+        """Test 1: A socket path takes precedence over REDIS_URL."""
+        with patch.object(connections, "REDIS_SOCKET", "/tmp/redis.sock"):
+            pool = TrackedConnectionPool.from_url(
+                connections._redis_url(),
+                max_connections=4,
+                **connections._redis_options(),
+            )
+        self.assertIs(pool.connection_class, UnixDomainSocketConnection)
+        self.assertEqual(pool.connection_kwargs["path"], "/tmp/redis.sock")
+        self.assertEqual(pool.max_connections, 4)
+
+    def test_shared_http_client(self):
+        """Test 2: Every provider gets the same client."""
+        client = http_client()
+        self.assertIs(client, http_client())
+        pool = client._transport._pool
+        self.assertEqual(pool._max_connections, connections.HTTP_MAX_CONNECTIONS)
+        self.assertEqual(
+            pool._max_keepalive_connections, connections.HTTP_MAX_KEEPALIVE
+        )
+
+    def test_pool_stats(self):
+        """Test 3: Redis, listener and HTTP pools are all reported."""
+        stats = pool_stats()
+        self.assertEqual(
+            set(stats), {"redis", "redis_binary", "redis_listeners", "http"}
+        )
+        self.assertEqual(
+            set(stats["redis"]),
+            {"max_connections", "in_use", "idle", "waiting", "created"},
+        )
+        self.assertIn("tls_handshakes", stats["http"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
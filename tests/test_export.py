@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming topic export (needs a Redis server).
+Tests: 1) topics are exported page by page to JSONL and Markdown,
+2) a resumed export drops partial writes and adds only new entries,
+3) the Parquet dataset reads back as one table (needs pyarrow)
+"""
+
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.export import CHECKPOINT_FILE, export_topics
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+def _entry(n: int) -> str:
+    return json.dumps(
+        [
+            {
+                "kind": "request",
+                "parts": [{"part_kind": "user-prompt", "content": f"q{n}"}],
+            },
+            {
+                "kind": "response",
+                "agent_sender": "Bot",
+                "parts": [{"part_kind": "text", "content": f"a{n}"}],
+            },
+        ]
+    )
+
+
+@requires_redis
+class TestExport(RedisTestCase):
+    """Tests for app.core.export."""
+
+    client_modules = ("app.core.redis", "app.core.redis_export")
+    binary_modules = ("app.core.redis",)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.topics = [f"test-chat-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+        for topic in self.topics:
+            await self.client.rpush(f"{topic}_history", *(_entry(n) for n in range(25)))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp.name)
+
+    async def asyncTearDown(self):
+        await self.client.delete(*(f"{topic}_history" for topic in self.topics))
+        self.tmp.cleanup()
+
+    def _lines(self, topic: str) -> list[dict]:
+        text = (self.output / f"{topic}.jsonl").read_text()
+        return [json.loads(line) for line in text.splitlines()]
+
+    async def test_export_formats(self):
+        """Test 1: Every entry of every topic is written, in order."""
+        written = await export_topics(
+            self.topics, self.output, "jsonl", 2, page_size=10
+        )
+        self.assertEqual(written, dict.fromkeys(self.topics, 50))
+        records = self._lines(self.topics[0])
+        self.assertEqual([r["content"] for r in records[:2]], ["q0", "a0"])
+        self.assertEqual(records[-1]["index"], 24)
+        self.assertEqual(records[1]["sender"], "Bot")
+
+        await export_topics(self.topics[:1], self.output, "markdown", page_size=7)
+        markdown = (self.output / f"{self.topics[0]}.md").read_text()
+        self.assertIn(f"# Chat Export: {self.topics[0]}", markdown)
+        self.assertIn("**response Bot** ()\na24\n", markdown)
+
+    async def test_resume(self):
+        """Test 2: Resuming continues from the checkpoint without duplicates."""
+        topic = self.topics[0]
+        await export_topics([topic], self.output, "jsonl", page_size=10)
+        # A crash after writing part of a page the checkpoint does not cover
+        with open(self.output / f"{topic}.jsonl", "a") as file:
+            file.write('{"partial": ')
+        await self.client.rpush(f"{topic}_history", _entry(25), _entry(26))
+
+        written = await export_topics(
+            [topic], self.output, "jsonl", resume=True, page_size=10
+        )
+        self.assertEqual(written, {topic: 4})
+        records = self._lines(topic)
+        self.assertEqual(
+            [r["index"] for r in records], [i for i in range(27) for _ in "qa"]
+        )
+        checkpoint = json.loads((self.output / CHECKPOINT_FILE).read_text())
+        self.assertEqual(checkpoint[topic]["next"], 27)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "needs pyarrow")
+    async def test_parquet(self):
+        """Test 3: Pages become parts of one dataset, a resumed page replaces its part."""
+        import pyarrow.parquet as pq
+
+        topic = self.topics[0]
+        await export_topics([topic], self.output, "parquet", page_size=10)
+        await self.client.rpush(f"{topic}_history", _entry(25))
+        written = await export_topics(
+            [topic], self.output, "parquet", resume=True, page_size=10
+        )
+        self.assertEqual(written, {topic: 2})
+
+        table = pq.read_table(self.output / f"{topic}.parquet")
+        self.assertEqual(table.num_rows, 52)
+        records = table.sort_by([("index", "ascending")]).to_pylist()
+        self.assertEqual([r["content"] for r in records[:2]], ["q0", "a0"])
+        self.assertEqual((records[-1]["index"], records[-1]["content"]), (25, "a25"))
+        self.assertEqual(records[1]["sender"], "Bot")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
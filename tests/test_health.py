@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for readiness probes.
+Tests: 1) agent /healthz is 503 until the listener is attached,
+2) waiting stops early for a dead service, 3) the model check fails without
+an API key or while the provider's circuit is open, 4) an agent without its
+API key still starts and reports the model as unavailable
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agents import agent as agent_module
+from app.agents.agent import FastAgent
+from app.core import resilience
+from app.core.health import wait_until_ready
+from app.core.provider import model_available
+
+
+async def _reachable():
+    return True
+
+
+class TestHealth(unittest.TestCase):
+    """Tests for app.core.health and the /healthz routes."""
+
+    def test_agent_ready_once_listening(self):
+        """Test 1: Readiness follows the subscription state."""
+        agent = FastAgent(
+            {"name": "Ada", "system_prompt": "You are Ada.", "model": "test"}
+        )
+        client = TestClient(agent.app)
+        with patch.object(agent_module, "redis_reachable", _reachable):
+            response = client.get("/healthz")
+            self.assertEqual(response.status_code, 503)
+            self.assertFalse(response.json()["checks"]["subscriber"])
+
+            agent.redis_handler.listening.set()
+            response = client.get("/healthz")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["status"], "ok")
+
+    def test_dead_service_not_waited_for(self):
+        """Test 2: A service whose process died is reported without the full timeout."""
+        ready = asyncio.run(
+            wait_until_ready(
+                {"Ada": "http://127.0.0.1:9/healthz"},
+                timeout=30,
+                alive=lambda name: False,
+            )
+        )
+        self.assertEqual(ready, {"Ada": None})
+
+    def test_model_check(self):
+        """Test 3: The model is unavailable without a key or with an open circuit."""
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": ""}):
+            self.assertFalse(model_available("anthropic:claude-3-5-haiku-latest"))
+            self.assertTrue(
+                model_available(["anthropic:claude-3-5-haiku-latest", "test"])
+            )
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "sk-test"}):
+            self.assertTrue(model_available("anthropic:claude-3-5-haiku-latest"))
+
+        breaker = resilience.CircuitBreaker("test", failures=1)
+        with patch.dict(resilience._breakers, {"test": breaker}):
+            self.assertTrue(model_available("test"))
+            breaker.record_failure()
+            self.assertFalse(model_available("test"))
+
+    def test_agent_without_api_key(self):
+        """Test 4: A missing API key fails /healthz instead of the agent."""
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": ""}):
+            agent = FastAgent(
+                {
+                    "name": "Ada",
+                    "system_prompt": "You are Ada.",
+                    "model": "anthropic:claude-3-5-haiku-latest",
+                }
+            )
+            hedged = FastAgent(
+                {
+                    "name": "Bob",
+                    "system_prompt": "You are Bob.",
+                    "model": ["anthropic:claude-3-5-haiku-latest", "test"],
+                }
+            )
+            agent.redis_handler.listening.set()
+            client = TestClient(agent.app)
+            with patch.object(agent_module, "redis_reachable", _reachable):
+                response = client.get("/healthz")
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()["checks"]["model"])
+        self.assertIsNone(agent.model)
+        self.assertEqual(len(hedged.model.models), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
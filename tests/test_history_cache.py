@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process HistoryCache.
+Tests: 1) in-order appends, 2) duplicates are ignored, 3) gaps invalidate, 4) ring buffer window,
+5) token budget selection, 6) rolling summary
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.history import HistoryCache
+
+
+def _entry(text: str) -> str:
+    """A stored history entry holding one user prompt."""
+    return json.dumps(
+        [
+            {
+                "kind": "request",
+                "parts": [
+                    {
+                        "part_kind": "user-prompt",
+                        "content": text,
+                        "timestamp": "2025-06-01T12:00:00Z",
+                    }
+                ],
+            }
+        ]
+    )
+
+
+def _texts(cache: HistoryCache) -> list[str]:
+    return [message.parts[0].content for message in cache.messages()]
+
+
+class TestHistoryCache(unittest.TestCase):
+    """Tests for app.core.history.HistoryCache."""
+
+    def test_cold_until_reset(self):
+        cache = HistoryCache(window=3)
+        self.assertFalse(cache.warm)
+        self.assertFalse(cache.append(1, _entry("a")))
+
+        cache.reset(2, [_entry("a"), _entry("b")])
+        self.assertTrue(cache.warm)
+        self.assertEqual(_texts(cache), ["a", "b"])
+
+    def test_appends_in_sequence(self):
+        """Test 1: Entries with the next sequence number are applied."""
+        cache = HistoryCache(window=3)
+        cache.reset(0, [])
+        self.assertTrue(cache.append(1, _entry("a")))
+        self.assertTrue(cache.append(2, _entry("b")))
+        self.assertEqual(_texts(cache), ["a", "b"])
+        self.assertEqual(cache.seq, 2)
+
+    def test_duplicate_is_ignored(self):
+        """Test 2: An entry seen before (own write echoed back) is a no-op."""
+        cache = HistoryCache(window=3)
+        cache.reset(1, [_entry("a")])
+        self.assertTrue(cache.append(1, _entry("a")))
+        self.assertEqual(_texts(cache), ["a"])
+
+    def test_gap_invalidates(self):
+        """Test 3: A missing sequence number sends the cache cold."""
+        cache = HistoryCache(window=3)
+        cache.reset(1, [_entry("a")])
+        self.assertFalse(cache.append(3, _entry("c")))
+        self.assertFalse(cache.warm)
+        self.assertEqual(cache.messages(), [])
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_window_is_a_ring_buffer(self):
+        """Test 4: Only the last `window` entries are kept."""
+        cache = HistoryCache(window=2)
+        cache.reset(3, [_entry("a"), _entry("b"), _entry("c")])
+        self.assertEqual(_texts(cache), ["b", "c"])
+        cache.append(4, _entry("d"))
+        self.assertEqual(_texts(cache), ["c", "d"])
+
+    def test_token_budget_keeps_newest_entries(self):
+        """Test 5: Only the newest entries that fit the budget are returned."""
+        cache = HistoryCache(window=5)
+        cache.reset(3, [_entry("a" * 400), _entry("b" * 400), _entry("c" * 400)])
+
+        self.assertEqual(len(cache.messages()), 3)
+        self.assertEqual(_texts(cache)[-1], "c" * 400)
+        selected = cache.messages(token_budget=250)
+        self.assertEqual([m.parts[0].content[0] for m in selected], ["b", "c"])
+        self.assertEqual(cache.compaction_point(250), 1)
+
+    def test_summary_replaces_compacted_entries(self):
+        """Test 6: The summary is prepended and covered entries are skipped."""
+        cache = HistoryCache(window=5)
+        cache.reset(3, [_entry("a"), _entry("b"), _entry("c")])
+        cache.set_summary("a happened", 2)
+
+        texts = [m.parts[0].content for m in cache.messages()]
+        self.assertEqual(len(texts), 2)
+        self.assertTrue(texts[0].endswith("a happened"))
+        self.assertEqual(texts[1], "c")
+
+        cache.set_summary("older", 1)  # stale summaries are ignored
+        self.assertEqual(cache.summary_seq, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-process agent host.
+Tests: 1) agents are routed by path prefix, 2) every agent's lifespan runs
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.host import agent_slug, create_host_app
+from app.core.redis import RedisHandler
+
+CONFIGS = [
+    {"name": "Dominique", "system_prompt": "You are Dominique.", "model": "test"},
+    {"name": "Agent Joseph", "system_prompt": "You are Joseph.", "model": "test"},
+]
+
+
+class TestAgentHost(unittest.TestCase):
+    """Tests for app.core.host.create_host_app."""
+
+    def test_routes_by_prefix(self):
+        """Test 1: /agents lists the agents, each is served under its slug."""
+        client = TestClient(create_host_app(CONFIGS))
+
+        listing = client.get("/agents").json()
+        self.assertEqual(sorted(listing), ["agent-joseph", "dominique"])
+        self.assertEqual(agent_slug("Agent Joseph"), "agent-joseph")
+
+        info = client.get("/agents/dominique/").json()
+        self.assertIn("Dominique", str(info))
+        self.assertEqual(client.get("/agents/agent-joseph/stats").status_code, 200)
+
+    def test_lifespans_are_entered(self):
+        """Test 2: Mounted apps' lifespans are run by the host."""
+        started = []
+
+        async def listen(handler, _agent_call_func):
+            started.append(handler.agent_name)
+
+        with patch.object(RedisHandler, "listen_and_respond", listen):
+            with TestClient(create_host_app(CONFIGS)):
+                pass
+
+        self.assertEqual(sorted(started), ["Agent Joseph", "Dominique"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-agent inbox.
+Tests: 1) batches take everything queued, 2) oldest message dropped when full,
+3) messages arriving during a slow call are answered with one call,
+4) draining stops receiving and waits until the queued messages are answered
+"""
+
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.inbox import AgentInbox, InboxItem
+from app.core.redis import RedisHandler
+
+
+def chat(sender: str, content: str) -> dict:
+    return {
+        "data": json.dumps({"sender": sender, "content": content, "type": "message"})
+    }
+
+
+class TestAgentInbox(unittest.IsolatedAsyncioTestCase):
+    async def test_batch_takes_everything_queued(self):
+        inbox = AgentInbox(maxsize=5)
+        inbox.put(InboxItem("Ada: hi"))
+        inbox.put(InboxItem("Joseph: hello"))
+
+        batch = await inbox.next_batch()
+
+        self.assertEqual(AgentInbox.merge(batch), "Ada: hi\nJoseph: hello")
+        self.assertEqual(len(inbox), 0)
+        self.assertEqual(inbox.stats()["coalesced"], 1)
+
+    async def test_drops_oldest_when_full(self):
+        inbox = AgentInbox(maxsize=2)
+        for text in ("one", "two", "three"):
+            dropped = inbox.put(InboxItem(text))
+
+        self.assertEqual(dropped.text, "one")
+        batch = await inbox.next_batch()
+        self.assertEqual([item.text for item in batch], ["two", "three"])
+        self.assertEqual(inbox.stats()["dropped"], 1)
+
+
+class TestCoalescing(unittest.IsolatedAsyncioTestCase):
+    async def test_messages_during_call_are_coalesced(self):
+        handler = RedisHandler("Dominique", "chat", "chat_history")
+        prompts = []
+        release = asyncio.Event()
+
+        async def agent_call(prompt):
+            prompts.append(prompt)
+            await release.wait()
+            return prompt
+
+        async def publish_response(response):
+            pass
+
+        handler.publish_response = publish_response
+        responder = asyncio.create_task(handler._respond_loop(agent_call))
+        try:
+            await handler._process_message(chat("Ada", "first"))
+            await asyncio.sleep(0)
+            for sender in ("Ada", "Joseph", "Bob"):
+                await handler._process_message(chat(sender, f"from {sender}"))
+            release.set()
+            await asyncio.sleep(0.01)
+        finally:
+            responder.cancel()
+
+        self.assertEqual(
+            prompts, ["Ada: first", "Ada: from Ada\nJoseph: from Joseph\nBob: from Bob"]
+        )
+        self.assertEqual(handler.inbox.stats()["batches"], 2)
+
+    async def test_drain(self):
+        handler = RedisHandler("Dominique", "chat", "chat_history")
+        prompts = []
+        release = asyncio.Event()
+
+        async def subscribe(_channel, **_options):
+            yield chat("Ada", "first")
+            yield chat("Joseph", "second")
+            await asyncio.Event().wait()
+
+        async def agent_call(prompt):
+            prompts.append(prompt)
+            await release.wait()
+            return prompt
+
+        async def publish_response(response):
+            pass
+
+        handler.publish_response = publish_response
+        with patch("app.core.redis.subscribe", subscribe):
+            listener = asyncio.create_task(handler.listen_and_respond(agent_call))
+            await asyncio.sleep(0.01)
+            self.assertFalse(await handler.drain(0.01))  # the call is still running
+
+            release.set()
+            self.assertTrue(await handler.drain(1))
+            self.assertFalse(listener.done())
+            listener.cancel()
+
+        self.assertEqual(prompts, ["Ada: first\nJoseph: second"])
+        self.assertTrue(handler._receiver.cancelled())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
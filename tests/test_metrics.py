@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus /metrics endpoints.
+Tests: 1) histograms render cumulative buckets, 2) received and skipped
+messages are counted, 3) agent calls record latency and tokens per agent and
+model, 4) the agent host exposes every agent in one scrape
+"""
+
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agents.agent import FastAgent
+from app.core.host import create_host_app
+from app.core.metrics import Counter, Histogram, _registry, render
+from app.core.redis import RedisHandler
+
+
+async def _no_history(*_args, **_kwargs):
+    return []
+
+
+def _series(text: str, name: str, **labels) -> float | None:
+    """Value of the sample `name` whose labels include `labels`."""
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") or line.startswith(f"{name} "):
+            if all(f'{key}="{value}"' in line for key, value in labels.items()):
+                return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests for app.core.metrics and its endpoints."""
+
+    def test_histogram_format(self):
+        """Test 1: Buckets are cumulative, labels are escaped."""
+        histogram = Histogram("test_seconds", "Test", ("agent",), buckets=(0.1, 1))
+        counter = Counter("test_total", "Test", ("agent",))
+        self.addCleanup(_registry.remove, histogram)
+        self.addCleanup(_registry.remove, counter)
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.labels(agent='A "1"').observe(value)
+        counter.labels(agent="B").inc(2)
+
+        text = render()
+        self.assertIn('test_seconds_bucket{agent="A \\"1\\"",le="0.1"} 2', text)
+        self.assertIn('test_seconds_bucket{agent="A \\"1\\"",le="1"} 3', text)
+        self.assertIn('test_seconds_bucket{agent="A \\"1\\"",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_count{agent="A \\"1\\""} 4', text)
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{agent="B"} 2', text)
+
+    def test_messages_counted(self):
+        """Test 2: Own messages are skipped, others are received."""
+        handler = RedisHandler("Metra", "chat", "chat_history")
+
+        def message(sender):
+            return {
+                "data": json.dumps(
+                    {"type": "message", "sender": sender, "content": "hi"}
+                )
+            }
+
+        async def feed():
+            await handler._process_message(message("Metra"))
+            await handler._process_message(message("Ada"))
+
+        asyncio.run(feed())
+        text = render()
+        self.assertEqual(
+            _series(text, "agent_messages_received_total", agent="Metra"), 1
+        )
+        self.assertEqual(
+            _series(text, "agent_messages_skipped_total", agent="Metra", reason="own"),
+            1,
+        )
+
+    def test_agent_call_recorded(self):
+        """Test 3: /chat shows up as LLM call time, history load and tokens."""
+        agent = FastAgent(
+            {"name": "Tokra", "system_prompt": "You are Tokra.", "model": "test"}
+        )
+        client = TestClient(agent.app)
+        with patch.object(agent.redis_handler, "get_message_history", _no_history):
+            self.assertEqual(
+                client.post("/chat", json={"message": "hi"}).status_code, 200
+            )
+
+        response = client.get("/metrics")
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        labels = {"agent": "Tokra", "model": "test"}
+        self.assertEqual(
+            _series(response.text, "agent_llm_call_seconds_count", **labels), 1
+        )
+        self.assertEqual(
+            _series(response.text, "agent_history_load_seconds_count", **labels), 1
+        )
+        self.assertGreater(
+            _series(response.text, "agent_tokens_total", direction="input", **labels), 0
+        )
+
+    def test_host_aggregates(self):
+        """Test 4: One scrape of the host covers all agents."""
+        configs = [
+            {"name": "Hosta", "system_prompt": "You are Hosta.", "model": "test"},
+            {"name": "Hostb", "system_prompt": "You are Hostb.", "model": "test"},
+        ]
+        text = TestClient(create_host_app(configs)).get("/metrics").text
+        for name in ("Hosta", "Hostb"):
+            self.assertIsNotNone(
+                _series(text, "agent_messages_answered_total", agent=name)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
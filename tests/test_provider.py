@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazy provider registry.
+Tests: 1) model specs may contain colons, 2) unknown providers are rejected,
+3) importing the registry loads no provider SDK, 4) models are built once
+"""
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai.models.test import TestModel
+
+from app.core.provider import get_model, parse_model_spec
+
+
+class TestProvider(unittest.TestCase):
+    """Tests for app.core.provider."""
+
+    def test_parse_spec(self):
+        """Test 1: Only the first colon separates the provider."""
+        self.assertEqual(
+            parse_model_spec("openrouter:google/gemma-3-1b-it:free"),
+            ("openrouter", "google/gemma-3-1b-it:free"),
+        )
+
+    def test_unknown_provider(self):
+        """Test 2: A typo in agents.yml fails loudly."""
+        with self.assertRaises(ValueError):
+            parse_model_spec("antropic:claude")
+
+    def test_import_is_lazy(self):
+        """Test 3: No SDK is imported until a model is requested."""
+        code = (
+            "import sys, app.core.provider, app.core.utils; "
+            "print(sorted(m for m in ('anthropic', 'openai') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent.parent,
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_models_are_shared(self):
+        """Test 4: Agents naming the same model share one instance."""
+        model = get_model("test:hello")
+        # Wrapped for retries (app.core.resilience)
+        self.assertIsInstance(model.wrapped, TestModel)
+        self.assertIs(model, get_model("test:hello"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
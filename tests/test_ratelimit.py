@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis token-bucket rate limiter (needs a Redis server).
+Tests: 1) queued callers are served in order, 2) buckets with the same key
+share one quota, 3) calls that would wait too long are rejected,
+4) model calls reserve and settle tokens
+"""
+
+import asyncio
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from app.core.ratelimit import RateLimitedModel, RateLimitExceeded, TokenBucket
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+@requires_redis
+class TestTokenBucket(RedisTestCase):
+    """Tests for app.core.ratelimit."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.key = f"test:{uuid.uuid4().hex}"
+
+    async def asyncTearDown(self):
+        await self.client.delete(f"ratelimit:{self.key}")
+
+    def _bucket(self, **kwargs) -> TokenBucket:
+        return TokenBucket(self.key, client=self.client, **kwargs)
+
+    async def test_fifo_waits(self):
+        """Test 1: An empty bucket serves one queued caller per refill."""
+        bucket = self._bucket(rpm=600)  # one request per 0.1s, burst of 600
+        seconds, micros = await self.client.time()
+        await self.client.hset(
+            f"ratelimit:{self.key}",
+            mapping={"requests": 0, "ts": seconds + micros / 1e6},
+        )
+
+        waits = await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        self.assertEqual(sorted(waits), waits)
+        # The bucket refills from the HSET on, so only the spacing is exact
+        self.assertLessEqual(waits[0], 0.1)
+        self.assertAlmostEqual(waits[1] - waits[0], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[2] - waits[1], 0.1, delta=0.02)
+        self.assertEqual(bucket.stats()["waited"], 3)
+
+    async def test_shared_quota(self):
+        """Test 2: Two processes' buckets for one model drain the same quota."""
+        first, second = self._bucket(rpm=2), self._bucket(rpm=2, max_wait=0)
+        self.assertEqual(await first.acquire(), 0)
+        self.assertEqual(await first.acquire(), 0)
+        with self.assertRaises(RateLimitExceeded):
+            await second.acquire()
+
+    async def test_rejects_long_waits(self):
+        """Test 3: A rejected call reserves nothing."""
+        bucket = self._bucket(tpm=1000, max_wait=1)
+        await bucket.acquire(1000)
+        with self.assertRaises(RateLimitExceeded) as raised:
+            await bucket.acquire(500)
+        self.assertGreater(raised.exception.wait, 1)
+        self.assertEqual(bucket.stats()["rejected"], 1)
+        tokens = float(await self.client.hget(f"ratelimit:{self.key}", "tokens"))
+        self.assertLess(tokens, 1)
+
+    async def test_model_settles_tokens(self):
+        """Test 4: The estimate is replaced by the usage the provider reports."""
+        bucket = self._bucket(tpm=10_000)
+        model = RateLimitedModel(TestModel(custom_output_text="ok"), bucket)
+        result = await Agent(model).run("hello", model_settings={"max_tokens": 500})
+        used = result.usage().total_tokens
+
+        tokens = float(await self.client.hget(f"ratelimit:{self.key}", "tokens"))
+        self.assertAlmostEqual(10_000 - tokens, used, delta=1)
+        self.assertEqual(bucket.stats()["acquired"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
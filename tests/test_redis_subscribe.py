@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the push-driven Redis subscription used by agents and the chat server.
+Tests: 1) messages are yielded without polling, 2) reconnect after a dropped connection
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import redis.asyncio as aioredis
+
+from app.core import redis as redis_module
+
+
+class FakePubSub:
+    """Minimal stand-in for redis.asyncio.client.PubSub."""
+
+    def __init__(self, script):
+        self.script = script
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels = channels
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        if not self.script:
+            raise aioredis.ConnectionError("script exhausted")
+        item = self.script.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.pubsubs = []
+
+    def pubsub(self):
+        pubsub = FakePubSub(self.scripts.pop(0))
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+
+def _message(data):
+    return {"type": "message", "channel": "chat", "pattern": None, "data": data}
+
+
+class TestSubscribe(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.redis.subscribe."""
+
+    async def test_yields_published_messages(self):
+        """Test 1: Only 'message' entries are yielded, timeouts are skipped."""
+        client = FakeClient(
+            [[None, {"type": "pong", "data": ""}, _message("a"), _message("b")]]
+        )
+        with patch.object(redis_module, "redis_listener", client):
+            listener = redis_module.subscribe("chat", timeout=0.01)
+            received = [(await anext(listener))["data"] for _ in range(2)]
+            await listener.aclose()
+
+        self.assertEqual(received, ["a", "b"])
+        self.assertTrue(client.pubsubs[0].closed)
+
+    async def test_reconnects_after_connection_error(self):
+        """Test 2: A dropped connection opens a fresh subscription."""
+        client = FakeClient(
+            [
+                [_message("before"), aioredis.ConnectionError("dropped")],
+                [_message("after")],
+            ]
+        )
+        with (
+            patch.object(redis_module, "redis_listener", client),
+            patch.object(redis_module, "RECONNECT_MIN_DELAY", 0),
+        ):
+            listener = redis_module.subscribe("chat", timeout=0.01)
+            received = [(await anext(listener))["data"] for _ in range(2)]
+            await listener.aclose()
+
+        self.assertEqual(received, ["before", "after"])
+        self.assertEqual(len(client.pubsubs), 2)
+        self.assertTrue(client.pubsubs[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
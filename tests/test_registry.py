@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the agent registry.
+Tests: 1) replicas on pub/sub need turn taking, 2) streams or turn taking
+allow them
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.registry import build_services
+
+
+def _agent(name: str, **options) -> dict:
+    return {"name": name, "replicas": 1, "turn_taking": None, **options}
+
+
+class TestBuildServices(unittest.TestCase):
+    """Tests for app.core.registry.build_services."""
+
+    def test_pubsub_replicas_rejected(self):
+        """Test 1: Every pub/sub replica would answer every message."""
+        with patch("app.core.registry.REDIS_TRANSPORT", "pubsub"):
+            services = build_services([_agent("Ada")], "process")
+            self.assertEqual([service.name for service in services][1:], ["Ada"])
+            for agent in (
+                _agent("Ada", replicas=2),
+                _agent("Ada", autoscale={"max_replicas": 3}),
+            ):
+                with self.assertRaisesRegex(ValueError, "Ada"):
+                    build_services([agent], "process")
+
+    def test_replicas_allowed(self):
+        """Test 2: Stream consumer groups or a turn lease pick one replica."""
+        agent = _agent("Ada", replicas=2)
+        with patch("app.core.registry.REDIS_TRANSPORT", "streams"):
+            self.assertEqual(build_services([agent], "process")[1].replicas, 2)
+        with patch("app.core.registry.REDIS_TRANSPORT", "pubsub"):
+            leased = {**agent, "turn_taking": {"lease_ttl": 30}}
+            self.assertEqual(build_services([leased], "process")[1].replicas, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for retries and circuit breakers around model calls.
+Tests: 1) transient errors are retried, 2) client errors are not,
+3) Retry-After is honoured, 4) the circuit opens, fails fast and recovers,
+5) /chat and /chat/stream report failures with an error status instead of
+a reply
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from app.agents.agent import FastAgent
+from app.core import resilience
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientModel,
+    backoff_delay,
+    retry_after,
+)
+
+
+def flaky(statuses: list[int], calls: list):
+    """A FunctionModel failing with `statuses` in turn, then answering "ok"."""
+
+    def respond(_messages, _info):
+        calls.append(len(calls))
+        if statuses:
+            raise ModelHTTPError(statuses.pop(0), "flaky")
+        return ModelResponse(parts=[TextPart("ok")])
+
+    return FunctionModel(respond, model_name="flaky")
+
+
+def run(model) -> str:
+    return asyncio.run(Agent(model).run("hi")).output
+
+
+class TestResilience(unittest.TestCase):
+    """Tests for app.core.resilience."""
+
+    def setUp(self):
+        patcher = patch.object(resilience, "RETRY_BASE_DELAY", 0.001)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_transient_errors_retried(self):
+        """Test 1: 429 and 503 are retried until the call succeeds."""
+        calls = []
+        breaker = CircuitBreaker("flaky")
+        self.assertEqual(run(ResilientModel(flaky([429, 503], calls), breaker)), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(breaker.stats()["retries"], 2)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_client_errors_not_retried(self):
+        """Test 2: A 400 is the caller's fault, retrying would not help."""
+        calls = []
+        with self.assertRaises(ModelHTTPError):
+            run(ResilientModel(flaky([400], calls), CircuitBreaker("flaky")))
+        self.assertEqual(len(calls), 1)
+
+    def test_retry_after(self):
+        """Test 3: The SDK error's Retry-After header replaces the backoff."""
+        response = httpx.Response(429, headers={"retry-after": "2"})
+        request = httpx.Request("POST", "http://provider")
+        cause = httpx.HTTPStatusError("429", request=request, response=response)
+        try:
+            raise ModelHTTPError(429, "flaky") from cause
+        except ModelHTTPError as exc:
+            self.assertEqual(retry_after(exc), 2.0)
+            self.assertEqual(backoff_delay(0, retry_after(exc)), 2.0)
+        self.assertLessEqual(backoff_delay(10), resilience.RETRY_MAX_DELAY)
+
+    def test_circuit_opens_and_recovers(self):
+        """Test 4: Repeated failures open the circuit until a trial succeeds."""
+        calls = []
+        breaker = CircuitBreaker("flaky", failures=2, reset_after=0.05)
+        model = ResilientModel(flaky([503, 503, 503], calls), breaker, retries=0)
+        for _ in range(2):
+            with self.assertRaises(ModelHTTPError):
+                run(model)
+        self.assertEqual(breaker.state, "open")
+
+        with self.assertRaises(CircuitOpenError):
+            run(model)
+        self.assertEqual(len(calls), 2)  # failed fast, the provider was not called
+
+        asyncio.run(asyncio.sleep(0.06))
+        with self.assertRaises(ModelHTTPError):
+            run(model)  # the trial call fails and reopens the circuit
+        self.assertEqual(breaker.state, "open")
+        asyncio.run(asyncio.sleep(0.06))
+        self.assertEqual(run(model), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_chat_reports_errors(self):
+        """Test 5: /chat and /chat/stream answer 503 while the circuit is open."""
+        agent = FastAgent(
+            {"name": "Ada", "system_prompt": "You are Ada.", "model": "test"}
+        )
+        breaker = CircuitBreaker("flaky", failures=1)
+        breaker.record_failure()
+        agent.agent = Agent(ResilientModel(flaky([], []), breaker))
+
+        async def no_history():
+            return []
+
+        with patch.object(agent.redis_handler, "get_message_history", no_history):
+            response = TestClient(agent.app).post("/chat", json={"message": "hi"})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(agent.stats()["failures"], 1)
+
+        with patch.object(agent.redis_handler, "get_message_history", no_history):
+            response = TestClient(agent.app).post(
+                "/chat/stream", json={"message": "hi"}
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
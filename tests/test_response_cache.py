@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis response cache.
+Tests: 1) cache key ignores timestamps, 2) hits replay the reply at zero usage,
+3) least recently used entries are evicted
+"""
+
+import sys
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+from pydantic_ai.models.test import TestModel
+
+from app.agents import response_cache as cache_module
+from app.agents.response_cache import ResponseCache, cache_key
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*a, **kw) for name, a, kw in self.calls]
+
+
+class FakeRedis:
+    """Strings plus a single sorted set, enough for the cache."""
+
+    def __init__(self):
+        self.strings = {}
+        self.zset = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.strings[key] = value
+
+    async def zadd(self, key, mapping):
+        self.zset.update(mapping)
+
+    async def zcard(self, key):
+        return len(self.zset)
+
+    async def zpopmin(self, key, count):
+        popped = sorted(self.zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del self.zset[member]
+        return popped
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+
+
+def _history(timestamp: datetime):
+    return [
+        ModelRequest(parts=[UserPromptPart("Ada: hello", timestamp=timestamp)]),
+        ModelResponse(parts=[TextPart("hi Ada")], timestamp=timestamp),
+    ]
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.agents.response_cache."""
+
+    def test_key_ignores_timestamps(self):
+        """Test 1: Same conversation at another time hits the same entry."""
+        earlier = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        now = datetime.now(timezone.utc)
+        settings = {"max_tokens": 100}
+        key = cache_key("test", settings, "prompt", _history(earlier), "hi")
+
+        self.assertEqual(
+            key, cache_key("test", settings, "prompt", _history(now), "hi")
+        )
+        self.assertNotEqual(
+            key, cache_key("test", settings, "prompt", _history(earlier), "bye")
+        )
+        self.assertNotEqual(
+            key,
+            cache_key("test", {"max_tokens": 50}, "prompt", _history(earlier), "hi"),
+        )
+
+    async def test_hit_replays_reply_without_usage(self):
+        """Test 2: A cached reply comes back with its messages and zero tokens."""
+        result = await Agent(TestModel(custom_output_text="cached answer")).run("hi")
+        cache = ResponseCache()
+        with patch.object(cache_module, "redis_client", FakeRedis()):
+            self.assertIsNone(await cache.get("llm_cache:k"))
+            await cache.put("llm_cache:k", result)
+            reply = await cache.get("llm_cache:k")
+
+        self.assertEqual(reply.output, "cached answer")
+        self.assertEqual(reply.usage().total_tokens or 0, 0)
+        self.assertIn(b"cached answer", reply.new_messages_json())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    async def test_lru_eviction(self):
+        """Test 3: Beyond max_entries the least recently used key goes first."""
+        result = await Agent(TestModel(custom_output_text="x")).run("hi")
+        fake = FakeRedis()
+        cache = ResponseCache(max_entries=2)
+        with patch.object(cache_module, "redis_client", fake):
+            await cache.put("llm_cache:a", result)
+            await cache.put("llm_cache:b", result)
+            await cache.get("llm_cache:a")
+            await cache.put("llm_cache:c", result)
+
+        self.assertEqual(sorted(fake.strings), ["llm_cache:a", "llm_cache:c"])
+        self.assertEqual(cache.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
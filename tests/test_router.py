@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged requests across models.
+Tests: 1) a slow primary is hedged and the loser cancelled, 2) a fast primary
+is not hedged, 3) errors fall back at once, 4) all failures are reported,
+5) the hedge delay follows the observed p95, 6) list specs build a HedgedModel
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import FallbackExceptionGroup
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from app.core import router
+from app.core.provider import get_model
+from app.core.router import HedgedModel, model_latency
+
+
+def stand_in(
+    name: str, delay: float = 0.0, fail: bool = False, calls: list | None = None
+):
+    """A FunctionModel answering `name` after `delay` seconds."""
+
+    async def respond(_messages, _info):
+        if calls is not None:
+            calls.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f"{name} cancelled")
+            raise
+        if fail:
+            raise RuntimeError(f"{name} is down")
+        return ModelResponse(parts=[TextPart(name)])
+
+    return FunctionModel(respond, model_name=name)
+
+
+def run(model: HedgedModel) -> str:
+    return asyncio.run(Agent(model).run("hi")).output
+
+
+class TestHedgedModel(unittest.TestCase):
+    """Tests for app.core.router.HedgedModel."""
+
+    def setUp(self):
+        router._latencies.clear()
+
+    def test_slow_primary_is_hedged(self):
+        """Test 1: The fallback answers first and the primary is cancelled."""
+        calls = []
+        model = HedgedModel(
+            stand_in("slow", delay=2, calls=calls),
+            stand_in("fast", delay=0.01, calls=calls),
+            default_delay=0.05,
+        )
+        started = time.perf_counter()
+        self.assertEqual(run(model), "fast")
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(calls, ["slow", "fast", "slow cancelled"])
+        self.assertEqual(model.stats()["hedged"], 1)
+        self.assertEqual(model.stats()["models"]["function:fast"]["wins"], 1)
+
+    def test_fast_primary_not_hedged(self):
+        """Test 2: The fallback is never called while the primary keeps up."""
+        calls = []
+        model = HedgedModel(
+            stand_in("primary", calls=calls),
+            stand_in("backup", calls=calls),
+            default_delay=0.5,
+        )
+        self.assertEqual(run(model), "primary")
+        self.assertEqual(calls, ["primary"])
+        self.assertEqual(model.hedged, 0)
+
+    def test_error_falls_back_immediately(self):
+        """Test 3: A failed primary does not wait for the hedge delay."""
+        model = HedgedModel(
+            stand_in("broken", fail=True), stand_in("backup"), default_delay=5
+        )
+        started = time.perf_counter()
+        self.assertEqual(run(model), "backup")
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(model.stats()["models"]["function:broken"]["failures"], 1)
+
+    def test_all_failures_raised(self):
+        """Test 4: Every model failing raises one group, timeouts included."""
+        model = HedgedModel(
+            stand_in("broken", fail=True), stand_in("hung", delay=5), timeout=0.05
+        )
+        with self.assertRaises(FallbackExceptionGroup) as raised:
+            run(model)
+        self.assertEqual(len(raised.exception.exceptions), 2)
+
+    def test_hedge_delay_follows_p95(self):
+        """Test 5: Once enough calls were timed their p95 replaces the default."""
+        primary = stand_in("primary")
+        model = HedgedModel(primary, stand_in("backup"), default_delay=5, min_delay=0.1)
+        self.assertEqual(model.hedge_delay(primary), 5)
+        for seconds in [0.2] * 19 + [3.0]:
+            model_latency(primary).record(seconds)
+        self.assertEqual(model.hedge_delay(primary), 0.2)
+
+    def test_list_spec(self):
+        """Test 6: model: with a list in agents.yml builds a shared HedgedModel."""
+        model = get_model(["test:one", "test:two"])
+        self.assertIsInstance(model, HedgedModel)
+        self.assertIs(model, get_model(["test:one", "test:two"]))
+        self.assertIs(model.models[0], get_model("test:one"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the TurnScheduler floor control.
+Tests: 1) round robin after the sender, 2) addressed agents first, 3) relevance ranking,
+4) only one agent takes the floor per message
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core import scheduler as scheduler_module
+from app.core.scheduler import TurnScheduler
+
+PARTICIPANTS = {
+    "Ada": "You are Ada, an analytical thinker who loves code and mathematics.",
+    "Joseph": "You are Joseph, you repair misunderstandings and clarify ambiguity.",
+    "Giulio": "You are Giulio, a painter and architect with an eye for design.",
+}
+
+
+def _scheduler(name="Ada", **kwargs) -> TurnScheduler:
+    return TurnScheduler(name, "chat", PARTICIPANTS, **kwargs)
+
+
+class FakeRedis:
+    """Just enough of SET NX for leases."""
+
+    def __init__(self):
+        self.keys = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+
+class TestTurnScheduler(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.scheduler.TurnScheduler."""
+
+    def test_round_robin_starts_after_sender(self):
+        """Test 1: The agent after the sender speaks next, the sender never does."""
+        scheduler = _scheduler(policy="round_robin")
+        self.assertEqual(scheduler.rank("Ada", "hello", "m1"), ["Joseph", "Giulio"])
+        self.assertEqual(scheduler.rank("Giulio", "hello", "m1"), ["Ada", "Joseph"])
+
+        # Human senders start at a position derived from the message id
+        ranked = scheduler.rank("Agent Rebel", "hello", "m1")
+        self.assertEqual(sorted(ranked), sorted(PARTICIPANTS))
+        self.assertEqual(ranked, scheduler.rank("Agent Rebel", "hello", "m1"))
+
+    def test_addressed_first(self):
+        """Test 2: Named participants jump the queue."""
+        scheduler = _scheduler(policy="addressed_first")
+        self.assertEqual(
+            scheduler.rank("Ada", "What do you think, giulio?", "m1")[0], "Giulio"
+        )
+        self.assertEqual(scheduler.rank("Ada", "Thoughts?", "m1")[0], "Joseph")
+
+    def test_relevance(self):
+        """Test 3: The participant whose prompt overlaps most with the message wins."""
+        scheduler = _scheduler(policy="relevance")
+        ranked = scheduler.rank(
+            "Agent Rebel", "Which design would a painter pick?", "m1"
+        )
+        self.assertEqual(ranked[0], "Giulio")
+
+    async def test_single_lease_per_message(self):
+        """Test 4: Replicas of the winner race for one lease; losers stand down."""
+        fake = FakeRedis()
+        message = {"id": "m1", "sender": "Ada", "content": "hello"}
+        with patch.object(scheduler_module, "redis_client", fake):
+            joseph, joseph_replica, giulio = (
+                _scheduler("Joseph"),
+                _scheduler("Joseph"),
+                _scheduler("Giulio"),
+            )
+            self.assertTrue(await joseph.acquire_turn(message))
+            self.assertFalse(await joseph_replica.acquire_turn(message))
+            self.assertFalse(await giulio.acquire_turn(message))
+
+        self.assertEqual(joseph_replica.stats()["lost"], 1)
+        self.assertEqual(giulio.stats()["declined"], 1)
+
+    def test_unknown_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            _scheduler(policy="loudest")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for streamed replies.
+Tests: 1) FastAgent._agent_stream forwards deltas in order and returns the
+full reply with usage, 2) RedisHandler publishes the deltas in order before
+the final reply, 3) /chat/stream sends one event per delta, then done
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.models.function import FunctionModel
+
+from app.agents import agent as agent_module
+from app.agents.agent import FastAgent
+from app.core.redis import RedisHandler, stream_channel
+
+CHUNKS = ["Hello", ", ", "world", "!"]
+
+
+async def stream_chunks(_messages, _info):
+    for chunk in CHUNKS:
+        yield chunk
+
+
+async def no_history():
+    return []
+
+
+def streaming_agent() -> FastAgent:
+    agent = FastAgent({"name": "Ada", "system_prompt": "You are Ada.", "model": "test"})
+    agent.agent = Agent(FunctionModel(stream_function=stream_chunks))
+    agent.redis_handler.get_message_history = no_history
+    return agent
+
+
+class FakeRedis:
+    """Records PUBLISH calls."""
+
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel: str, message: str):
+        self.published.append((channel, json.loads(message)))
+
+
+class TestStreaming(unittest.IsolatedAsyncioTestCase):
+    """Tests for streaming through FastAgent, RedisHandler and /chat/stream."""
+
+    def setUp(self):
+        # Forward every chunk as it arrives instead of grouping them
+        patcher = patch.object(agent_module, "STREAM_DEBOUNCE", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_agent_stream(self):
+        """Test 1: Deltas arrive in order and add up to the reply."""
+        agent = streaming_agent()
+        deltas = []
+
+        async def on_delta(delta: str):
+            deltas.append(delta)
+
+        reply = await agent._agent_call("hi", on_delta=on_delta)
+        self.assertEqual(deltas, CHUNKS)
+        self.assertEqual(reply.output, "Hello, world!")
+        self.assertEqual(reply.usage().requests, 1)
+        self.assertGreater(reply.usage().response_tokens, 0)
+
+    async def test_publish_deltas(self):
+        """Test 2: Every delta is published on the side channel, in order."""
+        agent = streaming_agent()
+        handler = RedisHandler("Ada", "chat", "chat_history", stream=True)
+        client = FakeRedis()
+        replies = []
+
+        async def publish_response(response, stream_id=None):
+            replies.append((response, stream_id))
+
+        with (
+            patch("app.core.redis.redis_client", client),
+            patch.object(handler, "publish_response", publish_response),
+        ):
+            await handler._respond("hi", agent._agent_call)
+
+        self.assertEqual(
+            {channel for channel, _ in client.published}, {stream_channel("chat")}
+        )
+        chunks = [chunk for _, chunk in client.published]
+        self.assertEqual([chunk["content"] for chunk in chunks], CHUNKS)
+        self.assertTrue(all(chunk["type"] == "stream" for chunk in chunks))
+        ((reply, stream_id),) = replies
+        self.assertEqual({chunk["stream_id"] for chunk in chunks}, {stream_id})
+        self.assertEqual(reply.output, "Hello, world!")
+        self.assertIsNotNone(reply.usage())
+
+    def test_chat_stream_route(self):
+        """Test 3: /chat/stream sends the deltas as events, then the reply."""
+        agent = streaming_agent()
+        response = TestClient(agent.app).post("/chat/stream", json={"message": "hi"})
+        self.assertEqual(response.status_code, 200)
+        events = response.text.strip().split("\n\n")
+        deltas = [
+            json.loads(event.removeprefix("data: "))["delta"] for event in events[:-1]
+        ]
+        self.assertEqual(deltas, CHUNKS)
+        self.assertTrue(events[-1].startswith("event: done\n"))
+        done = json.loads(events[-1].split("data: ", 1)[1])
+        self.assertEqual(done, {"response": "Hello, world!", "agent_name": "Ada"})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
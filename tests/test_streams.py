@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for the Redis Streams transport (needs a Redis server).
+Tests: 1) publish_message appends to the event stream and read_events sees
+it, 2) a new group reads messages sent before it existed, 3) every group
+gets every message, 4) replicas of one group split the load, 5) a dead
+consumer's pending entries are reclaimed, 6) a restarted consumer replays
+its pending entries and acknowledges trimmed ones, 7) a reconnect does not
+deliver in-flight entries again, 8) a busy replica leaves new entries to idle
+ones and its own are not reclaimed
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+import redis.asyncio as aioredis
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.connections import REDIS_URL
+from app.core.redis import StreamConsumer, events_key, publish_message, read_events
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+async def take(messages, count: int) -> list[tuple[str, str]]:
+    """The next `count` (entry_id, content) pairs of a consumer."""
+    taken = []
+    for _ in range(count):
+        entry_id, fields = await asyncio.wait_for(anext(messages), 2)
+        taken.append((entry_id, json.loads(fields["data"])["content"]))
+    return taken
+
+
+@requires_redis
+class TestStreams(RedisTestCase):
+    """Tests for StreamConsumer, read_events and publish_message."""
+
+    client_modules = ("app.core.redis",)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        # Blocking reads get their own connection, like redis_listener
+        self.listener = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+        self.addAsyncCleanup(self.listener.aclose)
+        self.patch("app.core.redis.redis_listener", self.listener)
+        self.patch("app.core.redis.REDIS_TRANSPORT", "streams")
+        self.topic = f"test-chat-{uuid.uuid4().hex[:8]}"
+        self.key = events_key(self.topic)
+        self.generators = []
+
+    async def asyncTearDown(self):
+        for messages in self.generators:
+            await messages.aclose()
+        await self.client.delete(self.key)
+
+    def _consume(self, group: str, consumer: str | None = None):
+        messages = StreamConsumer(self.topic, group, consumer, timeout=0.1)
+        generator = messages.messages()
+        self.generators.append(generator)
+        return messages, generator
+
+    async def _publish(self, *contents: str):
+        for content in contents:
+            await publish_message(self.topic, {"content": content, "sender": "Ada"})
+
+    async def test_publish_and_read_events(self):
+        """Test 1: Messages go to the event stream, observers see new ones."""
+        await self._publish("before")
+        events = read_events(self.topic, timeout=0.1)
+        self.generators.append(events)
+        reading = asyncio.create_task(anext(events))
+        await asyncio.sleep(0.05)
+        await self._publish("after")
+        fields = await asyncio.wait_for(reading, 2)
+        self.assertEqual(json.loads(fields["data"])["content"], "after")
+        self.assertEqual(await self.client.xlen(self.key), 2)
+
+    async def test_group_reads_earlier_messages(self):
+        """Test 2: A group created after the first messages still gets them."""
+        await self._publish("one", "two")
+        consumer, messages = self._consume("Bob")
+        self.assertEqual(
+            [content for _, content in await take(messages, 2)], ["one", "two"]
+        )
+        await consumer.ensure_group()  # exists already, not an error
+
+    async def test_fan_out(self):
+        """Test 3: Each agent's group receives every message."""
+        _, bob = self._consume("Bob")
+        _, eve = self._consume("Eve")
+        await self._publish("one", "two")
+        for messages in (bob, eve):
+            self.assertEqual(
+                [content for _, content in await take(messages, 2)], ["one", "two"]
+            )
+
+    async def test_replicas_split_load(self):
+        """Test 4: Replicas sharing a group never get the same entry."""
+        _, first = self._consume("Bob", "Bob-0")
+        _, second = self._consume("Bob", "Bob-1")
+        await self._publish("a", "b", "c", "d")
+        taken = {"Bob-0": [], "Bob-1": []}
+        for _ in range(2):
+            taken["Bob-0"] += await take(first, 1)
+            taken["Bob-1"] += await take(second, 1)
+        contents = [content for entries in taken.values() for _, content in entries]
+        self.assertEqual(sorted(contents), ["a", "b", "c", "d"])
+        pending = await self.client.xpending(self.key, "Bob")
+        self.assertEqual(
+            {c["name"]: c["pending"] for c in pending["consumers"]},
+            {"Bob-0": 2, "Bob-1": 2},
+        )
+
+    async def test_reclaim_dead_consumer(self):
+        """Test 5: Entries a dead replica never acknowledged go to another."""
+        _, dead = self._consume("Bob", "Bob-0")
+        await self._publish("orphan")
+        ((entry_id, _),) = await take(dead, 1)
+        await dead.aclose()
+
+        with patch("app.core.redis.STREAM_RECLAIM_IDLE_MS", 0):
+            consumer, alive = self._consume("Bob", "Bob-1")
+            self.assertEqual(await take(alive, 1), [(entry_id, "orphan")])
+        await consumer.ack(entry_id)
+        self.assertEqual((await self.client.xpending(self.key, "Bob"))["pending"], 0)
+
+    async def test_restart_replays_pending(self):
+        """Test 6: A restarted replica (same name) replays what it had pending."""
+        with patch.dict(os.environ, {"SUPERVISOR_REPLICA": "1"}):
+            _, crashed = self._consume("Bob")
+            await self._publish("a", "b", "c")
+            taken = await take(crashed, 3)
+            await crashed.aclose()
+            await self.client.xdel(self.key, taken[0][0])  # trimmed meanwhile
+
+            consumer, restarted = self._consume("Bob")
+        self.assertEqual(consumer.consumer, "Bob-1")
+        self.assertEqual(await take(restarted, 2), taken[1:])
+        self.assertEqual((await self.client.xpending(self.key, "Bob"))["pending"], 2)
+
+    async def test_reconnect_skips_in_flight(self):
+        """Test 7: Entries still being handled are not delivered again."""
+        consumer, messages = self._consume("Bob", "Bob-0")
+        await self._publish("slow")
+        self.assertEqual([content for _, content in await take(messages, 1)], ["slow"])
+
+        reclaim = consumer._reclaim
+        failures = []
+
+        async def flaky_reclaim():
+            if not failures:
+                failures.append(1)
+                raise aioredis.ConnectionError("connection lost")
+            return await reclaim()
+
+        consumer._reclaim = flaky_reclaim
+        await self._publish("next")
+        self.assertEqual([content for _, content in await take(messages, 1)], ["next"])
+        self.assertEqual(failures, [1])
+
+    async def test_busy_replica_holds_off(self):
+        """Test 8: A busy replica reads no more and keeps what it holds."""
+        with (
+            patch("app.core.redis.STREAM_RECLAIM_IDLE_MS", 200),
+            patch("app.core.redis.STREAM_REFRESH_MS", 50),
+        ):
+            idle = asyncio.Event()
+            idle.set()
+            consumer = StreamConsumer(
+                self.topic, "Bob", "Bob-0", timeout=0.1, idle=idle
+            )
+            consumer._last_reclaim = float("inf")  # only the other replica reclaims
+            busy = consumer.messages()
+            self.generators.append(busy)
+            await self._publish("answering")
+            ((entry_id, _),) = await take(busy, 1)
+            # Not acknowledged: Bob-0 is still answering it
+            idle.clear()
+            reading = asyncio.create_task(anext(busy))
+            await self._publish("next")
+            await asyncio.sleep(0.5)
+            self.assertFalse(reading.done())
+
+            other = StreamConsumer(self.topic, "Bob", "Bob-1", timeout=0.1)
+            self.assertEqual(await other._reclaim(), [])
+            _, entries = await other._read(">")
+            self.assertEqual(
+                [json.loads(fields["data"])["content"] for _, fields in entries],
+                ["next"],
+            )
+            reading.cancel()
+        pending = await self.client.xpending_range(self.key, "Bob", "-", "+", 10)
+        held = next(entry for entry in pending if entry["consumer"] == "Bob-0")
+        self.assertEqual(held["message_id"], entry_id)
+        self.assertLess(held["time_since_delivered"], 200)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the process supervisor.
+Tests: 1) restart backoff doubles up to the cap, 2) autoscale decisions,
+3) a dead replica is restarted on a new port after its backoff,
+4) replica indexes are reused after scaling down, 5) a replica whose port
+was taken is started on another one right away
+"""
+
+import socket
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core import supervisor as supervisor_module
+from app.core.supervisor import (
+    RESTART_MAX_DELAY,
+    AutoscalePolicy,
+    Replica,
+    Service,
+    Supervisor,
+    restart_delay,
+)
+
+
+class FakeProcess:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.exitcode = None if alive else 1
+
+    def is_alive(self):
+        return self.alive
+
+
+class TestSupervisor(unittest.TestCase):
+    """Tests for app.core.supervisor."""
+
+    def test_restart_backoff(self):
+        """Test 1: 1s, 2s, 4s ... capped at RESTART_MAX_DELAY."""
+        self.assertEqual([restart_delay(n) for n in range(3)], [1.0, 2.0, 4.0])
+        self.assertEqual(restart_delay(20), RESTART_MAX_DELAY)
+
+    def test_autoscale_decisions(self):
+        """Test 2: Scale on queue depth or latency, within the bounds."""
+        policy = AutoscalePolicy(
+            min_replicas=1, max_replicas=3, inbox_depth=4, p95_ms=1000
+        )
+        self.assertEqual(policy.decide(1, [10], []), 1)
+        self.assertEqual(policy.decide(1, [0], [2500]), 1)
+        self.assertEqual(policy.decide(3, [10, 10, 10], []), 0)
+        self.assertEqual(policy.decide(2, [0, 1], [300]), -1)
+        self.assertEqual(policy.decide(1, [0], [300]), 0)
+        self.assertEqual(policy.decide(2, [2, 3], [800]), 0)
+        self.assertEqual(policy.decide(2, [], []), 0)
+
+    def test_dead_replica_restarted(self):
+        """Test 3: The first check schedules the restart, a later one performs it."""
+        supervisor = Supervisor([])
+        replica = Replica(
+            Service("Ada", print), port=8001, process=FakeProcess(alive=False)
+        )
+        spawned = []
+
+        with (
+            patch.object(supervisor_module, "free_port", return_value=8123),
+            patch.object(Supervisor, "_spawn", lambda self, r: spawned.append(r.port)),
+        ):
+            supervisor._check(replica, now=100.0)
+            self.assertEqual(replica.restart_at, 101.0)
+            supervisor._check(replica, now=100.5)
+            self.assertEqual(spawned, [])
+            supervisor._check(replica, now=101.0)
+
+        self.assertEqual(spawned, [8123])
+        self.assertEqual((replica.restarts, supervisor.restarts), (1, 1))
+
+    def test_replica_index_reused(self):
+        """Test 4: A new replica takes the lowest index not in use."""
+        service = Service("Ada", print)
+        supervisor = Supervisor([service])
+        with patch.object(Supervisor, "_spawn", lambda self, r: None):
+            replicas = [supervisor._add_replica(service) for _ in range(3)]
+            self.assertEqual([r.index for r in replicas], [0, 1, 2])
+            supervisor.replicas.remove(replicas[1])
+            self.assertEqual(supervisor._add_replica(service).index, 1)
+
+    def test_taken_port_retried(self):
+        """Test 5: Losing the port race is not counted as a crash."""
+        supervisor = Supervisor([])
+        spawned = []
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as other:
+            other.bind(("", 0))
+            other.listen()
+            port = other.getsockname()[1]
+            replica = Replica(
+                Service("Ada", print), port=port, process=FakeProcess(alive=False)
+            )
+            with (
+                patch.object(supervisor_module, "free_port", return_value=8123),
+                patch.object(
+                    Supervisor, "_spawn", lambda self, r: spawned.append(r.port)
+                ),
+            ):
+                supervisor._check(replica, now=100.0)
+
+        self.assertEqual(spawned, [8123])
+        self.assertEqual((replica.restarts, replica.restart_at), (0, None))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
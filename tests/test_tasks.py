@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for supervised background tasks and the event-loop lag monitor.
+Tests: 1) a crashed task is restarted, 2) cancelling the supervisor cancels
+the running task, 3) a blocked loop shows up as lag
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core import tasks
+from app.core.tasks import LoopLagMonitor, supervise
+
+
+class TestSupervise(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.tasks.supervise."""
+
+    async def test_restarts_after_crash(self):
+        """Test 1: The factory is called again after it raised."""
+        runs = 0
+        restarted = asyncio.Event()
+
+        async def flaky():
+            nonlocal runs
+            runs += 1
+            if runs == 1:
+                raise RuntimeError("boom")
+            restarted.set()
+            await asyncio.Event().wait()
+
+        with patch.object(tasks, "RESTART_MIN_DELAY", 0.01):
+            task = asyncio.create_task(supervise("flaky", flaky))
+            await asyncio.wait_for(restarted.wait(), 1)
+            task.cancel()
+        self.assertEqual(runs, 2)
+
+    async def test_cancellation_propagates(self):
+        """Test 2: Cancelling supervise cancels the task and is not swallowed."""
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def worker():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        task = asyncio.create_task(supervise("worker", worker))
+        await started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(cancelled.is_set())
+
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.tasks.LoopLagMonitor."""
+
+    async def test_measures_blocking(self):
+        """Test 3: A 50 ms blocking call is reported as at least 40 ms lag."""
+        monitor = LoopLagMonitor(interval=0.01, warn_threshold=1)
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.02)
+        time.sleep(0.05)  # blocks the event loop
+        await asyncio.sleep(0.03)
+        task.cancel()
+
+        stats = monitor.stats()
+        self.assertGreaterEqual(stats["max_lag_ms"], 40)
+        self.assertGreater(stats["samples"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat topic registry (needs a Redis server).
+Tests: 1) the first history write registers the topic, 2) histories written
+before the registry are found by SCAN once
+"""
+
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from app.core import topics
+from app.core.redis import RedisHandler
+from tests.redis_case import RedisTestCase, requires_redis
+
+
+@requires_redis
+class TestTopicRegistry(RedisTestCase):
+    """Tests for app.core.topics."""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.prefix = f"test-{uuid.uuid4().hex[:8]}"
+        registry = f"{self.prefix}_topics"
+        self.patch("app.core.topics.TOPICS_KEY", registry)
+        self.patch("app.core.topics.TOPICS_BACKFILLED_KEY", f"{registry}_backfilled")
+
+    async def asyncTearDown(self):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+        await self.client.aclose()
+
+    async def test_first_write_registers(self):
+        """Test 1: Storing history adds the channel to the registry once."""
+        channel = f"{self.prefix}-chat-2025-01-02-test"
+        handler = RedisHandler("Bot", channel, f"{channel}_history")
+        handler_client = patch("app.core.redis.redis_client", self.client)
+        with handler_client:
+            for _ in range(2):
+                result = await Agent(TestModel()).run("hello")
+                await handler._store_message_history(result)
+        self.assertTrue(handler.topic_registered)
+        self.assertEqual(await self.client.zrange(topics.TOPICS_KEY, 0, -1), [channel])
+
+        await self.client.set(topics.TOPICS_BACKFILLED_KEY, 1)
+        self.assertEqual(await topics.list_topics(self.client), [channel])
+
+    async def test_scan_backfill(self):
+        """Test 2: Unregistered histories are found by SCAN and registered."""
+        old = f"{self.prefix}-chat-2024-05-06-old"
+        await self.client.rpush(f"{old}_history", "[]")
+        await self.client.set(f"{old}_history_seq", 1)
+
+        self.assertIn(old, await topics.list_topics(self.client))
+        created = await self.client.zscore(topics.TOPICS_KEY, old)
+        self.assertEqual(created, topics._created_from_name(old))
+        # Backfilled once: later listings only read the registry
+        with patch.object(topics, "scan_topics") as scan:
+            self.assertIn(old, await topics.list_topics(self.client))
+            scan.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
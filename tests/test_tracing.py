@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for end-to-end message tracing.
+Tests: 1) a reply continues the trace of the message it answers,
+2) exported spans round-trip through the OTLP files into the waterfall
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.agents.reply import AgentReply
+from app.core import redis as redis_module
+from app.core import tracing
+from app.core.redis import RedisHandler
+from app.core.tracing import SpanExporter, load_spans, span
+from scripts.trace_waterfall import hops, render
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    """Tests for app.core.tracing and its use in RedisHandler."""
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        exporter = SpanExporter(self.directory.name, enabled=True)
+        self.addCleanup(exporter.close)
+        patcher = patch.object(tracing, "exporter", exporter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _reply_to_human(self) -> tuple[dict, dict]:
+        """Publish a traced human message and let an agent answer it."""
+        handler = RedisHandler("Ada", "chat", "chat_history")
+        published = []
+
+        async def publish_message(_channel, message):
+            published.append(message)
+
+        async def store(_response):
+            return "[]", 1
+
+        async def agent_call(_prompt):
+            with span("model_call", "Ada"):
+                await asyncio.sleep(0.01)
+            return AgentReply(output="hi Rebel", messages_json=b"[]")
+
+        handler._store_message_history = store
+        with span("publish", "chat_server") as publishing:
+            human = {
+                "type": "message",
+                "sender": "Rebel",
+                "content": "hi",
+                **publishing.envelope(),
+            }
+
+        with patch.object(redis_module, "publish_message", publish_message):
+            responder = asyncio.create_task(handler._respond_loop(agent_call))
+            await handler._process_message({"data": json.dumps(human)})
+            while not published:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0)
+            responder.cancel()
+        return human, published[0]
+
+    async def test_reply_continues_trace(self):
+        """Test 1: Same trace id, the reply's parent is the agent's publish span."""
+        human, reply = await self._reply_to_human()
+        self.assertEqual(reply["trace_id"], human["trace_id"])
+
+        spans = {span["span_id"]: span for span in load_spans(self.directory.name)}
+        publish = spans[reply["parent_id"]]
+        self.assertEqual((publish["service"], publish["name"]), ("Ada", "publish"))
+        receive = spans[publish["parent_id"]]
+        self.assertEqual(receive["name"], "receive")
+        self.assertEqual(receive["parent_id"], human["parent_id"])
+
+    async def test_waterfall(self):
+        """Test 2: The waterfall shows the chain and the chat_server -> Ada hop."""
+        human, _ = await self._reply_to_human()
+        spans = load_spans(self.directory.name)
+        members = [span for span in spans if span["trace_id"] == human["trace_id"]]
+        self.assertEqual(
+            sorted(span["name"] for span in members),
+            ["model_call", "publish", "publish", "receive"],
+        )
+        ((_, parent, child),) = hops(members)
+        self.assertEqual((parent["service"], child["name"]), ("chat_server", "receive"))
+        self.assertIn("model_call", render(spans, human["trace_id"]))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)